@@ -0,0 +1,146 @@
+"""
+Görsel varlıklar (assets/ altındaki PNG/GIF dosyaları). Her dosya bir kez
+okunur ve tk.PhotoImage olarak bir kez çözülür; ölçeklenmiş kopyalar
+(ad, boyut) anahtarıyla önbellekte tutulur. Ekranlar yeniden oluşturulsa da
+aynı PhotoImage nesnesini kullanır.
+
+Isınma (warm) giriş ekranı çizildikten sonra başlar: dosyalar arka plan
+thread'inde okunur, çözme ve ölçekleme ise Tk'nın ana thread'inde (PhotoImage
+yalnızca orada oluşturulabilir) boşta kalma anlarında her seferinde tek bir
+görüntü olacak şekilde yapılır. Henüz hazır olmayan bir görüntüye bind() ile
+bağlanan widget'lar görüntü hazır olunca güncellenir.
+"""
+import os
+import threading
+import time
+import tkinter as tk
+from fractions import Fraction
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+MAX_SCALE_STEP = 8  # zoom/subsample çarpanları için en büyük payda
+
+# Varlık adı -> dosya
+ASSETS = {
+    "logo": "logo.png",
+}
+
+# 1080x1080 düzende kullanılan boyutlar
+LOGO_LOGIN = (332, 100)
+LOGO_HEADER = (166, 50)
+
+# Isınmada hazırlanan (ad, boyut) çiftleri; boyut None ise özgün boyut
+WARM_VARIANTS = [("logo", LOGO_LOGIN), ("logo", LOGO_HEADER)]
+
+
+def scale_factors(width, height, size):
+    """
+    Görüntüyü en-boy oranını koruyarak size'a sığdıran (zoom, subsample) çarpanları.
+    PhotoImage yalnızca tam sayı çarpanlarla ölçeklenebildiği için oran kesirle yaklaşıklanır.
+    """
+    scale = min(size[0] / width, size[1] / height)
+    fraction = Fraction(scale).limit_denominator(MAX_SCALE_STEP)
+    if fraction == 0:
+        fraction = Fraction(1, MAX_SCALE_STEP)
+    return fraction.numerator, fraction.denominator
+
+
+class AssetManager:
+    """
+    post(fn, *args) arka plan thread'inden ana thread'e çağrı iletmek için
+    kullanılır (UiDispatcher.post). timings verilirse okuma ve çözme süreleri
+    oraya kaydedilir.
+    """
+
+    def __init__(self, root, post, directory=ASSET_DIR, assets=ASSETS, timings=None):
+        self.root = root
+        self.post = post
+        self.directory = directory
+        self.assets = assets
+        self.timings = timings
+        self.images = {}        # (ad, boyut) -> PhotoImage
+        self._data = {}         # ad -> dosya baytları (ısınmada arka planda okunur)
+        self._waiting = {}      # (ad, boyut) -> [widget, ...]
+        self._pending = []
+        self.warm_started = None
+
+    def _record(self, name, seconds):
+        if self.timings is not None:
+            self.timings.record(name, seconds)
+
+    def _read(self, name):
+        with open(os.path.join(self.directory, self.assets[name]), "rb") as f:
+            return f.read()
+
+    def get(self, name, size=None):
+        """
+        Görüntüyü (gerekirse hemen çözerek) döndürür. Ana thread'den çağrılmalıdır.
+        """
+        key = (name, size)
+        image = self.images.get(key)
+        if image is not None:
+            return image
+        start = time.perf_counter()
+        if size is None:
+            data = self._data.pop(name, None) or self._read(name)
+            image = tk.PhotoImage(master=self.root, data=data)
+        else:
+            original = self.get(name)
+            zoom, subsample = scale_factors(original.width(), original.height(), size)
+            image = original.zoom(zoom) if zoom > 1 else original
+            if subsample > 1:
+                image = image.subsample(subsample)
+        self._record(f"varlık: {name} {size or 'özgün'}", time.perf_counter() - start)
+        self.images[key] = image
+        for widget in self._waiting.pop(key, []):
+            if widget.winfo_exists():
+                widget.config(image=image)
+        return image
+
+    def bind(self, widget, name, size=None):
+        """
+        Görüntü hazırsa widget'a hemen, değilse ısınmada çözüldüğünde atar.
+        Açılışta çağrılması ilk çizimi geciktirmez.
+        """
+        image = self.images.get((name, size))
+        if image is not None:
+            widget.config(image=image)
+        else:
+            self._waiting.setdefault((name, size), []).append(widget)
+
+    def warm(self, variants=WARM_VARIANTS):
+        """
+        Dosyaları arka planda okur, ardından görüntüleri boşta kalma anlarında tek tek çözer.
+        """
+        self.warm_started = time.perf_counter()
+        self._pending = [variant for variant in variants if variant not in self.images]
+        names = sorted({name for name, _ in self._pending})
+        threading.Thread(target=self._read_all, args=(names,), name="asset-reader",
+                         daemon=True).start()
+
+    def _read_all(self, names):
+        start = time.perf_counter()
+        data = {}
+        for name in names:
+            try:
+                data[name] = self._read(name)
+            except OSError:
+                pass  # Eksik dosya yalnızca o görüntüyü boş bırakır
+        self._record("varlıklar: okuma (arka plan)", time.perf_counter() - start)
+        self.post(self._on_read, data)
+
+    def _on_read(self, data):
+        self._data.update(data)
+        self.root.after_idle(self._decode_next)
+
+    def _decode_next(self):
+        while self._pending:
+            name, size = self._pending.pop(0)
+            if name in self._data or (name, None) in self.images:
+                try:
+                    self.get(name, size)
+                except tk.TclError:
+                    continue  # Bozuk dosya; diğer görüntüler yine hazırlanır
+                # Kalan görüntüler bir sonraki boşta kalmaya bırakılır
+                self.root.after_idle(self._decode_next)
+                return
+        self._record("varlıklar: ısınma (toplam)", time.perf_counter() - self.warm_started)
@@ -0,0 +1,302 @@
+"""
+Ses uyarıları. Ses dosyaları (complete.wav vb.) açılışta bir kez wave
+modülüyle çözülüp bellekte ham PCM olarak tutulur; çalma isteği yalnızca
+kuyruğa bir öğe ekler, çalma işi arka plandaki AudioWorker thread'inde
+yapılır. Böylece Tk döngüsü ne dosya okumayı ne de çalmayı bekler.
+
+Çıkış arka ucu (sink) değiştirilebilir:
+    NullSink    sesi atar (test ve sessiz cihazlar)
+    FileSink    her çalmayı bir .wav dosyasına yazar (test)
+    WinSoundSink  Windows'ta winsound ile çalar
+    AplaySink   Linux'ta aplay'e ham PCM akıtır
+select_sink("auto") platformda bulunan ilk gerçek arka ucu, yoksa NullSink'i seçer.
+
+Gecikme, play() çağrısından sink'in ilk ses tamponunu kabul ettiği ana
+kadar ölçülür ve latency_stats() ile raporlanır.
+"""
+import io
+import math
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+
+CHUNK_MS = 20                 # Sink'e bir seferde verilen ses (kesilebilirlik için)
+LATENCY_HISTORY = 256         # Saklanan son gecikme ölçümü sayısı
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Cue:
+    """
+    Belleğe çözülmüş bir ses. frames, wave'in verdiği ham PCM baytlarıdır.
+    """
+
+    __slots__ = ("name", "channels", "sample_width", "frame_rate", "frames", "_wav")
+
+    def __init__(self, name, channels, sample_width, frame_rate, frames):
+        self.name = name
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_rate = frame_rate
+        self.frames = frames
+        self._wav = None
+
+    @property
+    def frame_size(self):
+        return self.channels * self.sample_width
+
+    @property
+    def duration(self):
+        return len(self.frames) / (self.frame_size * self.frame_rate)
+
+    def chunks(self, ms=CHUNK_MS):
+        step = max(1, self.frame_rate * ms // 1000) * self.frame_size
+        frames = memoryview(self.frames)
+        for offset in range(0, len(frames), step):
+            yield frames[offset:offset + step]
+
+    def to_wav(self):
+        """
+        RIFF başlıklı tam WAV baytları (bir kez oluşturulur; winsound SND_MEMORY için).
+        """
+        if self._wav is None:
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as out:
+                out.setnchannels(self.channels)
+                out.setsampwidth(self.sample_width)
+                out.setframerate(self.frame_rate)
+                out.writeframes(self.frames)
+            self._wav = buffer.getvalue()
+        return self._wav
+
+
+def load_cue(name, path):
+    with wave.open(path, "rb") as source:
+        if source.getcomptype() != "NONE":
+            raise ValueError(f"{path}: sıkıştırılmış WAV desteklenmiyor")
+        return Cue(name, source.getnchannels(), source.getsampwidth(), source.getframerate(),
+                   source.readframes(source.getnframes()))
+
+
+def tone(name, frequency, ms, volume=0.4, frame_rate=22050):
+    """
+    Dosyasız kısa uyarı sesi (16 bit mono sinüs, uçları yumuşatılmış).
+    """
+    count = frame_rate * ms // 1000
+    fade = max(1, count // 10)
+    samples = []
+    for i in range(count):
+        envelope = min(1.0, i / fade, (count - i) / fade)
+        samples.append(int(32767 * volume * envelope * math.sin(2 * math.pi * frequency * i / frame_rate)))
+    return Cue(name, 1, 2, frame_rate, struct.pack(f"<{count}h", *samples))
+
+
+def default_cues():
+    """
+    Uygulamanın uyarıları: ad -> dosya yolu veya hazır Cue.
+    """
+    return {
+        "complete": os.path.join(ASSET_DIR, "complete.wav"),
+        "phase": tone("phase", 880, 120),
+        "stop": tone("stop", 440, 250),
+    }
+
+
+# ---------------------------- ÇIKIŞ ARKA UÇLARI ----------------------------
+# play(cue, started, cancelled): started() ilk tampon kabul edilince bir kez
+# çağrılır; cancelled() True dönerse çalma yarıda bırakılır.
+
+class NullSink:
+    name = "null"
+
+    def play(self, cue, started, cancelled):
+        started()
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """
+    Her çalmayı directory içine '<sıra>-<ad>.wav' olarak, parça parça yazar.
+    """
+
+    name = "file"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.count = 0
+
+    def play(self, cue, started, cancelled):
+        os.makedirs(self.directory, exist_ok=True)
+        self.count += 1
+        path = os.path.join(self.directory, f"{self.count:04d}-{cue.name}.wav")
+        with wave.open(path, "wb") as out:
+            out.setnchannels(cue.channels)
+            out.setsampwidth(cue.sample_width)
+            out.setframerate(cue.frame_rate)
+            for i, chunk in enumerate(cue.chunks()):
+                if cancelled():
+                    break
+                out.writeframesraw(chunk)
+                if i == 0:
+                    started()
+
+    def close(self):
+        pass
+
+
+class WinSoundSink:
+    name = "winsound"
+
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+
+    def play(self, cue, started, cancelled):
+        data = cue.to_wav()
+        started()
+        # SND_MEMORY, SND_ASYNC ile birlikte kullanılamaz; çalma bitene kadar
+        # yalnızca bu worker bekler, sonraki uyarı kuyrukta sırasını alır
+        self.winsound.PlaySound(data, self.winsound.SND_MEMORY)
+
+    def close(self):
+        self.winsound.PlaySound(None, self.winsound.SND_PURGE)
+
+
+class AplaySink:
+    """
+    Her çalmada aplay'i ham PCM girdisiyle başlatır ve sesi parça parça akıtır.
+    """
+
+    name = "aplay"
+    FORMATS = {1: "U8", 2: "S16_LE", 3: "S24_3LE", 4: "S32_LE"}
+
+    def __init__(self, executable=None):
+        self.executable = executable or shutil.which("aplay")
+        if self.executable is None:
+            raise OSError("aplay bulunamadı")
+
+    def play(self, cue, started, cancelled):
+        process = subprocess.Popen(
+            [self.executable, "-q", "-t", "raw", "-f", self.FORMATS[cue.sample_width],
+             "-c", str(cue.channels), "-r", str(cue.frame_rate)],
+            stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            for i, chunk in enumerate(cue.chunks()):
+                if cancelled():
+                    process.kill()
+                    break
+                process.stdin.write(chunk)
+                if i == 0:
+                    process.stdin.flush()
+                    started()
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        finally:
+            process.wait()
+
+    def close(self):
+        pass
+
+
+def select_sink(setting="auto"):
+    """
+    setting: "auto", "off" / "null", "winsound", "aplay" veya FileSink için "file:<dizin>".
+    """
+    if setting in ("off", "null"):
+        return NullSink()
+    if setting.startswith("file:"):
+        return FileSink(setting[len("file:"):])
+    candidates = {"winsound": WinSoundSink, "aplay": AplaySink}
+    if setting in candidates:
+        return candidates[setting]()
+    for factory in candidates.values():
+        try:
+            return factory()
+        except (ImportError, OSError):
+            continue
+    return NullSink()
+
+
+# ---------------------------- ÇALMA WORKER'I ----------------------------
+
+class AudioWorker:
+    """
+    Uyarıları arka plan thread'inde çözer ve çalar. play() her thread'den
+    çağrılabilir ve hemen döner. Yeni bir uyarı süren çalmayı keser (seans
+    sonu sesinin önceki bir faz sesini beklememesi için).
+    """
+
+    def __init__(self, sink, cues):
+        self.sink = sink
+        self.cues = cues              # ad -> yol veya Cue; start() sonrası ad -> Cue
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        self.played = 0
+        self.errors = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audio-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def play(self, name):
+        self._queue.put((name, time.perf_counter()))
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.sink.close()
+
+    def latency_stats(self):
+        """
+        Son ölçümlerin (sayı, p50, p99, en kötü) değerleri, milisaniye.
+        """
+        values = sorted(self.latencies)
+        if not values:
+            return {"count": 0, "p50": None, "p99": None, "max": None}
+        pick = lambda q: values[min(len(values) - 1, int(len(values) * q))] * 1000
+        return {"count": len(values), "p50": pick(0.5), "p99": pick(0.99), "max": values[-1] * 1000}
+
+    def _load(self):
+        loaded = {}
+        for name, source in self.cues.items():
+            try:
+                loaded[name] = source if isinstance(source, Cue) else load_cue(name, source)
+            except (OSError, EOFError, wave.Error, ValueError) as error:
+                # Eksik/bozuk dosya yalnızca o uyarıyı susturur
+                self.errors += 1
+                self.last_error = error
+        self.cues = loaded
+        self._ready.set()
+
+    def _run(self):
+        self._load()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            name, requested = item
+            cue = self.cues.get(name)
+            if cue is None:
+                continue
+            started = lambda: self.latencies.append(time.perf_counter() - requested)
+            try:
+                self.sink.play(cue, started, cancelled=self._queue.qsize)
+                self.played += 1
+            except Exception as error:
+                self.errors += 1
+                self.last_error = error
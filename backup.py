@@ -0,0 +1,381 @@
+"""
+therapy_history.db'nin çalışırken alınan tutarlı yedekleri (snapshot).
+
+Yedek SQLite çevrimiçi yedekleme API'siyle (Connection.backup) alınır.
+Kopyalama PAGES_PER_STEP sayfalık adımlarla ilerler ve her adımdan sonra
+STEP_PAUSE kadar beklenir, böylece arayüz ve süren seanslar yavaşlamaz.
+Kaynak bağlantı kopyalama boyunca tek bir okuma işlemi açık tutar. WAL
+kipinde okuma yazmayı engellemez; yedek hiçbir an yazma kilidi almaz ve
+log_therapy çalışmaya devam eder. Okuma işlemi açık kaldığı için kopya o anın
+tutarlı görüntüsüdür ve araya giren yazımlar yedeği yeniden başlatmaz. Bedeli,
+yedek sürerken WAL dosyasının denetim noktasında küçültülememesidir.
+
+Her yedek yedek dizininde iki dosyadır:
+    therapy_history-20261018-093000.db.gz   (gzip ile sıkıştırılmış veritabanı)
+    therapy_history-20261018-093000.json    (SHA-256, boyutlar, şema sürümü, arşiv dosyaları)
+.json en son yazılır; yalnızca .json'ı olan yedek tamamlanmış sayılır. En
+yeni keep yedek tutulur, eskileri silinir. Yedeğin başvurduğu arşiv dosyaları
+(bkz. retention.py) değişmez dosyalardır; yedek dizinindeki archive/ altına
+bir kez kopyalanır (mümkünse hard link) ve yedekler arasında paylaşılır.
+
+Geri yükleme önce yedeği geçici dosyaya açar, SHA-256'yı ve PRAGMA
+integrity_check'i doğrular, ardından mevcut dosyayı '.pre-restore' adıyla
+kenara alıp yerine koyar. Doğrulama başarısızsa mevcut veritabanına dokunulmaz.
+
+    python cli.py backup                  (yedek al, eskileri döndür)
+    python cli.py backup --list
+    python cli.py restore [yedek adı]     (verilmezse en yeni yedek)
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+
+import database
+import retention
+
+PAGES_PER_STEP = 256          # Yedekleme adımı başına kopyalanan sayfa (~1 MB)
+STEP_PAUSE = 0.005            # Adımlar arasında bekleme (sn); diğer thread'ler çalışır
+CHUNK_SIZE = 1 << 20          # Sıkıştırma ve özetlemede okunan blok
+KEEP_SNAPSHOTS = 7            # Tutulacak en fazla yedek
+SNAPSHOT_SUFFIX = ".db.gz"
+MANIFEST_SUFFIX = ".json"
+PRE_RESTORE_SUFFIX = ".pre-restore"
+SIDE_FILES = ("-wal", "-shm")  # WAL kipinde veritabanı dosyasının yanındaki dosyalar
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupCancelled(BackupError):
+    pass
+
+
+def backup_path_for(db_path):
+    """
+    Veritabanı dosyasının yedek dizini (ör. therapy_history.db -> therapy_history.backups).
+    """
+    return os.path.splitext(db_path)[0] + ".backups"
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fsync_replace(temporary, path):
+    with open(temporary, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ---------------------------- YEDEK ALMA ----------------------------
+
+def copy_database(db_path, target_path, pages=PAGES_PER_STEP, pause=STEP_PAUSE,
+                  progress=None, cancel=None):
+    """
+    Çalışan veritabanının tutarlı bir kopyasını target_path'e yazar.
+    progress(kopyalanan_sayfa, toplam_sayfa) her adımdan sonra çağrılır;
+    cancel (threading.Event) ayarlanırsa BackupCancelled yükseltilir.
+    """
+    def step(status, remaining, total):
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled()
+        if progress:
+            progress(total - remaining, total)
+        if remaining:
+            time.sleep(pause)
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(target_path)
+    try:
+        # Tüm adımlar aynı okuma işlemini (aynı görüntüyü) kullanır
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages, progress=step)
+    finally:
+        source.close()
+        target.close()
+
+
+def _compress(raw_path, path, pause):
+    """
+    raw_path'i gzip ile path'e yazar; (ham SHA-256, ham boyut) döndürür.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(raw_path, "rb") as source, gzip.open(path, "wb", compresslevel=6) as target:
+        for block in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(block)
+            target.write(block)
+            size += len(block)
+            time.sleep(pause)
+    return digest.hexdigest(), size
+
+
+def _snapshot_info(raw_path):
+    """
+    Kopyadan şema sürümü, sıcak kayıt sayısı ve arşiv dosyaları.
+    """
+    conn = sqlite3.connect(raw_path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        rows = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        parts = []
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'archive_parts'").fetchone():
+            parts = [path for path, in conn.execute("SELECT path FROM archive_parts")]
+        return version, rows, parts
+    finally:
+        conn.close()
+
+
+def _link_or_copy(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target + ".part")
+        _fsync_replace(target + ".part", target)
+
+
+def _backup_archive(parts, archive_dir, directory):
+    """
+    Yedeğin başvurduğu arşiv dosyalarını yedek dizinine (yoksa) kopyalar; {ad: SHA-256}.
+    """
+    checksums = {}
+    for name in parts:
+        stored = os.path.join(directory, "archive", name)
+        if not os.path.exists(stored):
+            try:
+                _link_or_copy(os.path.join(archive_dir, name), stored)
+            except FileNotFoundError:
+                # Kopyalama sürerken birleştirilmiş olabilir; bir sonraki yedek tutarlı olur
+                raise BackupError(f"arşiv dosyası bulunamadı: {name}")
+        checksums[name] = _sha256_file(stored)
+    return checksums
+
+
+def create_snapshot(db_path=None, directory=None, keep=KEEP_SNAPSHOTS, pages=PAGES_PER_STEP,
+                    pause=STEP_PAUSE, progress=None, cancel=None):
+    """
+    Yedek alır, eski yedekleri döndürür ve yedeğin bilgilerini (manifest) döndürür.
+    Hata veya iptal durumunda yarım dosyalar silinir.
+    """
+    db_path = db_path or database.DB_PATH
+    if not os.path.exists(db_path):
+        raise BackupError(f"veritabanı bulunamadı: {db_path}")
+    directory = directory or backup_path_for(db_path)
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    name = f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}"
+    suffix = 1
+    while os.path.exists(os.path.join(directory, name + MANIFEST_SUFFIX)):
+        suffix += 1
+        name = f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+    base = os.path.join(directory, name)
+    raw_path = base + ".db.part"
+    snapshot_path = base + SNAPSHOT_SUFFIX
+    manifest_path = base + MANIFEST_SUFFIX
+
+    started = time.perf_counter()
+    try:
+        copy_database(db_path, raw_path, pages, pause, progress, cancel)
+        copied = time.perf_counter()
+        version, rows, parts = _snapshot_info(raw_path)
+        sha256, size = _compress(raw_path, snapshot_path + ".part", pause)
+        _fsync_replace(snapshot_path + ".part", snapshot_path)
+        archive = _backup_archive(parts, retention.archive_path_for(db_path), directory)
+        manifest = {
+            "name": name,
+            "database": os.path.basename(db_path),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "size": size,
+            "sha256": sha256,
+            "compressed_size": os.path.getsize(snapshot_path),
+            "schema_version": version,
+            "history_rows": rows,
+            "archive": archive,
+            "copy_seconds": round(copied - started, 3),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        with open(manifest_path + ".part", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        _fsync_replace(manifest_path + ".part", manifest_path)
+    except BaseException:
+        _remove(raw_path, snapshot_path + ".part", snapshot_path, manifest_path + ".part")
+        raise
+    finally:
+        _remove(raw_path)
+    rotate(directory, keep)
+    return manifest
+
+
+def list_snapshots(directory=None):
+    """
+    Tamamlanmış yedeklerin manifestleri, en yeni önce.
+    """
+    directory = directory or backup_path_for(database.DB_PATH)
+    manifests = []
+    for path in glob.glob(os.path.join(directory, "*" + MANIFEST_SUFFIX)):
+        with open(path, encoding="utf-8") as f:
+            manifests.append(json.load(f))
+    manifests.sort(key=lambda manifest: manifest["name"], reverse=True)
+    return manifests
+
+
+def rotate(directory, keep=KEEP_SNAPSHOTS):
+    """
+    En yeni keep yedek dışındakileri ve artık hiçbir yedeğin başvurmadığı
+    arşiv kopyalarını siler; silinen yedek sayısını döndürür.
+    """
+    manifests = list_snapshots(directory)
+    removed = manifests[keep:]
+    for manifest in removed:
+        base = os.path.join(directory, manifest["name"])
+        # Önce manifest: yarıda kalırsa yedek tamamlanmamış görünür
+        _remove(base + MANIFEST_SUFFIX, base + SNAPSHOT_SUFFIX)
+    referenced = {name for manifest in manifests[:keep] for name in manifest.get("archive", {})}
+    archive_dir = os.path.join(directory, "archive")
+    for path in glob.glob(os.path.join(archive_dir, "*", "*")):
+        name = os.path.relpath(path, archive_dir).replace(os.sep, "/")
+        if name not in referenced:
+            _remove(path)
+    return len(removed)
+
+
+# ---------------------------- GERİ YÜKLEME ----------------------------
+
+def find_snapshot(name=None, directory=None):
+    manifests = list_snapshots(directory)
+    if not manifests:
+        raise BackupError("yedek bulunamadı")
+    if name is None:
+        return manifests[0]
+    for manifest in manifests:
+        if manifest["name"] == name:
+            return manifest
+    raise BackupError(f"yedek bulunamadı: {name}")
+
+
+def verify_snapshot(manifest, directory, target_path):
+    """
+    Yedeği target_path'e açar; SHA-256, PRAGMA integrity_check, şema sürümü
+    ve arşiv dosyalarının özetlerini doğrular. Uymazsa BackupError yükseltir
+    ve açılan dosyayı siler.
+    """
+    snapshot_path = os.path.join(directory, manifest["name"] + SNAPSHOT_SUFFIX)
+    digest = hashlib.sha256()
+    try:
+        with gzip.open(snapshot_path, "rb") as source, open(target_path, "wb") as target:
+            for block in iter(lambda: source.read(CHUNK_SIZE), b""):
+                digest.update(block)
+                target.write(block)
+        if digest.hexdigest() != manifest["sha256"]:
+            raise BackupError(f"{manifest['name']}: SHA-256 uyuşmuyor")
+        conn = sqlite3.connect(target_path)
+        try:
+            result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+        if result != ["ok"]:
+            raise BackupError(f"{manifest['name']}: bütünlük denetimi başarısız: {result[:3]}")
+        if version > database.SCHEMA_VERSION:
+            raise BackupError(f"{manifest['name']}: şema sürümü {version} bu uygulamadan yeni")
+        for name, sha256 in manifest.get("archive", {}).items():
+            path = os.path.join(directory, "archive", name)
+            if not os.path.exists(path) or _sha256_file(path) != sha256:
+                raise BackupError(f"{manifest['name']}: arşiv dosyası eksik veya bozuk: {name}")
+    except (OSError, EOFError, zlib.error, sqlite3.DatabaseError) as error:
+        _remove(target_path)
+        raise BackupError(f"{manifest['name']}: okunamadı: {error}") from error
+    except BaseException:
+        _remove(target_path)
+        raise
+
+
+def restore_snapshot(name=None, db_path=None, directory=None):
+    """
+    Yedeği doğrulayıp veritabanının yerine koyar ve manifestini döndürür.
+    Mevcut dosya (ve -wal/-shm) '.pre-restore' adıyla kenara alınır. Havuzdaki
+    bağlantılar kapatılır; uygulama veya sunucu bu sırada çalışmamalıdır.
+    Yedeğin başvurduğu arşiv dosyaları arşiv dizininde yoksa geri kopyalanır.
+    Yedekten sonra oluşmuş arşiv dosyaları kayıtsız kalır (kayıtları geri
+    yüklenen sıcak tablodadır); göçler uygulandıktan sonra
+    RetentionEngine.recover() bunları siler.
+    """
+    db_path = db_path or database.DB_PATH
+    directory = directory or backup_path_for(db_path)
+    manifest = find_snapshot(name, directory)
+    restored_path = db_path + ".restore"
+    verify_snapshot(manifest, directory, restored_path)
+
+    archive_dir = retention.archive_path_for(db_path)
+    for part in manifest.get("archive", {}):
+        path = os.path.join(archive_dir, part)
+        if not os.path.exists(path):
+            _link_or_copy(os.path.join(directory, "archive", part), path)
+
+    database.get_pool().close_all()
+    for side in ("",) + SIDE_FILES:
+        if os.path.exists(db_path + side):
+            os.replace(db_path + side, db_path + PRE_RESTORE_SUFFIX + side)
+        else:
+            _remove(db_path + PRE_RESTORE_SUFFIX + side)
+    _fsync_replace(restored_path, db_path)
+    return manifest
+
+
+# ---------------------------- ARKA PLAN ----------------------------
+
+class BackupJob:
+    """
+    create_snapshot'ı ayrı bir thread'de çalıştırır (kendi bağlantılarını
+    kullanır, veritabanı worker'ını meşgul etmez). on_progress(done, total)
+    sayfa cinsinden, on_done(manifest, error) bu thread'den çağrılır;
+    arayüz tarafı bunları ana thread'e iletmelidir.
+    """
+
+    def __init__(self, directory=None, keep=KEEP_SNAPSHOTS, on_progress=None, on_done=None):
+        self.directory = directory
+        self.keep = keep
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="backup", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _run(self):
+        try:
+            manifest = create_snapshot(directory=self.directory, keep=self.keep,
+                                       progress=self.on_progress, cancel=self.cancel_event)
+        except Exception as error:
+            if self.on_done:
+                self.on_done(None, error)
+            return
+        if self.on_done:
+            self.on_done(manifest, None)
@@ -0,0 +1,5 @@
+"""
+Performans ölçüm betikleri. Depo kök dizininden çalıştırılır, ör.:
+
+    python -m benchmarks.bench_indexes --users 10000 --history 1000000
+"""
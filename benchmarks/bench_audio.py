@@ -0,0 +1,78 @@
+"""
+Ses alt sisteminin gecikmesini ölçer. Uyarılar bir kez belleğe çözülür;
+ardından Tk'sız bir olay döngüsünde SessionScheduler ile N seans ardışık
+olarak tamamlanır ve her seans sonunda "complete" uyarısı istenir. Seans
+sonundan sink'in ilk ses tamponunu kabul etmesine kadar geçen süre ile
+play() çağrısının olay döngüsünü ne kadar beklettiği raporlanır. --busy
+ile arka planda CPU yoğun bir thread (ör. dışa aktarma) çalıştırılır.
+
+    python -m benchmarks.bench_audio --sessions 50 --sink file --busy
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+import audio
+from benchmarks.bench_scheduler import HostLoop
+from scheduler import SessionScheduler
+
+TARGET_MS = 20.0
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(10000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--sink", default="null", help="null, file, aplay, winsound veya auto")
+    parser.add_argument("--busy", action="store_true", help="arka planda CPU yükü oluştur")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = audio.select_sink(f"file:{tmp}" if args.sink == "file" else args.sink)
+        start = time.perf_counter()
+        worker = audio.AudioWorker(sink, audio.default_cues()).start()
+        started_ms = (time.perf_counter() - start) * 1000
+        worker.wait_ready()
+        decode_ms = (time.perf_counter() - start) * 1000
+        cue = worker.cues["complete"]
+        print(f"sink: {sink.name}; complete.wav {len(cue.frames) / 1e6:.1f} MB PCM, "
+              f"{cue.duration:.1f} sn; worker başlatma {started_ms:.2f} ms, "
+              f"çözme bitişi {decode_ms:.1f} ms")
+
+        stop = threading.Event()
+        if args.busy:
+            threading.Thread(target=busy_loop, args=(stop,), daemon=True).start()
+
+        loop = HostLoop()
+        blocking = []
+
+        def on_end(session, elapsed, status):
+            call = time.perf_counter()
+            worker.play("complete")
+            blocking.append(time.perf_counter() - call)
+
+        scheduler = SessionScheduler(loop.after, loop.after_cancel, on_end=on_end, tick=0.05)
+        for i in range(args.sessions):
+            # Seanslar 100 ms arayla biter; her uyarı bir öncekini keser
+            loop.after(i * 100, lambda i=i: scheduler.start("Kol Terapi", 0.05, i))
+        loop.run()
+        time.sleep(0.2)
+        worker.stop()
+        stop.set()
+
+    stats = worker.latency_stats()
+    blocking.sort()
+    print(f"{stats['count']} uyarı: seans sonu -> ses başlangıcı p50 {stats['p50']:.2f} ms, "
+          f"p99 {stats['p99']:.2f} ms, en kötü {stats['max']:.2f} ms")
+    print(f"play() olay döngüsünü en fazla {blocking[-1] * 1e6:.1f} µs bekletti")
+    assert stats["count"] == args.sessions, stats
+    assert stats["p99"] < TARGET_MS, f"p99 {stats['p99']:.2f} ms > {TARGET_MS} ms"
+
+
+if __name__ == "__main__":
+    main()
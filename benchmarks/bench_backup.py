@@ -0,0 +1,105 @@
+"""
+Çevrimiçi yedeği (backup.py) sentetik veriyle ölçer. Yedek alınırken ayrı bir
+thread log_therapy ile sürekli seans kaydı yazar. Raporlananlar:
+- yazma gecikmesi (p50/p99/en kötü), yedeksiz ve yedek sırasında;
+- yedek adımı başına süre (kaynakta okuma işleminin tuttuğu süre);
+- toplam süre, hız ve sıkıştırma oranı.
+Yedeğin doğrulanıp açılabildiğini ve yedek başladığı andaki kayıt sayısını
+içerdiğini denetler.
+
+    python -m benchmarks.bench_backup --history 500000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import backup
+import database
+from benchmarks import synthetic
+
+WRITE_INTERVAL = 0.02  # Yazıcı thread'in kayıtlar arası beklemesi (sn)
+
+
+class Writer:
+    def __init__(self):
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="writer")
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            database.log_therapy("Kol Terapi", 10, database.STATUS_COMPLETED, 1)
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(WRITE_INTERVAL)
+        database.get_pool().release()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.latencies
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))]
+    return f"p50 {pick(0.5):.2f} ms, p99 {pick(0.99):.2f} ms, en kötü {samples[-1]:.2f} ms ({len(samples)} kayıt)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=500000)
+    parser.add_argument("--pages", type=int, default=backup.PAGES_PER_STEP)
+    parser.add_argument("--pause", type=float, default=backup.STEP_PAUSE)
+    parser.add_argument("--baseline", type=float, default=3.0, help="yedeksiz ölçüm süresi (sn)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        synthetic.populate(path, args.users, args.history)
+        database.set_database_path(path)
+        database.initialize_database()
+
+        writer = Writer().start()
+        time.sleep(args.baseline)
+        baseline = writer.stop()
+        rows_before = database.count_history()
+
+        steps = []
+        last = [time.perf_counter()]
+
+        def progress(done, total):
+            now = time.perf_counter()
+            steps.append((now - last[0]) * 1000)
+            last[0] = now + args.pause  # bekleme adım süresine sayılmaz
+
+        writer = Writer().start()
+        time.sleep(0.2)
+        manifest = backup.create_snapshot(directory=os.path.join(tmp, "backups"), pages=args.pages,
+                                          pause=args.pause, progress=progress)
+        during = writer.stop()
+
+        restored = os.path.join(tmp, "restored.db")
+        backup.verify_snapshot(manifest, os.path.join(tmp, "backups"), restored)
+        assert rows_before <= manifest["history_rows"] <= rows_before + len(during)
+        database.get_pool().close_all()
+
+    size_mb = manifest["size"] / 1e6
+    print(f"veritabanı {size_mb:.1f} MB, {manifest['history_rows']} kayıt")
+    print(f"yedek: kopyalama {manifest['copy_seconds']:.2f} s ({size_mb / manifest['copy_seconds']:.0f} MB/s), "
+          f"toplam {manifest['seconds']:.2f} s; sıkıştırılmış {manifest['compressed_size'] / 1e6:.1f} MB "
+          f"(%{manifest['compressed_size'] * 100 / manifest['size']:.0f})")
+    print(f"adım ({args.pages} sayfa): {_summary(steps[1:] or steps)}")
+    print(f"yazma, yedeksiz:       {_summary(baseline)}")
+    print(f"yazma, yedek sırasında: {_summary(during)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Göç öncesi (indekssiz) ve sonrası giriş ve geçmiş yükleme sürelerini karşılaştırır.
+
+    python -m benchmarks.bench_indexes --users 10000 --history 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import database
+from benchmarks import synthetic
+
+
+def _measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_scenarios(users, logins, history_loads, seed):
+    rng = random.Random(seed)
+
+    # Yalnızca indeksin etkilediği kullanıcı araması ölçülür; KDF maliyeti
+    # benchmarks/bench_login.py ile ayrıca ölçülür.
+    def login():
+        i = rng.randrange(users)
+        assert database.get_pool().connection().execute(database.SQL_SELECT_USER_BY_SERIAL,
+                                                        (synthetic.serial_for(i),)).fetchone()
+
+    return {
+        "login_lookup_ms": _measure(login, logins),
+        "history_ms": _measure(lambda: database.fetch_therapy_history(include_user_info=False),
+                               history_loads),
+        "history_join_ms": _measure(lambda: database.fetch_therapy_history(include_user_info=True),
+                                    history_loads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--history", type=int, default=1000000)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--history-loads", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Veri üretiliyor: {args.users} kullanıcı, {args.history} geçmiş satırı...")
+        synthetic.populate(path, args.users, args.history, args.seed)
+        database.set_database_path(path)
+
+        before = run_scenarios(args.users, args.logins, args.history_loads, args.seed)
+
+        start = time.perf_counter()
+        database.migrate(database.get_pool().connection())
+        migration_s = time.perf_counter() - start
+
+        after = run_scenarios(args.users, args.logins, args.history_loads, args.seed)
+        database.get_pool().close_all()
+
+    print(f"Göç süresi: {migration_s:.2f} s")
+    print(f"{'senaryo':<18}{'önce (ms)':>12}{'sonra (ms)':>12}")
+    for key in before:
+        print(f"{key:<18}{before[key]:>12.3f}{after[key]:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
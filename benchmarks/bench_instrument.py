@@ -0,0 +1,141 @@
+"""
+instrument modülünün çağrı başına maliyetini ölçer: ölçüm kapalıyken ve
+açıkken span bağlam yöneticisi, traced dekoratörü, sayaç ve histogram.
+Kapalıyken ek maliyetin, ölçülen gerçek bir yola (geçmişin ilk sayfası,
+fetch_therapy_history_page) göre %1'in altında kaldığını doğrular; ayrıca
+açıkken kaydedilenleri JSON ve Chrome trace olarak yazıp geri okur.
+
+    python -m benchmarks.bench_instrument --calls 200000
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+import database
+import instrument
+
+DISABLED_LIMIT = 0.01  # Kapalıyken ek maliyetin gerçek bir DB çağrısına oranı için üst sınır
+
+
+def work():
+    return None
+
+
+@instrument.traced("bench.traced")
+def traced_work():
+    return None
+
+
+def per_call(fn, calls):
+    best = None
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        fn(calls)
+        elapsed = (time.perf_counter_ns() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bare(calls):
+    for _ in range(calls):
+        work()
+
+
+def with_span(calls):
+    for _ in range(calls):
+        with instrument.span("bench.span"):
+            work()
+
+
+def with_decorator(calls):
+    for _ in range(calls):
+        traced_work()
+
+
+def with_counter(calls):
+    for _ in range(calls):
+        instrument.count("bench.count")
+        work()
+
+
+def with_histogram(calls):
+    for _ in range(calls):
+        instrument.observe("bench.hist", 1.0)
+        work()
+
+
+def db_call_ns(directory, calls=500, rows=1000):
+    """
+    Ölçüm eklenen yollardan biri: geçmişin ilk sayfası (ölçüm sarmalayıcısı olmadan).
+    """
+    database.set_database_path(os.path.join(directory, "bench.db"))
+    database.initialize_database()
+    with database.get_pool().transaction() as conn:
+        conn.executemany(database.SQL_INSERT_HISTORY,
+                         [("Kol Terapi", "Manual", 10, 10000, database.STATUS_COMPLETED, 1)] * rows)
+    fetch = database.fetch_therapy_history_page.__wrapped__
+    fetch()
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        fetch()
+    elapsed = (time.perf_counter_ns() - start) / calls
+    database.get_pool().close_all()
+    return elapsed
+
+
+def check_exports(directory):
+    thread = threading.Thread(target=with_span, args=(10,), name="bench-worker")
+    thread.start()
+    thread.join()
+    trace_path = os.path.join(directory, "trace.json")
+    summary_path = os.path.join(directory, "summary.json")
+    instrument.export_chrome_trace(trace_path)
+    instrument.dump_json(summary_path)
+    with open(trace_path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    with open(summary_path, encoding="utf-8") as f:
+        summary = json.load(f)
+    phases = {event["ph"] for event in events}
+    assert {"X", "C", "M"} <= phases, phases
+    assert any(event.get("args", {}).get("name") == "bench-worker" for event in events)
+    assert summary["histograms"]["bench.span"]["count"] > 0
+    return len(events), os.path.getsize(trace_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    cases = [("span", with_span), ("traced", with_decorator), ("count", with_counter),
+             ("observe", with_histogram)]
+    baseline = per_call(bare, args.calls)
+    print(f"çıplak çağrı: {baseline:.0f} ns")
+
+    instrument.disable()
+    disabled = {name: per_call(fn, args.calls) - baseline for name, fn in cases}
+    instrument.enable()
+    instrument.reset()
+    enabled = {name: per_call(fn, args.calls) - baseline for name, fn in cases}
+
+    for name, _ in cases:
+        print(f"{name:>8}: kapalı +{disabled[name]:6.0f} ns, açık +{enabled[name]:6.0f} ns")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events, size = check_exports(tmp)
+        instrument.disable()
+        reference = db_call_ns(tmp)
+    print(f"Chrome trace: {events} olay, {size / 1024:.0f} KiB "
+          f"(halka tampon {instrument.SPAN_BUFFER} span ile sınırlı)")
+
+    worst = max(disabled.values())
+    print(f"fetch_therapy_history_page: {reference / 1000:.1f} µs; kapalıyken en kötü ek maliyet "
+          f"%{worst / reference * 100:.2f}")
+    assert worst < reference * DISABLED_LIMIT, f"kapalıyken +{worst:.0f} ns"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+KDF maliyet profillerine göre giriş (validate_serial_number) sürelerini ölçer.
+Her profil için p50/p99 soğuk (KDF çalışır) ve sıcak (VerifierCache) süreleri
+ile eski SHA-256 kaydının ilk girişteki yeniden özetleme maliyetini raporlar.
+
+    python -m benchmarks.bench_login --profiles low default high --logins 50
+"""
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import credentials
+import database
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return statistics.median(samples), p99
+
+
+def _time_ms(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def bench_profile(name, users, logins, seed):
+    credentials.set_cost_profile(name)
+    credentials.verifier_cache.clear()
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.set_database_path(os.path.join(tmp, "bench.db"))
+        database.initialize_database()
+        for i in range(users):
+            database.register_user("Ad", "Soyad", f"SN{i}", f"pw{i}")
+
+        cold, warm = [], []
+        for _ in range(logins):
+            i = rng.randrange(users)
+            credentials.verifier_cache.clear()
+            elapsed, user = _time_ms(lambda: database.validate_serial_number(f"SN{i}", f"pw{i}"))
+            assert user
+            cold.append(elapsed)
+            elapsed, user = _time_ms(lambda: database.validate_serial_number(f"SN{i}", f"pw{i}"))
+            assert user
+            warm.append(elapsed)
+
+        # Eski kayıt: ilk giriş doğrular ve yeniden özetler, ikincisi güncel KDF'yi kullanır
+        legacy = hashlib.sha256(b"legacy").hexdigest()
+        with database.get_pool().transaction() as conn:
+            conn.execute(database.SQL_INSERT_USER, ("Eski", "Kayıt", "LEGACY", legacy, "user"))
+        rehash_ms, _ = _time_ms(lambda: database.validate_serial_number("LEGACY", "legacy"))
+        database.get_pool().close_all()
+
+    return {"cold": _percentiles(cold), "warm": _percentiles(warm), "rehash_ms": rehash_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", nargs="+", default=list(credentials.COST_PROFILES))
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'profil':<10}{'soğuk p50':>11}{'soğuk p99':>11}{'sıcak p50':>11}{'sıcak p99':>11}"
+          f"{'rehash':>10}  (ms)")
+    for name in args.profiles:
+        result = bench_profile(name, args.users, args.logins, args.seed)
+        print(f"{name:<10}{result['cold'][0]:>11.2f}{result['cold'][1]:>11.2f}"
+              f"{result['warm'][0]:>11.3f}{result['warm'][1]:>11.3f}{result['rehash_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Protokol motorunun adım başına çalışma maliyetini ölçer. Büyük bir protokol
+(iç içe tekrarlar) bir kez derlenir; ardından her saniye tikinde
+ProtocolRun.advance ile (derlenmiş adım tablosu, ileri giden imleç) ve her
+tikte iç içe tanımı baştan yürüyerek o anki adımı bulan yorumlayıcıyla
+izlenir. Ayrıca SessionScheduler üzerinden sahte saatle tam bir seans
+çalıştırılıp tüm faz geçişlerinin doğru saniyede ve sırayla bildirildiği
+ve geçiş başına (olay kaydı dahil) maliyet doğrulanır.
+
+    python -m benchmarks.bench_protocol --repeat 200
+"""
+import argparse
+import itertools
+import time
+
+from protocol import ProtocolRun, compile_protocol, phase_event
+from scheduler import SessionScheduler
+
+
+def build_definition(repeat):
+    return {"name": "Bench", "steps": [
+        {"phase": "Isınma", "intensity": 30, "duration": 30},
+        {"repeat": repeat, "steps": [
+            {"phase": "Yoğun", "intensity": 80, "duration": 2},
+            {"pause": 1},
+            {"repeat": 2, "steps": [{"phase": "Orta", "intensity": 50, "duration": 1}]}]},
+        {"phase": "Soğuma", "intensity": 20, "duration": 30}]}
+
+
+def interpret(steps, elapsed, offset=0):
+    """
+    Derlemesiz karşılaştırma: tanımı baştan yürüyerek elapsed anındaki adımı bulur.
+    (bulunan etiket veya None, adımların bittiği saniye) döndürür.
+    """
+    for step in steps:
+        if "repeat" in step:
+            for _ in range(step["repeat"]):
+                label, offset = interpret(step["steps"], elapsed, offset)
+                if label is not None:
+                    return label, offset
+            continue
+        duration = step.get("duration", step.get("pause"))
+        if offset <= elapsed < offset + duration:
+            return step.get("phase", "Ara"), offset
+        offset += duration
+    return None, offset
+
+
+def per_tick(fn, ticks):
+    start = time.perf_counter()
+    for second in range(ticks):
+        fn(second)
+    return (time.perf_counter() - start) / ticks
+
+
+def run_session(protocol):
+    """
+    Sahte saatle tam seans; (geçiş saniyeleri, geçiş başına süre) döndürür.
+    """
+    now = [0.0]
+    pending = {}
+    counter = itertools.count()
+
+    def schedule(delay_ms, fn):
+        handle = next(counter)
+        pending[handle] = (now[0] + delay_ms / 1000, fn)
+        return handle
+
+    transitions = []
+    events = []
+
+    def on_event(event, session):
+        if event == "phase":
+            transitions.append((now[0], session.run.index))
+            events.append(phase_event(session, session.run.index))
+
+    scheduler = SessionScheduler(schedule, lambda handle: pending.pop(handle, None),
+                                 on_end=lambda *args: None, clock=lambda: now[0])
+    scheduler.add_listener(on_event)
+    scheduler.start("Bacak Terapi", None, 1, protocol=protocol)
+    elapsed = 0.0
+    while pending:
+        handle = min(pending, key=lambda h: pending[h][0])
+        now[0], fn = pending.pop(handle)
+        start = time.perf_counter()
+        fn()
+        elapsed += time.perf_counter() - start
+    return transitions, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200, help="dış tekrar sayısı")
+    args = parser.parse_args()
+
+    definition = build_definition(args.repeat)
+    start = time.perf_counter()
+    protocol = compile_protocol(definition)
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"{protocol!r}, derleme {compile_ms:.2f} ms")
+
+    run = ProtocolRun(protocol)
+    compiled = per_tick(lambda second: run.advance(second), protocol.duration)
+    interpreted = per_tick(lambda second: interpret(definition["steps"], second), protocol.duration)
+    print(f"tik başına: derlenmiş tablo {compiled * 1e6:.2f} µs, "
+          f"yorumlayıcı {interpreted * 1e6:.2f} µs ({interpreted / compiled:.0f}x)")
+
+    transitions, elapsed = run_session(protocol)
+    assert [index for _, index in transitions] == list(range(len(protocol))), "adım atlandı"
+    assert all(at == protocol.starts[index] for at, index in transitions), "geç geçiş"
+    print(f"seans: {len(transitions)} faz geçişi, {protocol.duration} tik; "
+          f"tik başına {elapsed / protocol.duration * 1e6:.2f} µs "
+          f"(zamanlayıcı + dinleyici + olay kaydı)")
+
+
+if __name__ == "__main__":
+    main()
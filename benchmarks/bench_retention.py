@@ -0,0 +1,146 @@
+"""
+Geçmiş arşivlemesini (retention.py) sentetik veriyle ölçer: parti başına
+veritabanı worker'ının meşgul kaldığı süre (p50/p99), birleştirme ve VACUUM
+süreleri, arşiv dosyalarının boyutu, arşivleme öncesi/sonrası sıcak tablo
+sorguları ve veritabanı dosyası boyutu. Ayrıca istatistiklerin değişmediğini
+ve include_archived=True ile tüm kayıtların geri okunduğunu doğrular.
+
+    python -m benchmarks.bench_retention --users 1000 --history 200000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import database
+import retention
+from benchmarks import synthetic
+
+# synthetic.generate_history kayıtları 2025 yılına dağıtır; bu tarihten eskiler arşivlenir
+ARCHIVE_BEFORE = datetime(2025, 7, 1)
+
+
+class TimedSubmit:
+    """
+    Veritabanı adımlarını çağıran thread'de çalıştırıp sürelerini toplar
+    (DatabaseExecutor'da o adımın worker'ı meşgul edeceği süre).
+    """
+
+    def __init__(self):
+        self.samples = {}
+
+    def __call__(self, fn, *args):
+        future = Future()
+        start = time.perf_counter()
+        future.set_result(fn(*args))
+        self.samples.setdefault(fn.__name__, []).append((time.perf_counter() - start) * 1000)
+        return future
+
+
+def _ms(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _p(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(path) for name in names)
+
+
+def hot_queries():
+    return {"ilk sayfa (JOIN)": _ms(lambda: database.fetch_therapy_history_page(include_user_info=True)),
+            "kullanıcı sayfası": _ms(lambda: database.fetch_therapy_history_page(user_id=1)),
+            "sayım": _ms(database.count_history)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=retention.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+    days = (datetime.utcnow() - ARCHIVE_BEFORE).days
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        synthetic.populate(path, args.users, args.history)
+        database.set_database_path(path)
+        database.initialize_database()
+        stats_before = database.fetch_usage_stats()["total"]
+        size_before = os.path.getsize(path)
+        before = hot_queries()
+
+        submit = TimedSubmit()
+        engine = retention.RetentionEngine(days=days, batch_size=args.batch_size, submit=submit)
+        start = time.perf_counter()
+        batches = archived = 0
+        while True:
+            moved = engine.archive_step()
+            if not moved:
+                break
+            batches += 1
+            archived += moved
+        archive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compacted = 0
+        while True:
+            merged = engine.compact_step()
+            if not merged:
+                break
+            compacted += merged
+        compact_seconds = time.perf_counter() - start
+
+        database.get_pool().connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_deleted = os.path.getsize(path)
+        start = time.perf_counter()
+        retention.enable_incremental_vacuum()
+        vacuum_seconds = time.perf_counter() - start
+        size_after = os.path.getsize(path)
+        after = hot_queries()
+
+        parts, archived_rows = retention.archive_summary()
+        archive_bytes = _dir_size(engine.directory)
+        remaining = database.count_history()
+        assert archived_rows == archived and remaining + archived == args.history
+        assert database.fetch_usage_stats()["total"] == stats_before, "istatistikler değişti"
+
+        start = time.perf_counter()
+        rows = database.fetch_therapy_history(include_archived=True)
+        full_ms = (time.perf_counter() - start) * 1000
+        assert len(rows) == args.history
+        keys = [(row[5], row[0]) for row in rows]
+        assert keys == sorted(keys, reverse=True)
+        database.get_pool().close_all()
+
+    per_batch = [select + commit for select, commit in
+                 zip(submit.samples["select_candidates"], submit.samples["commit_archived"])]
+    print(f"{args.history} kayıt, {archived} arşivlendi ({days} günden eski), "
+          f"{batches} parti x {args.batch_size}")
+    print(f"arşivleme: {archive_seconds:.2f} s; parti başına veritabanı worker'ı "
+          f"p50 {_p(per_batch, 0.5):.1f} ms, p99 {_p(per_batch, 0.99):.1f} ms "
+          f"(okuma {statistics.median(submit.samples['select_candidates']):.1f} ms, "
+          f"silme+kayıt {statistics.median(submit.samples['commit_archived']):.1f} ms)")
+    print(f"birleştirme: {compacted} parça -> {parts} dosya, {compact_seconds:.2f} s")
+    print(f"arşiv: {archive_bytes / 1024:.0f} KiB ({archive_bytes / archived:.1f} B/kayıt)")
+    print(f"veritabanı: {size_before / 1024:.0f} KiB -> silme sonrası {size_deleted / 1024:.0f} KiB "
+          f"-> VACUUM sonrası {size_after / 1024:.0f} KiB ({vacuum_seconds:.2f} s)")
+    for name in before:
+        print(f"{name}: {before[name]:.2f} ms -> {after[name]:.2f} ms")
+    print(f"fetch_therapy_history(include_archived=True): {full_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+SessionScheduler'ı Tk'sız bir olay döngüsünde (tek thread, after/after_cancel
+benzeri) N eşzamanlı seansla çalıştırır ve seans başına bir thread kullanan
+eski yaklaşımla karşılaştırır. Her biri için tik gecikmesinin (tikin
+planlanan sınırdan ne kadar sonra çalıştığı) p50/p99/en kötü değerini ve
+duvar saati saniyesi başına harcanan CPU süresini raporlar. Ayrıca
+duraklat/devam edilen seansların geçen süresinin duraklama kadar kısa
+olduğunu doğrular.
+
+    python -m benchmarks.bench_scheduler --sessions 1 10 100 500 --duration 5
+"""
+import argparse
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from database import STATUS_COMPLETED, STATUS_STOPPED
+from scheduler import SessionScheduler
+
+THERAPY_TYPES = ("Göğüs Terapi", "Bacak Terapi", "Kol Terapi")
+
+
+class HostLoop:
+    """
+    Tk mainloop'unun yerine geçen tek thread'li döngü: after(delay_ms, fn)
+    çağrılarını vakti gelince sırayla çalıştırır, arada uyur.
+    """
+
+    def __init__(self):
+        self.queue = []
+        self.counter = itertools.count()
+        self.cancelled = set()
+
+    def after(self, delay_ms, fn):
+        handle = next(self.counter)
+        heapq.heappush(self.queue, (time.monotonic() + delay_ms / 1000, handle, fn))
+        return handle
+
+    def after_cancel(self, handle):
+        self.cancelled.add(handle)
+
+    def run(self):
+        while self.queue:
+            due, handle, fn = heapq.heappop(self.queue)
+            if handle in self.cancelled:
+                self.cancelled.discard(handle)
+                continue
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            fn()
+
+
+def lateness(elapsed, tick=1.0):
+    # Tikin kendi sınırından (başlangıç + k * tick) ne kadar sonra çalıştığı
+    return elapsed - int(elapsed / tick + 1e-9) * tick
+
+
+def run_scheduler(count, duration, seed=0):
+    loop = HostLoop()
+    rng = random.Random(seed)
+    late = []
+    ended = []
+
+    def on_event(event, session):
+        if event == "tick":
+            timer = session.timer
+            late.append(lateness(time.monotonic() - timer.started_at))
+
+    scheduler = SessionScheduler(loop.after, loop.after_cancel,
+                                 on_end=lambda session, elapsed, status: ended.append(status))
+    scheduler.add_listener(on_event)
+    for i in range(count):
+        # Başlangıçlar ilk saniyeye yayılır (farklı kanallar farklı anlarda başlar)
+        loop.after(int(rng.uniform(0, 1000)),
+                   lambda i=i: scheduler.start(THERAPY_TYPES[i % len(THERAPY_TYPES)],
+                                               duration, i, f"Kullanıcı {i}"))
+    cpu, wall = time.process_time(), time.monotonic()
+    loop.run()
+    cpu, wall = time.process_time() - cpu, time.monotonic() - wall
+    assert ended == [STATUS_COMPLETED] * count, ended
+    return late, cpu / wall
+
+
+def run_threads(count, duration, seed=0):
+    """
+    Seans başına bir thread; her thread kendi sınırına kadar uyur (kaymasız
+    en iyi durum). Tik gecikmesi thread sayısı arttıkça GIL ve zamanlayıcı
+    yüzünden büyür.
+    """
+    rng = random.Random(seed)
+    late = []
+    lock = threading.Lock()
+
+    def session(offset):
+        time.sleep(offset)
+        started_at = time.monotonic()
+        for k in range(1, duration + 1):
+            delay = started_at + k - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with lock:
+                late.append(lateness(time.monotonic() - started_at))
+
+    threads = [threading.Thread(target=session, args=(rng.uniform(0, 1),), daemon=True)
+               for _ in range(count)]
+    cpu, wall = time.process_time(), time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cpu, wall = time.process_time() - cpu, time.monotonic() - wall
+    return late, cpu / wall
+
+
+def check_pause_resume():
+    """
+    Sahte saatle: 10 sn'lik seans 3. saniyede 4 sn duraklatılır; 14. saniyede
+    bitmeli ve geçen süre 10 sn olmalı. Durdurulan seans durma anındaki süreyi kaydeder.
+    """
+    now = [0.0]
+    pending = {}
+    counter = itertools.count()
+
+    def schedule(delay_ms, fn):
+        handle = next(counter)
+        pending[handle] = (now[0] + delay_ms / 1000, fn)
+        return handle
+
+    def advance(to):
+        while True:
+            due = [(at, handle) for handle, (at, _) in pending.items() if at <= to]
+            if not due:
+                break
+            at, handle = min(due)
+            now[0] = max(now[0], at)
+            pending.pop(handle)[1]()
+        now[0] = to
+
+    ended = {}
+    scheduler = SessionScheduler(schedule, lambda handle: pending.pop(handle, None),
+                                 on_end=lambda s, elapsed, status: ended.update({s.id: (elapsed, status)}),
+                                 clock=lambda: now[0])
+    first = scheduler.start("Kol Terapi", 10, 1)
+    second = scheduler.start("Bacak Terapi", 10, 2)
+    advance(3.0)
+    scheduler.pause(first.id)
+    advance(7.0)
+    assert first.remaining() == 7.0, first.remaining()
+    scheduler.resume(first.id)
+    advance(8.5)
+    scheduler.stop(second.id)
+    advance(20.0)
+    assert ended[first.id] == (10.0, STATUS_COMPLETED), ended
+    assert ended[second.id] == (8.5, STATUS_STOPPED), ended
+    assert not scheduler.active() and not len(scheduler.deadlines)
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(name, count, late, cpu_share):
+    late.sort()
+    print(f"{name:>10} {count:>5} seans: tik gecikmesi p50 {percentile(late, 0.5) * 1000:6.2f} ms, "
+          f"p99 {percentile(late, 0.99) * 1000:6.2f} ms, en kötü {late[-1] * 1000:6.2f} ms; "
+          f"CPU %{cpu_share * 100:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--duration", type=int, default=5, help="seans süresi (sn)")
+    parser.add_argument("--no-threads", action="store_true",
+                        help="thread-per-session karşılaştırmasını atla")
+    args = parser.parse_args()
+
+    check_pause_resume()
+    print("duraklat/devam/durdur: doğru")
+    for count in args.sessions:
+        report("scheduler", count, *run_scheduler(count, args.duration))
+        if not args.no_threads:
+            report("thread", count, *run_threads(count, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+server.py'yi ayrı bir süreçte başlatır ve çok sayıda eşzamanlı cihazı
+taklit eder: her cihaz kalıcı bir bağlantıyla giriş yapar, ardından
+seans başlat/durdur döngüleri ve ara sıra geçmiş sorguları gönderir.
+İstek gecikmelerinin p50/p95/p99'unu, toplam istek hızını ve toplu
+yazımların ortalama boyutunu raporlar.
+
+    python -m benchmarks.bench_server --devices 300 --cycles 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import credentials
+import database
+
+
+class Device:
+    """
+    Tek bir kalıcı bağlantı üzerinden HTTP/1.1 istekleri gönderen hafif istemci.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.token = None
+
+    @classmethod
+    async def connect(cls, port):
+        return cls(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        auth = f"Authorization: Bearer {self.token}\r\n" if self.token else ""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n{auth}"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = json.loads(await self.reader.readexactly(length))
+        if status != 200:
+            raise RuntimeError(f"{method} {path}: {status} {data}")
+        return data
+
+    def close(self):
+        self.writer.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(path, devices):
+    # Girişlerin KDF maliyeti ölçümü domine etmesin diye düşük profil
+    database.set_database_path(path)
+    database.initialize_database()
+    passwords = [f"pw{i}" for i in range(devices)]
+    hashes = credentials.hash_passwords(passwords, profile=credentials.COST_PROFILES["low"])
+    database.add_users_bulk(("Cihaz", str(i), f"DEV{i:05d}", password_hash, "user")
+                            for i, password_hash in enumerate(hashes))
+    database.get_pool().close_all()
+
+
+async def run_device(port, index, cycles, latencies):
+    device = await Device.connect(port)
+    try:
+        data = await device.request("POST", "/login",
+                                    {"serial_number": f"DEV{index:05d}", "password": f"pw{index}"})
+        device.token = data["token"]
+
+        async def timed(method, path, payload=None):
+            start = time.perf_counter()
+            data = await device.request(method, path, payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            return data
+
+        # /stop, aynı cihazın bir önceki /start yanıtındaki session_id'ye bağlı
+        session_id = None
+        for cycle in range(cycles):
+            data = await timed("POST", "/sessions/start", {"therapy_type": "Bel Terapi", "duration": 60})
+            session_id = data["session_id"]
+            await timed("POST", "/sessions/stop", {"session_id": session_id, "elapsed": 60.0})
+            if cycle % 5 == 4:
+                await timed("GET", "/history?limit=20")
+    finally:
+        device.close()
+
+
+async def run_load(port, devices, cycles):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_device(port, i, cycles, latencies) for i in range(devices)))
+    elapsed = time.perf_counter() - start
+    health = await (await Device.connect(port)).request("GET", "/health")
+    return latencies, elapsed, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=300)
+    parser.add_argument("--cycles", type=int, default=20, help="cihaz başına seans sayısı")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "central.db")
+        prepare_database(path, args.devices)
+        port = _free_port()
+        process = subprocess.Popen([sys.executable, os.path.join(root, "cli.py"), "--db", path,
+                                    "--kdf-profile", "low", "serve", "--port", str(port)],
+                                   stdout=subprocess.PIPE, text=True)
+        try:
+            process.stdout.readline()  # "Sunucu dinliyor" satırı
+            latencies, elapsed, health = asyncio.run(run_load(port, args.devices, args.cycles))
+        finally:
+            process.terminate()
+            process.wait()
+
+        database.set_database_path(path)
+        sessions = database.count_history()
+        database.get_pool().close_all()
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+    print(f"{args.devices} cihaz, {len(latencies)} istek, {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.0f} istek/s)")
+    print(f"gecikme p50 {statistics.median(latencies):.2f} ms, p95 {pick(0.95):.2f} ms, "
+          f"p99 {pick(0.99):.2f} ms")
+    print(f"{sessions} seans kaydı, {health['batches']} toplu yazım "
+          f"(ortalama {sessions / max(health['batches'], 1):.1f} kayıt/işlem)")
+
+
+if __name__ == "__main__":
+    main()
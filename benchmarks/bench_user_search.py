@@ -0,0 +1,90 @@
+"""
+Kullanıcı aramasının tuş vuruşu başına süresini ölçer. Ad, soyad ve seri
+numaralarının harf harf yazılmasını taklit eder; her önek için search_users
+(FTS5) ile eski yöntemin (tüm kullanıcıları çekip süzmek) süresini karşılaştırır.
+
+    python -m benchmarks.bench_user_search --users 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import database
+from benchmarks import synthetic
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))]
+    return statistics.median(samples), pick(0.95), samples[-1]
+
+
+def _time_ms(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def keystrokes(users, words, seed):
+    """
+    Rastgele kullanıcıların ad/soyad/seri numarasının tüm önekleri (yazım sırasıyla).
+    """
+    rng = random.Random(seed)
+    rows = list(synthetic.generate_users(users, seed))
+    for _ in range(words):
+        name, surname, serial_number, _, _ = rng.choice(rows)
+        word = rng.choice((name, surname, serial_number, f"{name} {surname}"))
+        for end in range(1, len(word) + 1):
+            yield word[:end]
+
+
+def scan_all(text):
+    # Eski ekranın davranışı: her seferinde tüm kullanıcılar
+    text = text.lower()
+    return [user for user in database.fetch_all_users()
+            if any(str(field).lower().startswith(text) for field in user[1:4])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=100, help="yazılacak kelime sayısı")
+    parser.add_argument("--scan-samples", type=int, default=20,
+                        help="tam tarama için ölçülecek tuş vuruşu sayısı")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Veri üretiliyor: {args.users} kullanıcı...")
+        synthetic.populate(path, args.users, 0, args.seed)
+        database.set_database_path(path)
+        elapsed, _ = _time_ms(database.initialize_database)
+        print(f"Göçler ve arama dizini: {elapsed / 1000:.2f} s")
+
+        prefixes = list(keystrokes(args.users, args.words, args.seed))
+        first_page, more_pages = [], []
+        for prefix in prefixes:
+            elapsed, rows = _time_ms(database.search_users, prefix)
+            first_page.append(elapsed)
+            if len(rows) == database.USER_SEARCH_LIMIT:
+                elapsed, _ = _time_ms(database.search_users, prefix, rows[-1][0])
+                more_pages.append(elapsed)
+        scans = [_time_ms(scan_all, prefix)[0] for prefix in prefixes[:args.scan_samples]]
+        database.get_pool().close_all()
+
+    print(f"{len(prefixes)} tuş vuruşu")
+    print(f"{'yöntem':<22}{'p50':>10}{'p95':>10}{'max':>10}  (ms)")
+    for name, samples in (("search_users", first_page),
+                          ("search_users sonraki", more_pages),
+                          ("tam tarama", scans)):
+        if samples:
+            p50, p95, worst = _percentiles(samples)
+            print(f"{name:<22}{p50:>10.3f}{p95:>10.3f}{worst:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
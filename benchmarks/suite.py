@@ -0,0 +1,365 @@
+"""
+Tekrarlanabilir benchmark takımı. Verilen ölçekte sentetik kullanıcı ve
+geçmiş verisi üretir (bkz. synthetic.py; aynı tohumla her seferinde aynı
+veri), göçleri uygular ve ekransız senaryoları çalıştırır. Her senaryo için
+işlem sayısı, toplam süre, saniyedeki işlem ve p50/p95/p99/en kötü gecikme
+JSON olarak yazılır; --compare ile önceki bir sonuç dosyasıyla (ör. başka
+bir commit) karşılaştırılır.
+
+    python -m benchmarks.suite --scale 100k -o sonuc.json
+    python -m benchmarks.suite --scale 100k --compare onceki.json
+    python -m benchmarks.suite --users 5000 --history 2000000 --only login history
+
+Ölçekler: 1k, 10k, 100k, 1m, 10m (geçmiş satırı; kullanıcı sayısı onda biri,
+en fazla 100k). Üretilen göç öncesi veritabanı --data-dir altında saklanır ve
+sonraki çalıştırmalarda yeniden kullanılır; her çalıştırma bunun bir
+kopyasında yapılır, böylece yazan senaryolar sonraki ölçümleri etkilemez.
+
+Tk gerektiren senaryolar (ui_*) yalnızca bir ekran varsa çalışır; yoksa
+"skipped" olarak raporlanır. Ekransız bir makinede sanal ekranla
+çalıştırmak için: xvfb-run python -m benchmarks.suite ...
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import credentials
+import database
+import instrument
+from benchmarks import synthetic
+
+SCALES = {"1k": 1000, "10k": 10000, "100k": 100000, "1m": 1000000, "10m": 10000000}
+MAX_USERS = 100000
+FULL_FETCH_LIMIT = 2000000  # Tüm geçmişi belleğe alan senaryoların üst sınırı (satır)
+DEFAULT_TOLERANCE = 0.2     # --compare: p50'de %20'den fazla kötüleşme gerileme sayılır
+MIN_DELTA_MS = 0.1          # ...ama bundan küçük mutlak farklar (ölçüm gürültüsü) sayılmaz
+
+
+# ---------------------------- ÖLÇÜM ----------------------------
+
+def measure(fn, repeat):
+    """
+    fn'i repeat kez çalıştırır; gecikmeleri (ms) ve toplam süreyi özetler.
+    """
+    histogram = instrument.Histogram(size=None)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call = time.perf_counter()
+        fn()
+        histogram.add((time.perf_counter() - call) * 1000)
+    return summarize(histogram, repeat, time.perf_counter() - start)
+
+
+def summarize(histogram, ops, seconds):
+    summary = histogram.summary()
+    return {"ops": ops, "seconds": round(seconds, 4),
+            "throughput": round(ops / seconds, 1) if seconds else None,
+            "p50_ms": round(summary["p50"], 4), "p95_ms": round(summary["p95"], 4),
+            "p99_ms": round(summary["p99"], 4), "max_ms": round(summary["max"], 4)}
+
+
+def skipped(reason):
+    return {"skipped": reason}
+
+
+# ---------------------------- SENARYOLAR ----------------------------
+# Her senaryo ctx'i (users, history, rng, args) alır ve bir sonuç sözlüğü döndürür.
+
+def scenario_login(ctx):
+    """
+    Sentetik kullanıcılar eski SHA-256 özetiyle gelir: ilk giriş KDF ile yeniden
+    özetler; ikinci tur önbelleksiz KDF doğrulaması, üçüncü tur VerifierCache'tir.
+    """
+    sample = ctx.rng.sample(range(ctx.users), min(ctx.args.logins, ctx.users))
+    logins = iter(sample)
+
+    def login():
+        i = next(logins)
+        assert database.validate_serial_number(synthetic.serial_for(i), synthetic.password_for(i))
+
+    results = {"first": measure(login, len(sample))}
+    credentials.verifier_cache.clear()
+    logins = iter(sample)
+    results["kdf"] = measure(login, len(sample))
+    logins = iter(sample)
+    results["cached"] = measure(login, len(sample))
+    return results
+
+
+def scenario_register(ctx):
+    counter = iter(range(ctx.args.registrations))
+
+    def register():
+        i = next(counter)
+        assert database.register_user("Yeni", f"Kullanıcı{i}", f"REG{i:08d}", f"pw{i}")
+    return measure(register, ctx.args.registrations)
+
+
+def scenario_log_therapy(ctx):
+    """
+    Tek tek commit (log_therapy) ve WriteBehindLogger'ın yazdığı toplu yol (log_therapy_batch).
+    """
+    from session_log import make_entry
+    rng = ctx.rng
+
+    def single():
+        database.log_therapy(rng.choice(synthetic.THERAPY_TYPES), rng.choice((10, 60, 180)),
+                             database.STATUS_COMPLETED, rng.randint(1, ctx.users))
+
+    batch_size = 100
+
+    def batch():
+        database.log_therapy_batch([
+            make_entry(rng.choice(synthetic.THERAPY_TYPES), rng.choice((10, 60, 180)),
+                       database.STATUS_COMPLETED, rng.randint(1, ctx.users))
+            for _ in range(batch_size)])
+
+    batched = measure(batch, max(1, ctx.args.writes // batch_size))
+    batched["rows_per_second"] = round(batched["throughput"] * batch_size, 1)
+    return {"single": measure(single, ctx.args.writes), "batch_100": batched}
+
+
+def scenario_history(ctx):
+    """
+    Eski tam yükleme (JOIN'li/JOIN'siz) ve uygulamanın kullandığı ilk sayfa sorgusu.
+    """
+    results = {}
+    for join in (False, True):
+        suffix = "join" if join else "plain"
+        results[f"page_{suffix}"] = measure(
+            lambda: database.fetch_therapy_history_page(include_user_info=join), ctx.args.queries)
+        if ctx.history > FULL_FETCH_LIMIT:
+            results[f"full_{suffix}"] = skipped(f"{ctx.history} satır > {FULL_FETCH_LIMIT}")
+        else:
+            results[f"full_{suffix}"] = measure(
+                lambda: database.fetch_therapy_history(include_user_info=join), ctx.args.full_loads)
+    # Yönetici görünümü: ad-soyad JOIN yerine kullanıcı önbelleğinden
+    database.user_cache.clear()
+    cold = measure(database.fetch_history_page_with_users, 1)
+    results["page_cached_users"] = measure(database.fetch_history_page_with_users,
+                                           ctx.args.queries)
+    results["page_cached_users"]["cold_ms"] = cold["p50_ms"]
+    results["page_cached_users"]["user_cache"] = cache_report()
+    return results
+
+
+def cache_report():
+    """
+    Önbellek isabet oranı ve kullanıcı başına bellek; karşılaştırma için aynı
+    kullanıcının SELECT * satırı (tuple) olarak boyutu.
+    """
+    stats = database.user_cache.stats()
+    row = database.get_pool().connection().execute(
+        "SELECT * FROM users ORDER BY id LIMIT 1").fetchone()
+    if row is not None:
+        stats["row_tuple_bytes"] = sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row[1:5])
+    return stats
+
+
+def scenario_users(ctx):
+    results = {"search_prefix": measure(
+        lambda: database.search_users(f"Ad{ctx.rng.randrange(1000)}"), ctx.args.queries)}
+    if ctx.users > FULL_FETCH_LIMIT:
+        results["fetch_all"] = skipped(f"{ctx.users} kullanıcı > {FULL_FETCH_LIMIT}")
+    else:
+        results["fetch_all"] = measure(database.fetch_all_users, ctx.args.full_loads)
+    return results
+
+
+def scenario_stats(ctx):
+    return measure(database.fetch_usage_stats, ctx.args.queries)
+
+
+def scenario_ui_history(ctx):
+    """
+    HistoryScreen'in tablosu: ilk sayfanın Treeview'a eklenmesi.
+    """
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+    except Exception as error:  # TclError: ekran yok
+        return skipped(f"Tk kullanılamıyor ({error})")
+    try:
+        root.withdraw()
+        tree = ttk.Treeview(root, columns=("a", "b", "c", "d", "e"), show="headings")
+        rows = database.fetch_therapy_history_page(include_user_info=True)
+
+        def fill():
+            items = [tree.insert("", "end", values=row[1:6]) for row in rows]
+            root.update_idletasks()
+            tree.delete(*items)
+        return measure(fill, ctx.args.queries)
+    finally:
+        root.destroy()
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "register": scenario_register,
+    "log_therapy": scenario_log_therapy,
+    "history": scenario_history,
+    "users": scenario_users,
+    "stats": scenario_stats,
+    "ui_history": scenario_ui_history,
+}
+
+
+# ---------------------------- VERİ ----------------------------
+
+def prepare_base(data_dir, users, history, seed):
+    """
+    Göç öncesi sentetik veritabanını üretir veya önbellekten kullanır.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"base-u{users}-h{history}-s{seed}.db")
+    if os.path.exists(path):
+        return path, 0.0
+    start = time.perf_counter()
+    temporary = path + ".part"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    synthetic.populate(temporary, users, history, seed)
+    # WAL içeriği ana dosyaya yazılsın; kopya tek dosyadan ibaret olsun
+    conn = sqlite3.connect(temporary)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+    os.replace(temporary, path)
+    return path, time.perf_counter() - start
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Context:
+    def __init__(self, users, history, args):
+        self.users = users
+        self.history = history
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+
+def run(args):
+    history = args.history if args.history is not None else SCALES[args.scale]
+    users = args.users if args.users is not None else max(10, min(MAX_USERS, history // 10))
+    credentials.set_cost_profile(args.kdf_profile)
+
+    base, generated_s = prepare_base(args.data_dir, users, history, args.seed)
+    results = {"meta": {
+        "commit": git_commit(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "users": users, "history": history, "seed": args.seed, "kdf_profile": args.kdf_profile,
+        "generate_seconds": round(generated_s, 2),
+    }, "scenarios": {}}
+
+    with tempfile.TemporaryDirectory(dir=args.data_dir) as tmp:
+        path = os.path.join(tmp, "bench.db")
+        shutil.copyfile(base, path)
+        database.set_database_path(path)
+        start = time.perf_counter()
+        database.initialize_database()
+        results["meta"]["migrate_seconds"] = round(time.perf_counter() - start, 2)
+
+        ctx = Context(users, history, args)
+        for name in args.only or SCENARIOS:
+            print(f"{name}...", file=sys.stderr, flush=True)
+            results["scenarios"][name] = SCENARIOS[name](ctx)
+        database.get_pool().close_all()
+    return results
+
+
+# ---------------------------- KARŞILAŞTIRMA ----------------------------
+
+def flatten(scenarios, prefix=""):
+    """
+    İç içe sonuçları "history.page_join" gibi adlarla düz ölçüm sözlüklerine açar.
+    """
+    for name, value in scenarios.items():
+        if "ops" in value or "skipped" in value:
+            yield prefix + name, value
+        else:
+            yield from flatten(value, f"{prefix}{name}.")
+
+
+def compare(current, baseline, tolerance):
+    """
+    Her ölçüm için p50/p99 ve işlem hızı değişimini yazdırır; gerileme sayısını
+    döndürür. Gerileme p50'ye göre belirlenir; p99 ve işlem hızı bilgi amaçlıdır
+    (az örnekli kuyruk değerleri tek çekirdekli makinelerde oynaktır).
+    """
+    old = dict(flatten(baseline["scenarios"]))
+    regressions = 0
+    print(f"karşılaştırma: {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    for name, new in flatten(current["scenarios"]):
+        before = old.get(name)
+        if before is None or "ops" not in new or "ops" not in before:
+            continue
+        cells = []
+        for key in ("p50_ms", "p99_ms", "throughput"):
+            change = (new[key] - before[key]) / before[key] if before[key] else 0.0
+            cells.append(f"{key} {before[key]:.3f} -> {new[key]:.3f} ({change:+.0%})")
+        delta = new["p50_ms"] - before["p50_ms"]
+        worse = delta > MIN_DELTA_MS and delta > before["p50_ms"] * tolerance
+        if worse:
+            regressions += 1
+        print(f"{name:<28}{'  '.join(cells)}{'  GERİLEME' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="geçmiş satırı sayısı")
+    parser.add_argument("--users", type=int, help="kullanıcı sayısı (ölçeği geçersiz kılar)")
+    parser.add_argument("--history", type=int, help="geçmiş satırı (ölçeği geçersiz kılar)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, help="yalnızca bu senaryolar")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--registrations", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200, help="sayfa/arama sorgusu sayısı")
+    parser.add_argument("--full-loads", type=int, default=3, help="tam yükleme tekrar sayısı")
+    parser.add_argument("--kdf-profile", choices=sorted(credentials.COST_PROFILES), default="low")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "terapi-bench"),
+                        help="üretilen veritabanlarının önbelleği")
+    parser.add_argument("-o", "--output", help="sonuç JSON dosyası (verilmezse stdout)")
+    parser.add_argument("--compare", help="karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import random
+import sqlite3
+import hashlib
+from datetime import datetime, timedelta
+
+THERAPY_TYPES = ("Göğüs Terapi", "Bacak Terapi", "Kol Terapi")
+STATUSES = ("Tamamlandı",)
+BATCH_SIZE = 10000
+
+
+def create_legacy_schema(conn):
+    """
+    initialize_database'in göçlerden önceki (indekssiz) şemasını oluşturur.
+    """
+    conn.execute("""CREATE TABLE IF NOT EXISTS history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        therapy_type TEXT,
+                        mode TEXT,
+                        duration INTEGER,
+                        status TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        user_id INTEGER,
+                        FOREIGN KEY(user_id) REFERENCES users(id))""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS users (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT,
+                        surname TEXT,
+                        serial_number TEXT,
+                        password TEXT,
+                        role TEXT DEFAULT 'user')""")
+
+
+def serial_for(index):
+    return f"SN{index:08d}"
+
+
+def password_for(index):
+    return f"pw{index}"
+
+
+def generate_users(count, seed=0):
+    """
+    (name, surname, serial_number, password_hash, role) satırları üretir.
+    Şifreler password_for(i) ile tahmin edilebilir, böylece girişler ölçülebilir.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        password = hashlib.sha256(password_for(i).encode()).hexdigest()
+        yield (f"Ad{rng.randrange(1000)}", f"Soyad{rng.randrange(1000)}",
+               serial_for(i), password, "user")
+
+
+def generate_history(count, user_count, seed=0, days=365):
+    """
+    (therapy_type, mode, duration, status, timestamp, user_id) satırları üretir.
+    Zaman damgaları son 'days' güne rastgele dağıtılır.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    span = days * 86400
+    for _ in range(count):
+        timestamp = start + timedelta(seconds=rng.randrange(span))
+        yield (rng.choice(THERAPY_TYPES), "Manual", rng.choice((10, 60, 180)),
+               rng.choice(STATUSES), timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+               rng.randint(1, user_count))
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(path, users, history, seed=0):
+    """
+    Verilen dosyaya indekssiz şemayla sentetik veri yazar.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    create_legacy_schema(conn)
+    with conn:
+        for batch in _batched(generate_users(users, seed), BATCH_SIZE):
+            conn.executemany("""INSERT INTO users (name, surname, serial_number, password, role)
+                                VALUES (?, ?, ?, ?, ?)""", batch)
+        for batch in _batched(generate_history(history, users, seed), BATCH_SIZE):
+            conn.executemany("""INSERT INTO history (therapy_type, mode, duration, status, timestamp, user_id)
+                                VALUES (?, ?, ?, ?, ?, ?)""", batch)
+    conn.close()
@@ -0,0 +1,103 @@
+"""
+Sahte saat ile CountdownTimer'ın uzun seanslarda kaymadığını doğrular.
+Her zamanlanmış çağrı rastgele bir gecikmeyle (Tk döngüsünün meşgul olması gibi)
+çalıştırılır; bitiş anındaki hata tek bir tikin gecikmesiyle sınırlı kalmalı,
+eski time.sleep(1) döngüsünde ise gecikmeler her tikte birikir.
+
+    python -m benchmarks.timer_drift --duration 36000 --max-latency-ms 50
+"""
+import argparse
+import heapq
+import itertools
+import random
+
+from timer import CountdownTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeScheduler:
+    """
+    after()/after_cancel() yerine geçer; çağrıları sahte saate göre sırayla,
+    her birine 0..max_latency arası gecikme ekleyerek çalıştırır.
+    """
+
+    def __init__(self, clock, max_latency, seed=0):
+        self.clock = clock
+        self.max_latency = max_latency
+        self.rng = random.Random(seed)
+        self.queue = []
+        self.counter = itertools.count()
+        self.cancelled = set()
+
+    def schedule(self, delay_ms, fn):
+        handle = next(self.counter)
+        due = self.clock.now + delay_ms / 1000 + self.rng.uniform(0, self.max_latency)
+        heapq.heappush(self.queue, (due, handle, fn))
+        return handle
+
+    def cancel(self, handle):
+        self.cancelled.add(handle)
+
+    def run(self):
+        while self.queue:
+            due, handle, fn = heapq.heappop(self.queue)
+            if handle in self.cancelled:
+                continue
+            self.clock.now = max(self.clock.now, due)
+            fn()
+
+
+def legacy_sleep_loop(duration, max_latency, seed=0):
+    """
+    Eski run_timer: her tikte time.sleep(1) + gecikme; toplam süre birikir.
+    """
+    rng = random.Random(seed)
+    return sum(1 + rng.uniform(0, max_latency) for _ in range(duration))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=int, default=36000, help="seans süresi (sn)")
+    parser.add_argument("--max-latency-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    max_latency = args.max_latency_ms / 1000
+
+    clock = FakeClock()
+    scheduler = FakeScheduler(clock, max_latency, args.seed)
+    ticks = []
+    result = {}
+
+    def on_tick(remaining):
+        # Gösterilen kalan süre, gerçek kalan süreyle her zaman tutarlı olmalı
+        assert abs((timer.deadline - clock.now) - remaining) < 1e-9
+        ticks.append(clock.now)
+
+    timer = CountdownTimer(args.duration, on_tick, lambda elapsed: result.update(elapsed=elapsed),
+                           scheduler.schedule, scheduler.cancel, clock=clock)
+    timer.start()
+    scheduler.run()
+
+    error = result["elapsed"] - args.duration
+    worst_tick = max(t - round(t) for t in ticks)
+    legacy = legacy_sleep_loop(args.duration, max_latency, args.seed)
+
+    print(f"seans: {args.duration} sn, tik gecikmesi: 0..{args.max_latency_ms:.0f} ms")
+    print(f"CountdownTimer bitiş hatası: {error * 1000:.1f} ms ({len(ticks)} tik)")
+    print(f"CountdownTimer en kötü tik gecikmesi: {worst_tick * 1000:.1f} ms")
+    print(f"eski sleep döngüsü bitiş hatası: {(legacy - args.duration) * 1000:.1f} ms")
+
+    # Birikimli kayma yok: hata tek bir tikin gecikme sınırını aşmamalı
+    assert 0 <= error <= max_latency + 0.001, error
+    assert worst_tick <= max_latency + 0.001, worst_tick
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Grafik arayüz olmadan (ör. python:3-slim Docker imajında) bakım ve raporlama.
+
+    python cli.py init-db
+    python cli.py add-users users.csv
+    python cli.py export-history -o history.jsonl
+    python cli.py export-history -o history.trc      (sütunsal, bkz. export.py)
+    python cli.py import-history history.csv
+    python cli.py stats
+    python cli.py set-role SN123 admin
+    python cli.py archive --days 365                 (eski kayıtları arşive taşı, bkz. retention.py)
+    python cli.py compact                            (arşivi birleştir, dosyayı küçült)
+    python cli.py backup                             (çalışırken tutarlı yedek, bkz. backup.py)
+    python cli.py restore                            (en yeni yedeği doğrulayıp geri yükle)
+    python cli.py serve --port 8765                  (çok cihazlı sunucu, bkz. server.py)
+    python cli.py sync --store /mnt/klinik/sync      (merkezi depoyla eşitle, bkz. sync.py)
+    python cli.py protocols protocols.json           (protokol tanımlarını doğrula, bkz. protocol.py)
+
+Girdi/çıktı biçimi dosya uzantısından (.csv / .jsonl / .trc) anlaşılır, --format ile
+değiştirilebilir. '-' standart girdi/çıktı demektir. Satırlar üreteçlerle
+akıtılır ve tek bir işlem içinde toplu yazılır; bellek kullanımı sabittir.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import backup
+import credentials
+import database
+import export
+import models
+import retention
+
+FORMATS = ("csv", "jsonl")
+
+
+def _detect_format(path, requested):
+    if requested:
+        return requested
+    if path.endswith(".json"):
+        return "jsonl"
+    return export.detect_format(path)
+
+
+@contextmanager
+def _open(path, mode):
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        yield f
+
+
+def read_records(f, fmt):
+    """
+    Dosyadaki kayıtları sözlük olarak tek tek üretir.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _int_or_none(value):
+    return None if value in (None, "") else int(value)
+
+
+def _text_or_none(value):
+    return None if value in (None, "") else value
+
+
+# ---------------------------- KOMUTLAR ----------------------------
+
+def cmd_init_db(args):
+    database.initialize_database()
+    print(f"Veritabanı hazır: {database.DB_PATH} (şema sürümü {database.SCHEMA_VERSION})")
+
+
+def user_rows(records, workers=None):
+    """
+    Kayıtları add_users_bulk satırlarına dönüştürür. 'password_hash' verilmişse
+    olduğu gibi saklanır; 'password' ise parça parça paralel olarak KDF'den geçirilir.
+    """
+    for batch in database.batched(records, 1000):
+        plain = [record["password"] for record in batch if not record.get("password_hash")]
+        hashes = iter(credentials.hash_passwords(plain, workers=workers))
+        for record in batch:
+            password_hash = record.get("password_hash") or next(hashes)
+            yield (record["name"], record["surname"], record["serial_number"],
+                   password_hash, record.get("role") or "user")
+
+
+def cmd_add_users(args):
+    database.initialize_database()
+    with _open(args.file, "r") as f:
+        records = read_records(f, _detect_format(args.file, args.format))
+        added = database.add_users_bulk(user_rows(records, args.workers))
+    print(f"{added} kullanıcı eklendi.", file=sys.stderr)
+
+
+def cmd_export_history(args):
+    database.initialize_database()
+    fmt = _detect_format(args.output, args.format)
+    if args.output == "-":
+        if fmt == "columnar":
+            raise SystemExit("Sütunsal biçim standart çıktıya yazılamaz, -o ile dosya verin.")
+        writer = export.WRITERS[fmt](sys.stdout, database.HISTORY_EXPORT_COLUMNS)
+        count = 0
+        for rows in database.batched(database.iter_history_export()):
+            writer.write_rows(rows)
+            count += len(rows)
+    else:
+        count = export.export_history(args.output, fmt, progress=_print_progress)
+    print(f"{count} kayıt dışa aktarıldı.", file=sys.stderr)
+
+
+def _print_progress(done, total):
+    print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+    if done >= total:
+        print(file=sys.stderr)
+
+
+def history_rows(records):
+    for record in records:
+        yield (_text_or_none(record.get("entry_uid")),
+               record["therapy_type"],
+               record.get("mode") or "Manual",
+               _int_or_none(record.get("duration")),
+               _int_or_none(record.get("duration_ms")),
+               record.get("status"),
+               _text_or_none(record.get("timestamp")),
+               _text_or_none(record.get("serial_number")),
+               _int_or_none(record.get("user_id")))
+
+
+def cmd_import_history(args):
+    database.initialize_database()
+    fmt = _detect_format(args.file, args.format)
+    if fmt == "columnar":
+        imported = database.import_history_bulk(history_rows(export.read_columnar(args.file)))
+        print(f"{imported} kayıt içe aktarıldı.", file=sys.stderr)
+        return
+    with _open(args.file, "r") as f:
+        records = read_records(f, fmt)
+        imported = database.import_history_bulk(history_rows(records))
+    print(f"{imported} kayıt içe aktarıldı.", file=sys.stderr)
+
+
+def cmd_stats(args):
+    database.initialize_database()
+    stats = database.history_stats()
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False))
+        return
+    print(f"Kullanıcı: {stats['users']}")
+    print(f"Seans: {stats['sessions']} (toplam {stats['total_duration']} sn)")
+    for therapy_type, sessions, duration in stats["by_type"]:
+        print(f"  {therapy_type}: {sessions} seans, {duration} sn")
+
+
+def cmd_set_role(args):
+    database.initialize_database()
+    if not database.set_user_role(args.serial_number, args.role):
+        sys.exit(f"Kullanıcı bulunamadı: {args.serial_number}")
+    print(f"{args.serial_number}: rol {args.role}", file=sys.stderr)
+
+
+def cmd_archive(args):
+    database.initialize_database()
+    engine = retention.RetentionEngine(days=args.days, batch_size=args.batch_size)
+    archived, compacted = engine.run()
+    parts, rows = retention.archive_summary()
+    print(f"{archived} kayıt arşivlendi, {compacted} parça birleştirildi "
+          f"(arşivde {rows} kayıt, {parts} dosya).", file=sys.stderr)
+
+
+def cmd_compact(args):
+    database.initialize_database()
+    engine = retention.RetentionEngine(days=args.days)
+    engine.recover()
+    compacted = 0
+    while True:
+        merged = engine.compact_step()
+        if not merged:
+            break
+        compacted += merged
+    # WAL kipinde dosya ancak denetim noktasında küçülür
+    checkpoint = "PRAGMA wal_checkpoint(TRUNCATE)"
+    database.get_pool().connection().execute(checkpoint)
+    size = os.path.getsize(database.DB_PATH)
+    if not retention.enable_incremental_vacuum():
+        while engine.vacuum_step():
+            pass
+    database.get_pool().connection().execute(checkpoint)
+    print(f"{compacted} parça birleştirildi; veritabanı {size // 1024} KiB -> "
+          f"{os.path.getsize(database.DB_PATH) // 1024} KiB.", file=sys.stderr)
+
+
+def cmd_backup(args):
+    if args.list:
+        for manifest in backup.list_snapshots(args.dir):
+            print(f"{manifest['name']}  {manifest['compressed_size'] // 1024} KiB "
+                  f"(ham {manifest['size'] // 1024} KiB), {manifest['history_rows']} kayıt")
+        return
+    last = [0.0]
+
+    def progress(done, total):
+        if time.monotonic() - last[0] >= 0.5 or done == total:
+            last[0] = time.monotonic()
+            _print_progress(done, total)
+    try:
+        manifest = backup.create_snapshot(directory=args.dir, keep=args.keep, progress=progress)
+    except backup.BackupError as error:
+        sys.exit(f"Yedek alınamadı: {error}")
+    print(f"{manifest['name']}: {manifest['compressed_size'] // 1024} KiB, "
+          f"{manifest['seconds']} sn.", file=sys.stderr)
+
+
+def cmd_restore(args):
+    try:
+        manifest = backup.restore_snapshot(args.name, directory=args.dir)
+    except backup.BackupError as error:
+        sys.exit(f"Geri yükleme yapılmadı: {error}")
+    database.initialize_database()
+    retention.RetentionEngine().recover()
+    print(f"{manifest['name']} geri yüklendi; önceki dosya "
+          f"{database.DB_PATH + backup.PRE_RESTORE_SUFFIX} olarak saklandı.", file=sys.stderr)
+
+
+def cmd_serve(args):
+    import server
+    server.run(args.host, args.port)
+
+
+def cmd_sync(args):
+    import sync
+    database.initialize_database()
+    engine = sync.SyncEngine(sync.DirectoryStore(args.store))
+    sent, applied = engine.sync()
+    print(f"{sent} satır gönderildi, {applied} paket alındı.", file=sys.stderr)
+
+
+def cmd_protocols(args):
+    import protocol
+    try:
+        protocols = protocol.load_protocols(args.file or protocol.DEFAULT_PROTOCOLS_PATH)
+    except (OSError, protocol.ProtocolError) as error:
+        sys.exit(f"Geçersiz protokol tanımı: {error}")
+    for compiled in protocols.values():
+        types = ", ".join(compiled.therapy_types) or "tüm tipler"
+        print(f"{compiled.name}: {len(compiled)} adım, {compiled.duration} sn ({types})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Terapi cihazı veritabanı aracı")
+    parser.add_argument("--db", default=database.DB_PATH, help="veritabanı dosyası")
+    parser.add_argument("--kdf-profile", choices=sorted(credentials.COST_PROFILES),
+                        help="yeni şifreler için KDF maliyet profili")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="şemayı oluştur ve göçleri uygula").set_defaults(
+        func=cmd_init_db)
+
+    add_users = commands.add_parser("add-users", help="CSV/JSONL'den toplu kullanıcı ekle")
+    add_users.add_argument("file")
+    add_users.add_argument("--format", choices=FORMATS)
+    add_users.add_argument("--workers", type=int, help="şifre özetleme thread sayısı")
+    add_users.set_defaults(func=cmd_add_users)
+
+    export_history = commands.add_parser("export-history",
+                                         help="geçmişi CSV/JSONL/sütunsal olarak yaz")
+    export_history.add_argument("-o", "--output", default="-")
+    export_history.add_argument("--format", choices=export.FORMATS)
+    export_history.set_defaults(func=cmd_export_history)
+
+    import_history = commands.add_parser("import-history",
+                                         help="CSV/JSONL/sütunsal dosyadan geçmiş ekle")
+    import_history.add_argument("file")
+    import_history.add_argument("--format", choices=export.FORMATS)
+    import_history.set_defaults(func=cmd_import_history)
+
+    stats = commands.add_parser("stats", help="kullanım özetini göster")
+    stats.add_argument("--json", action="store_true")
+    stats.set_defaults(func=cmd_stats)
+
+    set_role = commands.add_parser("set-role", help="kullanıcının rolünü değiştir")
+    set_role.add_argument("serial_number")
+    set_role.add_argument("role", choices=(models.ROLE_USER, models.ROLE_ADMIN))
+    set_role.set_defaults(func=cmd_set_role)
+
+    archive = commands.add_parser("archive", help="saklama süresini geçen kayıtları arşive taşı")
+    archive.add_argument("--days", type=int, default=retention.RETENTION_DAYS,
+                         help="sıcak tabloda kalacak en fazla yaş")
+    archive.add_argument("--batch-size", type=int, default=retention.ARCHIVE_BATCH_SIZE)
+    archive.set_defaults(func=cmd_archive)
+
+    compact = commands.add_parser("compact", help="arşiv parçalarını birleştir ve VACUUM yap")
+    compact.add_argument("--days", type=int, default=retention.RETENTION_DAYS)
+    compact.set_defaults(func=cmd_compact)
+
+    backup_command = commands.add_parser("backup", help="çalışırken tutarlı, sıkıştırılmış yedek al")
+    backup_command.add_argument("--dir", help="yedek dizini (varsayılan: <veritabanı>.backups)")
+    backup_command.add_argument("--keep", type=int, default=backup.KEEP_SNAPSHOTS,
+                                help="tutulacak yedek sayısı")
+    backup_command.add_argument("--list", action="store_true", help="yedekleri listele")
+    backup_command.set_defaults(func=cmd_backup)
+
+    restore = commands.add_parser("restore", help="yedeği doğrulayıp geri yükle")
+    restore.add_argument("name", nargs="?", help="yedek adı (varsayılan: en yeni)")
+    restore.add_argument("--dir", help="yedek dizini")
+    restore.set_defaults(func=cmd_restore)
+
+    serve = commands.add_parser("serve", help="cihazlar için HTTP/JSON sunucusunu başlat")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.set_defaults(func=cmd_serve)
+
+    sync_command = commands.add_parser("sync", help="farkları merkezi depoyla eşitle")
+    sync_command.add_argument("--store", required=True, help="paylaşılan eşitleme dizini")
+    sync_command.set_defaults(func=cmd_sync)
+
+    protocols = commands.add_parser("protocols", help="protokol tanım dosyasını doğrula ve listele")
+    protocols.add_argument("file", nargs="?", default=None)
+    protocols.set_defaults(func=cmd_protocols)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    database.set_database_path(args.db)
+    if args.kdf_profile:
+        credentials.set_cost_profile(args.kdf_profile)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+server.py'deki HTTP/JSON API'nin istemcisi. Tek bir kalıcı (keep-alive)
+bağlantı kullanır; bağlantı koparsa bir kez yeniden bağlanıp dener.
+
+    api = ApiClient("http://127.0.0.1:8765")
+    api.login("ABC123", "şifre")
+    session_id = api.start_session("Bel Terapi", 60)
+    api.stop_session(session_id, elapsed=60.0)
+"""
+import http.client
+import json
+from urllib.parse import urlsplit, urlencode
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class ApiClient:
+    def __init__(self, base_url, timeout=10.0):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self.token = None
+        self.user = None
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method, path, payload=None, query=None):
+        """
+        İsteği gönderir ve JSON yanıtı döndürür; 200 dışındaki yanıtlarda ApiError.
+        """
+        if query:
+            path += "?" + urlencode({key: value for key, value in query.items() if value is not None})
+        body = json.dumps(payload, ensure_ascii=False).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = json.loads(response.read() or b"{}")
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # Sunucu boşta kalan bağlantıyı kapatmış olabilir
+                self.close()
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise ApiError(response.status, data.get("error", response.reason))
+        return data
+
+    def login(self, serial_number, password):
+        data = self.request("POST", "/login", {"serial_number": serial_number, "password": password})
+        self.token = data["token"]
+        self.user = data["user"]
+        return self.user
+
+    def start_session(self, therapy_type, duration):
+        return self.request("POST", "/sessions/start",
+                            {"therapy_type": therapy_type, "duration": duration})["session_id"]
+
+    def stop_session(self, session_id, elapsed=None, status=None):
+        payload = {"session_id": session_id, "elapsed": elapsed, "status": status}
+        return self.request("POST", "/sessions/stop",
+                            {key: value for key, value in payload.items() if value is not None})
+
+    def push_entries(self, entries):
+        """
+        session_log.make_entry kayıtlarını toplu gönderir. WriteBehindLogger'ın
+        write_batch'i olarak kullanılabilir: gönderilemeyen kayıtlar cihazdaki
+        günlükte kalır ve sonra tekrar denenir.
+        """
+        entries = [list(entry) for entry in entries]
+        return self.request("POST", "/history", {"entries": entries})["accepted"]
+
+    def history(self, before=None, limit=None, user_id=None, therapy_type=None, status=None,
+                date_from=None, date_to=None):
+        query = {"before": f"{before[0]},{before[1]}" if before else None, "limit": limit,
+                 "user_id": user_id, "therapy_type": therapy_type, "status": status,
+                 "from": date_from, "to": date_to}
+        return [tuple(row) for row in self.request("GET", "/history", query=query)["rows"]]
+
+    def stats(self, user_id=None):
+        return self.request("GET", "/stats", query={"user_id": user_id})
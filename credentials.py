@@ -0,0 +1,202 @@
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+# Cihaz sınıfına göre KDF maliyetleri. Seçim güvenlik ile giriş süresi arasındaki
+# dengedir; benchmarks/bench_login.py her profil için p50/p99 süreleri raporlar.
+COST_PROFILES = {
+    "low": {"algorithm": "scrypt", "n": 2 ** 12, "r": 8, "p": 1},
+    "default": {"algorithm": "scrypt", "n": 2 ** 14, "r": 8, "p": 1},
+    "high": {"algorithm": "scrypt", "n": 2 ** 15, "r": 8, "p": 1},
+    "pbkdf2": {"algorithm": "pbkdf2_sha256", "iterations": 200000},
+}
+
+SALT_BYTES = 16
+SEPARATOR = "$"
+
+_profile = COST_PROFILES["default"]
+
+
+def set_cost_profile(name):
+    """
+    Yeni şifreler ve yeniden özetleme için kullanılacak maliyet profilini seçer.
+    Profil değişince eski parametrelerle saklanan şifreler girişte güncellenir.
+    """
+    global _profile
+    _profile = COST_PROFILES[name]
+
+
+# ---------------------------- KDF'LER ----------------------------
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem, OpenSSL'in varsayılan 32 MB sınırını yüksek n değerleri için açar
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+
+def _encode_scrypt(password, salt, n, r, p):
+    digest = _scrypt(password, salt, n, r, p)
+    return SEPARATOR.join(("scrypt", str(n), str(r), str(p), salt.hex(), digest.hex()))
+
+
+def _verify_scrypt(password, fields):
+    n, r, p, salt, digest = fields
+    candidate = _scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+    params = {"algorithm": "scrypt", "n": int(n), "r": int(r), "p": int(p)}
+    return hmac.compare_digest(candidate, bytes.fromhex(digest)), params
+
+
+def _encode_pbkdf2(password, salt, iterations):
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return SEPARATOR.join(("pbkdf2_sha256", str(iterations), salt.hex(), digest.hex()))
+
+
+def _verify_pbkdf2(password, fields):
+    iterations, salt, digest = fields
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations))
+    params = {"algorithm": "pbkdf2_sha256", "iterations": int(iterations)}
+    return hmac.compare_digest(candidate, bytes.fromhex(digest)), params
+
+
+# Algoritma adı -> doğrulayıcı. Yeni bir KDF eklemek için buraya ve hash_password'a eklenir.
+VERIFIERS = {
+    "scrypt": _verify_scrypt,
+    "pbkdf2_sha256": _verify_pbkdf2,
+}
+
+
+def _is_legacy(stored):
+    # Eski sürümler tuzsuz SHA-256 hex özeti saklıyordu
+    return len(stored) == 64 and SEPARATOR not in stored
+
+
+# ---------------------------- GENEL ARAYÜZ ----------------------------
+
+def hash_password(password, profile=None):
+    """
+    Şifreyi rastgele tuz ile seçili KDF'den geçirir ve
+    'algoritma$parametreler$tuz$özet' biçiminde döndürür.
+    """
+    params = dict(profile or _profile)
+    salt = os.urandom(SALT_BYTES)
+    if params.pop("algorithm") == "scrypt":
+        return _encode_scrypt(password, salt, **params)
+    return _encode_pbkdf2(password, salt, **params)
+
+
+def verify_password(password, stored):
+    """
+    Şifreyi saklanan değere karşı sabit zamanlı karşılaştırmayla doğrular.
+    (eşleşti_mi, yeniden_özetlenmeli_mi) döndürür; eski SHA-256 kayıtları ve
+    güncel profilden farklı parametrelerle saklanan şifreler yeniden özetlenmelidir.
+    """
+    if not stored:
+        return False, False
+    if _is_legacy(stored):
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        ok = hmac.compare_digest(candidate, stored)
+        return ok, ok
+
+    algorithm, *fields = stored.split(SEPARATOR)
+    verifier = VERIFIERS.get(algorithm)
+    if verifier is None:
+        return False, False
+    ok, params = verifier(password, fields)
+    return ok, ok and params != _profile
+
+
+def hash_passwords(passwords, workers=None, profile=None, chunk_size=1000):
+    """
+    Çok sayıda şifreyi (ör. toplu kullanıcı içe aktarımı) sırası korunarak özetler.
+    hashlib KDF'leri GIL'i bıraktığı için thread havuzu tüm çekirdekleri kullanır;
+    girdi chunk_size'lık parçalar halinde okunduğundan bellek kullanımı sabittir.
+    """
+    passwords = iter(passwords)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        while True:
+            chunk = list(islice(passwords, chunk_size))
+            if not chunk:
+                return
+            yield from executor.map(lambda password: hash_password(password, profile), chunk)
+
+
+class VerifierCache:
+    """
+    Başarılı doğrulamaları bellekte tutan küçük LRU önbellek.
+    Aynı kullanıcının tekrar girişinde KDF yeniden çalıştırılmaz; bunun yerine
+    süreç başına rastgele bir anahtarla alınan HMAC karşılaştırılır. Anahtar
+    saklanan özetin kendisi olduğu için şifre değişince kayıt kendiliğinden geçersizleşir.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tag(self, password):
+        return hmac.new(self._key, password.encode(), hashlib.sha256).digest()
+
+    def check(self, password, stored):
+        """
+        Önbellekteki kayıtla eşleşirse True döndürür. Kayıt yoksa veya şifre
+        uymuyorsa False döner; yanlış şifre kararı her zaman KDF ile verilmelidir,
+        yoksa önbellekteki kullanıcılar için deneme maliyeti ortadan kalkar.
+        """
+        with self._lock:
+            tag = self._entries.get(stored)
+            if tag is None:
+                return False
+            self._entries.move_to_end(stored)
+        return hmac.compare_digest(tag, self._tag(password))
+
+    def remember(self, password, stored):
+        if self.size <= 0:
+            return
+        tag = self._tag(password)
+        with self._lock:
+            self._entries[stored] = tag
+            self._entries.move_to_end(stored)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verifier_cache = VerifierCache()
+
+
+_dummy_hashes = {}  # profil parametreleri -> sabit sahte özet
+
+
+def dummy_verify(password):
+    """
+    Kayıtlı olmayan kullanıcı için güncel profil maliyetinde bir doğrulama
+    çalıştırır ve False döndürür. Böylece bilinmeyen seri numarası ile yanlış
+    şifre aynı sürede reddedilir; yanıt süresi hangi kullanıcıların var olduğunu
+    ele vermez. Sahte özet profil başına bir kez üretilir.
+    """
+    key = tuple(sorted(_profile.items()))
+    stored = _dummy_hashes.get(key)
+    if stored is None:
+        stored = _dummy_hashes.setdefault(key, hash_password(os.urandom(SALT_BYTES).hex()))
+    verify_password(password, stored)
+    return False
+
+
+def check_password(password, stored):
+    """
+    verify_password'un önbellekli hali: (eşleşti_mi, yeniden_özetlenmeli_mi).
+    """
+    if verifier_cache.check(password, stored):
+        return True, False
+    ok, needs_rehash = verify_password(password, stored)
+    if ok and not needs_rehash:
+        verifier_cache.remember(password, stored)
+    return ok, needs_rehash
@@ -0,0 +1,953 @@
+import re
+import sqlite3
+import threading
+import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import instrument
+import models
+from credentials import hash_password, check_password, dummy_verify
+from session_log import SessionJournal, journal_path_for
+
+# Varsayılan veritabanı dosyası
+DB_PATH = "therapy_history.db"
+
+# Her yeni bağlantıda uygulanan ayarlar.
+# WAL: okuyucular yazıcıyı beklemez; synchronous=NORMAL WAL ile güvenlidir ve
+# her commit'te fsync yapmaz. cache_size negatif değer KiB cinsindendir.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),       # ~16 MB sayfa önbelleği
+    ("mmap_size", 268435456),     # 256 MB bellek eşlemeli okuma
+    ("temp_store", "MEMORY"),
+)
+
+# sqlite3 modülü hazırlanmış ifadeleri SQL metnine göre önbellekte tutar.
+# Sorgular modül seviyesinde sabit tutulduğu için her çağrı aynı ifadeyi yeniden kullanır.
+STATEMENT_CACHE_SIZE = 128
+
+SQL_SELECT_USER_BY_SERIAL = "SELECT * FROM users WHERE serial_number = ?"
+SQL_UPDATE_PASSWORD = "UPDATE users SET password = ? WHERE id = ?"
+SQL_INSERT_USER = """INSERT INTO users (name, surname, serial_number, password, role)
+                     VALUES (?, ?, ?, ?, ?)"""
+SQL_INSERT_HISTORY = """INSERT INTO history (therapy_type, mode, duration, duration_ms, status, user_id)
+                        VALUES (?, ?, ?, ?, ?, ?)"""
+SQL_INSERT_HISTORY_ENTRY = """INSERT OR IGNORE INTO history (entry_uid, therapy_type, mode, duration,
+                                                           duration_ms, status, timestamp, user_id)
+                              VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+SQL_SELECT_USERS = "SELECT id, name, surname, serial_number, role FROM users"
+SQL_SELECT_USERS_BY_ID = "SELECT id, name, surname, serial_number, role FROM users WHERE id IN ({})"
+SQL_UPDATE_ROLE = "UPDATE users SET role = ? WHERE serial_number = ?"
+USERS_BY_ID_CHUNK = 500  # IN listesindeki en fazla parametre (SQLite sınırının altında)
+SQL_SELECT_HISTORY_WITH_USERS = """SELECT history.id,
+                                         history.therapy_type,
+                                         history.mode,
+                                         history.duration,
+                                         history.status,
+                                         history.timestamp,
+                                         users.name,
+                                         users.surname
+                                  FROM history
+                                  JOIN users ON history.user_id = users.id
+                                  ORDER BY history.timestamp DESC"""
+SQL_SELECT_HISTORY = "SELECT * FROM history ORDER BY timestamp DESC"
+
+# Sayfalı geçmiş sorgusunun parçaları; (timestamp, id) üzerinde anahtar kümesi sayfalaması
+HISTORY_PAGE_SIZE = 100
+SQL_HISTORY_PAGE_WITH_USERS = """SELECT history.id,
+                                       history.therapy_type,
+                                       history.mode,
+                                       history.duration,
+                                       history.status,
+                                       history.timestamp,
+                                       users.name,
+                                       users.surname
+                                FROM history
+                                JOIN users ON history.user_id = users.id"""
+SQL_HISTORY_PAGE = """SELECT history.id,
+                             history.therapy_type,
+                             history.mode,
+                             history.duration,
+                             history.status,
+                             history.timestamp,
+                             history.user_id
+                      FROM history"""
+SQL_OLDER_THAN = "(history.timestamp, history.id) < (?, ?)"
+SQL_NEWER_THAN = "(history.timestamp, history.id) > (?, ?)"
+SQL_FILTER_USER = "history.user_id = ?"
+SQL_FILTER_TYPE = "history.therapy_type = ?"
+SQL_FILTER_STATUS = "history.status = ?"
+SQL_FILTER_FROM = "history.timestamp >= ?"
+SQL_FILTER_TO = "history.timestamp < date(?, '+1 day')"  # bitiş günü dahil
+SQL_ORDER_DESC = " ORDER BY history.timestamp DESC, history.id DESC LIMIT ?"
+SQL_ORDER_ASC = " ORDER BY history.timestamp ASC, history.id ASC LIMIT ?"
+
+
+# Toplu içe/dışa aktarımda bir seferde işlenen satır sayısı
+BULK_BATCH_SIZE = 5000
+SQL_INSERT_USER_IGNORE = """INSERT OR IGNORE INTO users (name, surname, serial_number, password, role)
+                            VALUES (?, ?, ?, ?, ?)"""
+SQL_IMPORT_HISTORY = """INSERT OR IGNORE INTO history (entry_uid, therapy_type, mode, duration,
+                                                       duration_ms, status, timestamp, user_id)
+                        VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP),
+                                COALESCE((SELECT id FROM users WHERE serial_number = ?), ?))"""
+# LEFT JOIN: kullanıcısı silinmiş kayıtlar da dışa aktarılır
+HISTORY_EXPORT_COLUMNS = ("id", "entry_uid", "therapy_type", "mode", "duration", "duration_ms",
+                          "status", "timestamp", "user_id", "serial_number", "name", "surname")
+SQL_EXPORT_HISTORY = """SELECT history.id,
+                               history.entry_uid,
+                               history.therapy_type,
+                               history.mode,
+                               history.duration,
+                               history.duration_ms,
+                               history.status,
+                               history.timestamp,
+                               history.user_id,
+                               users.serial_number,
+                               users.name,
+                               users.surname
+                        FROM history
+                        LEFT JOIN users ON history.user_id = users.id
+                        ORDER BY history.id"""
+
+# Kullanıcı arama: users_fts (FTS5) üzerinde önek eşleşmesi, id'ye göre sayfalı.
+# FTS5 belgeleri rowid sırasında döndürdüğü için LIMIT erken durur.
+USER_SEARCH_LIMIT = 50
+SQL_SEARCH_USERS = """SELECT users.id, users.name, users.surname, users.serial_number, users.role
+                      FROM users_fts
+                      JOIN users ON users.id = users_fts.rowid
+                      WHERE users_fts MATCH ? AND users_fts.rowid > ?
+                      ORDER BY users_fts.rowid
+                      LIMIT ?"""
+# FTS5 derlenmemiş SQLite sürümleri için yavaş ama doğru yedek
+SQL_SEARCH_USERS_LIKE = """SELECT id, name, surname, serial_number, role
+                           FROM users
+                           WHERE (name LIKE :pattern OR surname LIKE :pattern
+                                  OR serial_number LIKE :pattern)
+                             AND id > :after
+                           ORDER BY id
+                           LIMIT :limit"""
+SQL_USERS_PAGE = """SELECT id, name, surname, serial_number, role
+                    FROM users
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?"""
+
+# Seans durumları; istatistikler tamamlanan ve elle durdurulan seansları ayrı sayar
+STATUS_COMPLETED = "Tamamlandı"
+STATUS_STOPPED = "Durduruldu"
+
+# İstatistik özet tablolarında tüm kullanıcıların toplamını tutan satırların user_id'si
+ALL_USERS = 0
+STATS_DAYS = 7
+SQL_STATS_TOTALS = """SELECT therapy_type, sessions, completed, stopped, duration_ms
+                      FROM stats_totals
+                      WHERE user_id = ? AND sessions > 0
+                      ORDER BY therapy_type"""
+SQL_STATS_DAILY = """SELECT day, SUM(sessions)
+                     FROM stats_daily
+                     WHERE user_id = ? AND day >= date('now', ?)
+                     GROUP BY day
+                     ORDER BY day"""
+
+
+# ---------------------------- BAĞLANTI HAVUZU ----------------------------
+
+class ConnectionPool:
+    """
+    Her thread için tek ve uzun ömürlü bir SQLite bağlantısı tutar.
+    Bağlantı ilk kullanımda açılır, PRAGMA ayarları bir kez uygulanır ve
+    aynı thread'deki sonraki tüm çağrılarda yeniden kullanılır.
+    """
+
+    def __init__(self, path, cached_statements=STATEMENT_CACHE_SIZE):
+        self.path = path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._generation = 0  # close_all() sonrası eski bağlantıları geçersiz kılar
+
+    def connection(self):
+        """
+        Çağıran thread'e ait bağlantıyı döndürür, yoksa oluşturur.
+        """
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None and local.generation == self._generation:
+            return conn
+
+        # check_same_thread=False yalnızca close_all()'un başka thread'den
+        # kapatabilmesi içindir; bağlantılar thread'ler arasında paylaşılmaz.
+        conn = sqlite3.connect(self.path,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False)
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        with self._lock:
+            self._connections.append(conn)
+            local.conn = conn
+            local.generation = self._generation
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Bağlantıyı bir işlem (transaction) içinde verir.
+        Blok hatasız biterse commit, hata olursa rollback yapılır.
+        """
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def release(self):
+        """
+        Çağıran thread'in bağlantısını kapatır (kısa ömürlü thread'ler bitmeden önce).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close_all(self):
+        """
+        Havuzdaki tüm bağlantıları kapatır. Thread'ler bir sonraki çağrıda
+        yeni bağlantı açar.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            conn.close()
+
+
+_pool = ConnectionPool(DB_PATH)
+
+
+def get_pool():
+    return _pool
+
+
+# Süreç boyunca paylaşılan kullanıcı önbelleği (id / serial_number -> models.User)
+user_cache = models.UserCache()
+instrument.gauge("user_cache.hit_rate", lambda: user_cache.stats()["hit_rate"])
+instrument.gauge("user_cache.users", lambda: len(user_cache))
+instrument.gauge("user_cache.bytes_per_user", lambda: user_cache.stats()["bytes_per_user"])
+
+
+def set_database_path(path):
+    """
+    Kullanılan veritabanı dosyasını değiştirir (ör. CLI veya ölçümler için).
+    Eski havuzdaki bağlantılar kapatılır.
+    """
+    global _pool, DB_PATH
+    _pool.close_all()
+    DB_PATH = path
+    _pool = ConnectionPool(path)
+    user_cache.clear()
+
+
+# ---------------------------- ŞEMA GÖÇLERİ ----------------------------
+
+def _migration_1_indexes(conn):
+    """
+    users.serial_number için UNIQUE indeks ve history sorguları için indeksler.
+    Eski sürümlerde INSERT OR IGNORE eşsiz kısıt olmadığı için admin kaydını
+    her açılışta tekrar ekliyordu; önce bu kopyalar en küçük id'de birleştirilir.
+    """
+    duplicates = conn.execute("""SELECT users.id, keep.min_id
+                                 FROM users
+                                 JOIN (SELECT serial_number, MIN(id) AS min_id
+                                       FROM users
+                                       GROUP BY serial_number
+                                       HAVING COUNT(*) > 1) AS keep
+                                   ON users.serial_number = keep.serial_number
+                                 WHERE users.id <> keep.min_id""").fetchall()
+    for duplicate_id, keep_id in duplicates:
+        conn.execute("UPDATE history SET user_id = ? WHERE user_id = ?", (keep_id, duplicate_id))
+        conn.execute("DELETE FROM users WHERE id = ?", (duplicate_id,))
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_serial_number ON users(serial_number)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_user_timestamp ON history(user_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp)")
+
+
+def _migration_2_filter_indexes(conn):
+    """
+    Terapi tipine göre filtrelenmiş geçmiş sorguları için indeks.
+    Kullanıcı filtresi idx_history_user_timestamp'ı kullanır.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_type_timestamp ON history(therapy_type, timestamp)")
+
+
+def _migration_3_duration_ms(conn):
+    """
+    Seans süresinin milisaniye hassasiyetinde saklanması için kolon.
+    Eski kayıtlar saniyeden türetilir.
+    """
+    conn.execute("ALTER TABLE history ADD COLUMN duration_ms INTEGER")
+    conn.execute("UPDATE history SET duration_ms = duration * 1000")
+
+
+def _migration_4_entry_uid(conn):
+    """
+    Ertelenmiş (write-behind) kayıtların günlükten tekrar oynatılması
+    durumunda iki kez eklenmemesi için her kayda eşsiz bir kimlik.
+    """
+    conn.execute("ALTER TABLE history ADD COLUMN entry_uid TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_history_entry_uid ON history(entry_uid)")
+
+
+def _day(timestamp):
+    # Zaman damgası çözümlenemeyen eski kayıtlar '' gününe sayılır (PRIMARY KEY NULL olamaz);
+    # terapi tipi için de aynısı yapılır
+    return f"COALESCE(date({timestamp}), '')"
+
+
+def _rollup_upserts(row, sign):
+    """
+    Bir history satırını (NEW/OLD) özet tablolarına sign (+1/-1) ile işleyen
+    trigger gövdesi. Her satır hem kendi kullanıcısına hem ALL_USERS'a sayılır.
+    """
+    values = f"""{sign}, {sign} * ({row}.status = '{STATUS_COMPLETED}'),
+                 {sign} * ({row}.status = '{STATUS_STOPPED}'),
+                 {sign} * COALESCE({row}.duration_ms, {row}.duration * 1000, 0)"""
+    update = """sessions = sessions + excluded.sessions,
+                completed = completed + excluded.completed,
+                stopped = stopped + excluded.stopped,
+                duration_ms = duration_ms + excluded.duration_ms"""
+    statements = []
+    for user, condition in ((f"{row}.user_id", f"{row}.user_id IS NOT NULL"), (str(ALL_USERS), "1")):
+        statements.append(f"""INSERT INTO stats_daily (user_id, day, therapy_type, sessions,
+                                                       completed, stopped, duration_ms)
+                              SELECT {user}, {_day(row + '.timestamp')}, COALESCE({row}.therapy_type, ''), {values}
+                              WHERE {condition}
+                              ON CONFLICT (user_id, day, therapy_type) DO UPDATE SET {update};""")
+        statements.append(f"""INSERT INTO stats_totals (user_id, therapy_type, sessions,
+                                                        completed, stopped, duration_ms)
+                              SELECT {user}, COALESCE({row}.therapy_type, ''), {values}
+                              WHERE {condition}
+                              ON CONFLICT (user_id, therapy_type) DO UPDATE SET {update};""")
+    return "\n".join(statements)
+
+
+def _migration_5_stats_rollups(conn):
+    """
+    Kullanım istatistikleri için özet tablolar: kullanıcı/gün/terapi tipi başına
+    (stats_daily) ve kullanıcı/terapi tipi başına tüm zamanlar (stats_totals).
+    Trigger'lar her history değişikliğini özetlere işler; paneller yalnızca bu
+    tablolardan okuduğu için geçmişin uzunluğundan bağımsız sürede yüklenir.
+    """
+    counters = """sessions INTEGER NOT NULL DEFAULT 0,
+                  completed INTEGER NOT NULL DEFAULT 0,
+                  stopped INTEGER NOT NULL DEFAULT 0,
+                  duration_ms INTEGER NOT NULL DEFAULT 0"""
+    conn.execute(f"""CREATE TABLE stats_daily (
+                         user_id INTEGER NOT NULL,
+                         day TEXT NOT NULL,
+                         therapy_type TEXT NOT NULL,
+                         {counters},
+                         PRIMARY KEY (user_id, day, therapy_type)
+                     ) WITHOUT ROWID""")
+    conn.execute(f"""CREATE TABLE stats_totals (
+                         user_id INTEGER NOT NULL,
+                         therapy_type TEXT NOT NULL,
+                         {counters},
+                         PRIMARY KEY (user_id, therapy_type)
+                     ) WITHOUT ROWID""")
+
+    # Mevcut geçmişten tek seferlik doldurma
+    aggregates = f"""COUNT(*), SUM(status = '{STATUS_COMPLETED}'), SUM(status = '{STATUS_STOPPED}'),
+                     SUM(COALESCE(duration_ms, duration * 1000, 0))"""
+    conn.execute(f"""INSERT INTO stats_daily
+                     SELECT user_id, {_day('timestamp')}, COALESCE(therapy_type, ''), {aggregates}
+                     FROM history WHERE user_id IS NOT NULL
+                     GROUP BY 1, 2, 3""")
+    conn.execute(f"""INSERT INTO stats_daily
+                     SELECT {ALL_USERS}, {_day('timestamp')}, COALESCE(therapy_type, ''), {aggregates}
+                     FROM history
+                     GROUP BY 2, 3""")
+    conn.execute("""INSERT INTO stats_totals
+                    SELECT user_id, therapy_type, SUM(sessions), SUM(completed), SUM(stopped),
+                           SUM(duration_ms)
+                    FROM stats_daily
+                    GROUP BY user_id, therapy_type""")
+
+    conn.execute(f"""CREATE TRIGGER history_stats_insert AFTER INSERT ON history
+                     BEGIN {_rollup_upserts("NEW", 1)} END""")
+    conn.execute(f"""CREATE TRIGGER history_stats_delete AFTER DELETE ON history
+                     BEGIN {_rollup_upserts("OLD", -1)} END""")
+    conn.execute(f"""CREATE TRIGGER history_stats_update
+                     AFTER UPDATE OF user_id, therapy_type, duration, duration_ms, status, timestamp
+                     ON history
+                     BEGIN {_rollup_upserts("OLD", -1)} {_rollup_upserts("NEW", 1)} END""")
+
+
+def _migration_6_user_search(conn):
+    """
+    Ad, soyad ve seri numarasında önek araması için FTS5 dizini (içeriği users
+    tablosundan okunur, trigger'larla güncel tutulur). 1-3 karakterlik önekler
+    ayrıca dizinlenir. FTS5 olmayan SQLite sürümlerinde atlanır; arama LIKE'a düşer.
+    """
+    try:
+        conn.execute("""CREATE VIRTUAL TABLE users_fts USING fts5(
+                            name, surname, serial_number,
+                            content='users', content_rowid='id',
+                            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')""")
+    except sqlite3.OperationalError as error:
+        if "fts5" in str(error):
+            return
+        raise
+    conn.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+
+    insert = """INSERT INTO users_fts (rowid, name, surname, serial_number)
+                VALUES (NEW.id, NEW.name, NEW.surname, NEW.serial_number);"""
+    delete = """INSERT INTO users_fts (users_fts, rowid, name, surname, serial_number)
+                VALUES ('delete', OLD.id, OLD.name, OLD.surname, OLD.serial_number);"""
+    conn.execute(f"CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN {insert} END")
+    conn.execute(f"CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN {delete} END")
+    # Şifre güncellemeleri (rehash) dizine dokunmaz
+    conn.execute(f"""CREATE TRIGGER users_fts_update
+                     AFTER UPDATE OF name, surname, serial_number ON users
+                     BEGIN {delete} {insert} END""")
+
+
+def _migration_7_sync_state(conn):
+    """
+    Merkezi depoyla eşitlemenin durumu (cihaz kimliği, gönderilen son
+    history/users id'leri, alınan son paket). Bkz. sync.py.
+    """
+    conn.execute("""CREATE TABLE sync_state (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    ) WITHOUT ROWID""")
+
+
+def _migration_8_archive(conn):
+    """
+    Geçmiş arşivinin dosya listesi (archive_parts, bkz. retention.py) ve
+    arşivleme sırasında özet tabloların düşülmemesi için bayrak: arşive
+    taşınan satırlar silinirken history_stats_delete çalışmaz, istatistikler
+    tüm zamanları göstermeye devam eder.
+    """
+    conn.execute("""CREATE TABLE archive_parts (
+                        path TEXT PRIMARY KEY,
+                        month TEXT NOT NULL,
+                        rows INTEGER NOT NULL,
+                        min_id INTEGER NOT NULL,
+                        max_id INTEGER NOT NULL,
+                        first_timestamp TEXT,
+                        last_timestamp TEXT
+                    ) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX idx_archive_parts_month ON archive_parts(month)")
+    conn.execute("""CREATE TABLE archive_state (
+                        id INTEGER PRIMARY KEY CHECK (id = 0),
+                        archiving INTEGER NOT NULL
+                    )""")
+    conn.execute("INSERT INTO archive_state (id, archiving) VALUES (0, 0)")
+    conn.execute("DROP TRIGGER history_stats_delete")
+    conn.execute(f"""CREATE TRIGGER history_stats_delete AFTER DELETE ON history
+                     WHEN NOT (SELECT archiving FROM archive_state)
+                     BEGIN {_rollup_upserts("OLD", -1)} END""")
+
+
+# Sıra önemlidir: i. eleman şemayı (i+1). sürüme taşır. Yalnızca sona ekleme yapılır.
+MIGRATIONS = [
+    _migration_1_indexes,
+    _migration_2_filter_indexes,
+    _migration_3_duration_ms,
+    _migration_4_entry_uid,
+    _migration_5_stats_rollups,
+    _migration_6_user_search,
+    _migration_7_sync_state,
+    _migration_8_archive,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """
+    PRAGMA user_version ile takip edilen şema sürümünü en güncel hale getirir.
+    Her göç kendi işlemi içinde çalışır; yarıda kalan göç geri alınır.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    while version < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Başka bir süreç bu arada göçü yapmış olabilir
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                conn.commit()
+                break
+            MIGRATIONS[version](conn)
+            version += 1
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+# ---------------------------- VERİTABANI İŞLEMLERİ ----------------------------
+
+def initialize_database():
+    """
+    Uygulama ilk çalıştığında veritabanını (SQLite) başlatır.
+    'therapy_history.db' adında bir dosya oluşturur,
+    'history' ile 'users' tablolarını oluşturur ve bekleyen şema göçlerini uygular.
+    """
+    conn = _pool.connection()
+    with conn:
+        # Terapi geçmişi tablosu
+        conn.execute("""CREATE TABLE IF NOT EXISTS history (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            therapy_type TEXT,
+                            mode TEXT,
+                            duration INTEGER,
+                            status TEXT,
+                            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                            user_id INTEGER,
+                            FOREIGN KEY(user_id) REFERENCES users(id))""")
+
+        # Kullanıcılar tablosu
+        conn.execute("""CREATE TABLE IF NOT EXISTS users (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT,
+                            surname TEXT,
+                            serial_number TEXT,
+                            password TEXT,
+                            role TEXT DEFAULT 'user')""")
+
+    # Mevcut dosyaları yerinde güncelle (indeksler vb.)
+    migrate(conn)
+
+    # Varsayılan admin kullanıcısı ekleme (yoksa).
+    # serial_number üzerindeki UNIQUE indeks sayesinde tekrar eklenmez;
+    # KDF maliyeti her açılışta ödenmesin diye önce varlığı kontrol edilir.
+    if conn.execute(SQL_SELECT_USER_BY_SERIAL, ("admin",)).fetchone() is None:
+        admin_password = hash_password("admin")
+        with conn:
+            conn.execute("""INSERT OR IGNORE INTO users (name, surname, serial_number, password, role)
+                            VALUES ('Admin', 'User', 'admin', ?, 'admin')""", (admin_password,))
+
+    # Çökme nedeniyle veritabanına yazılamamış seans kayıtlarını kurtar
+    replay_session_journal()
+
+
+def replay_session_journal(journal=None):
+    """
+    Günlükte kalmış (veritabanına yazıldığı onaylanmamış) seans kayıtlarını
+    history tablosuna ekler ve segmentleri siler. entry_uid sayesinde zaten
+    yazılmış kayıtlar tekrar eklenmez. Eklenen segment sayısını döndürür.
+    """
+    journal = journal or SessionJournal(journal_path_for(DB_PATH))
+    segments = journal.segments()
+    for segment in segments:
+        log_therapy_batch(SessionJournal.read(segment))
+        SessionJournal.discard(segment)
+    return len(segments)
+
+
+def authenticate(serial_number, password):
+    """
+    Girişin KDF'li kısmı: seri numarası ve şifre eşleşirse (kullanıcı satırı,
+    yeni şifre özeti veya None) döndürür, yoksa None. Yalnızca okuma yapar;
+    veritabanı worker'ını KDF süresince bekletmemek için ayrı bir thread'de
+    (ör. giriş havuzu) çalıştırılır. Sonuç complete_login'e verilir.
+    Eski (tuzsuz SHA-256) veya güncel olmayan parametrelerle saklanan şifreler
+    için yeni özet burada üretilir.
+    """
+    user = _pool.connection().execute(SQL_SELECT_USER_BY_SERIAL, (serial_number,)).fetchone()
+    if not user:
+        # Bilinmeyen seri numarası da KDF maliyetini öder (bkz. credentials.dummy_verify)
+        dummy_verify(password)
+        return None
+
+    ok, needs_rehash = check_password(password, user[4])
+    if not ok:
+        return None
+    return user, hash_password(password) if needs_rehash else None
+
+
+def complete_login(user, new_hash=None):
+    """
+    Girişin veritabanı kısmı: gerekirse yeniden özetlenmiş şifreyi yazar ve
+    kullanıcıyı (user_cache'teki models.User nesnesi) döndürür.
+    """
+    if new_hash is not None:
+        with _pool.transaction() as conn:
+            conn.execute(SQL_UPDATE_PASSWORD, (new_hash, user[0]))
+    return user_cache.put(models.User.from_row(user))
+
+
+def validate_serial_number(serial_number, password):
+    """
+    Girilen seri numarası ve şifrenin veritabanındaki bir kullanıcıya ait olup olmadığını kontrol eder.
+    Eşleşme varsa, o kullanıcıyı (models.User, şifre özeti olmadan) döndürür,
+    yoksa None döndürür. Dönen nesne user_cache'teki nesnedir.
+    authenticate + complete_login'in tek çağrıda birleşimidir.
+    KDF maliyetli olduğu için bu fonksiyon arayüz thread'inde çağrılmamalıdır.
+    """
+    result = authenticate(serial_number, password)
+    return complete_login(*result) if result else None
+
+
+def register_user(name, surname, serial_number, password, role="user"):
+    """
+    Yeni kullanıcı kayıt fonksiyonu.
+    Şifre, tuzlu bir KDF (credentials.hash_password) ile özetlenerek saklanır.
+    Seri numarası zaten kayıtlıysa False, başarılıysa True döndürür.
+    """
+    hashed_password = hash_password(password)
+    try:
+        with _pool.transaction() as conn:
+            conn.execute(SQL_INSERT_USER, (name, surname, serial_number, hashed_password, role))
+    except sqlite3.IntegrityError:
+        return False
+    user_cache.invalidate(serial_number=serial_number)
+    return True
+
+
+def set_user_role(serial_number, role):
+    """
+    Kullanıcının rolünü değiştirir; önbellekteki nesne (oturumdaki kullanıcı dahil)
+    yerinde güncellenir. Kullanıcı yoksa False döndürür.
+    """
+    with _pool.transaction() as conn:
+        changed = conn.execute(SQL_UPDATE_ROLE, (role, serial_number)).rowcount
+    if changed:
+        user_cache.set_role(serial_number, role)
+    return changed > 0
+
+
+def get_users(user_ids):
+    """
+    {id: models.User} döndürür. Önbellekte olmayanlar tek sorguda (IN listesi)
+    okunup önbelleğe eklenir; veritabanında bulunmayan id'ler sonuçta yer almaz.
+    """
+    found, missing = user_cache.get_many(set(user_ids))
+    if missing:
+        conn = _pool.connection()
+        for chunk in batched(missing, USERS_BY_ID_CHUNK):
+            sql = SQL_SELECT_USERS_BY_ID.format(", ".join("?" * len(chunk)))
+            for row in conn.execute(sql, chunk):
+                user = user_cache.put(models.User.from_row(row))
+                found[user.id] = user
+    return found
+
+
+def get_user(user_id):
+    """
+    Tek kullanıcı (models.User) veya None.
+    """
+    return get_users((user_id,)).get(user_id)
+
+
+def log_therapy(therapy_type, duration, status, user_id):
+    """
+    Terapi tamamlandığında (veya durdurulduğunda) history tablosuna kayıt ekler.
+    duration saniye cinsindendir ve kesirli olabilir; 'duration' kolonuna tam saniye,
+    'duration_ms' kolonuna milisaniye hassasiyetinde yazılır.
+    Mode: Manual (sabit)
+    """
+    with _pool.transaction() as conn:
+        conn.execute(SQL_INSERT_HISTORY, (therapy_type, "Manual", round(duration),
+                                          round(duration * 1000), status, user_id))
+
+
+def log_therapy_batch(entries):
+    """
+    session_log.make_entry ile oluşturulmuş kayıtları tek bir işlemde toplu ekler.
+    Aynı entry_uid ile daha önce eklenmiş kayıtlar atlanır.
+    """
+    with _pool.transaction() as conn:
+        conn.executemany(SQL_INSERT_HISTORY_ENTRY, entries)
+
+
+def fetch_all_users():
+    """
+    Tüm kullanıcıları döndürür: [(id, name, surname, serial_number, role), ...]
+    """
+    return _pool.connection().execute(SQL_SELECT_USERS).fetchall()
+
+
+def _fts_query(text):
+    """
+    Arama metnini FTS5 sorgusuna çevirir: her kelime tırnaklı bir önek olur
+    ("ay"* "yıl"*), kelimeler VE ile bağlanır. Kullanıcı girdisindeki
+    operatörler ve tırnaklar böylece etkisiz kalır.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def _has_user_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'users_fts'").fetchone() is not None
+
+
+@instrument.traced("db.search_users")
+def search_users(text, after=0, limit=USER_SEARCH_LIMIT):
+    """
+    Adı, soyadı veya seri numarası text'teki kelimelerle başlayan kullanıcılar.
+    Sonuçlar id sırasında en fazla limit satırdır; sonraki sayfa için son
+    satırın id'si after olarak verilir. Boş metin tüm kullanıcıları sayfalar.
+    """
+    conn = _pool.connection()
+    query = _fts_query(text)
+    if not query:
+        return conn.execute(SQL_USERS_PAGE, (after, limit)).fetchall()
+    if _has_user_search_index(conn):
+        return conn.execute(SQL_SEARCH_USERS, (query, after, limit)).fetchall()
+    return conn.execute(SQL_SEARCH_USERS_LIKE, {"pattern": text.strip() + "%", "after": after,
+                                                "limit": limit}).fetchall()
+
+
+@instrument.traced("db.fetch_therapy_history")
+def fetch_therapy_history(include_user_info=False, include_archived=False):
+    """
+    Terapi geçmişini döndürür.
+    include_user_info=True ise, history JOIN users sorgusu çalışır ve kullanıcı ad-soyad bilgisi de gelir.
+    include_archived=True ise arşive taşınmış eski kayıtlar (bkz. retention.py)
+    aynı satır yapısında eklenir; sıralama yine yeniden eskiyedir.
+    """
+    sql = SQL_SELECT_HISTORY_WITH_USERS if include_user_info else SQL_SELECT_HISTORY
+    rows = _pool.connection().execute(sql).fetchall()
+    if include_archived:
+        import retention
+        rows.extend(retention.fetch_archived_history(include_user_info))
+        # Sayfalı sorgularla aynı düzen: (timestamp, id) azalan. İki parça zaten
+        # sıralı olduğundan sıralama doğrusala yakındır
+        rows.sort(key=lambda row: (row[5] or "", row[0]), reverse=True)
+    return rows
+
+
+@instrument.traced("db.fetch_therapy_history_page")
+def fetch_therapy_history_page(include_user_info=False, before=None, after=None,
+                               limit=HISTORY_PAGE_SIZE, user_id=None, therapy_type=None,
+                               status=None, date_from=None, date_to=None):
+    """
+    Terapi geçmişinin tek bir sayfasını döndürür (yeniden eskiye sıralı).
+    Sayfalama OFFSET yerine (timestamp, id) anahtarıyla yapılır, böylece
+    her sayfa tablo boyutundan bağımsız olarak indeks üzerinden okunur.
+
+    before=(timestamp, id): bu satırdan daha eski olan sayfa
+    after=(timestamp, id): bu satırdan daha yeni olan sayfa
+    Filtreler (None ise uygulanmaz) SQL içinde çalışır: user_id, therapy_type,
+    status, date_from / date_to ('YYYY-MM-DD', iki uç da dahil).
+    Satır yapısı: (id, therapy_type, mode, duration, status, timestamp, name, surname)
+    veya include_user_info=False ise (id, therapy_type, mode, duration, status, timestamp, user_id)
+    """
+    clauses = []
+    params = []
+    for clause, value in ((SQL_FILTER_USER, user_id),
+                          (SQL_FILTER_TYPE, therapy_type),
+                          (SQL_FILTER_STATUS, status),
+                          (SQL_FILTER_FROM, date_from),
+                          (SQL_FILTER_TO, date_to)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+
+    order = SQL_ORDER_DESC
+    if after is not None:
+        clauses.append(SQL_NEWER_THAN)
+        params.extend(after)
+        order = SQL_ORDER_ASC
+    elif before is not None:
+        clauses.append(SQL_OLDER_THAN)
+        params.extend(before)
+    params.append(limit)
+
+    sql = SQL_HISTORY_PAGE_WITH_USERS if include_user_info else SQL_HISTORY_PAGE
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    rows = _pool.connection().execute(sql + order, params).fetchall()
+    if after is not None:
+        rows.reverse()
+    return rows
+
+
+@instrument.traced("db.fetch_history_page_with_users")
+def fetch_history_page_with_users(**query):
+    """
+    fetch_therapy_history_page(include_user_info=True) ile aynı satırları
+    döndürür, ancak ad-soyad JOIN yerine user_cache'ten eklenir; sayfadaki
+    kullanıcılar önbellekte değilse tek sorguda okunur. JOIN'den farklı olarak
+    kullanıcısı silinmiş kayıtlar da (ad-soyad boş) listelenir.
+    Parametreler fetch_therapy_history_page ile aynıdır.
+    """
+    rows = fetch_therapy_history_page(include_user_info=False, **query)
+    users = get_users(row[6] for row in rows if row[6] is not None)
+    named = []
+    for row in rows:
+        user = users.get(row[6])
+        named.append(row[:6] + ((user.name, user.surname) if user else ("", "")))
+    return named
+
+
+# ---------------------------- ARKA PLAN YÜRÜTÜCÜSÜ ----------------------------
+
+class DatabaseExecutor:
+    """
+    Tüm veritabanı işlerini tek bir worker thread'de sırayla çalıştırır.
+    Tek yazıcı olduğu için yazma kilitleri çekişmez; concurrent.futures
+    arayüzü sayesinde çağıran taraf Future ile sonucu bekler veya geri çağrı bağlar.
+    Worker thread havuzdan kendi bağlantısını alır.
+    """
+
+    def __init__(self, name="db-worker"):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs) çağrısını kuyruğa ekler ve bir Future döndürür.
+        Ölçüm açıksa işin kuyrukta bekleme süresi de kaydedilir.
+        """
+        if instrument.enabled:
+            return self._executor.submit(self._timed, time.perf_counter_ns(), fn, args, kwargs)
+        return self._executor.submit(fn, *args, **kwargs)
+
+    @staticmethod
+    def _timed(queued_ns, fn, args, kwargs):
+        start = time.perf_counter_ns()
+        instrument.observe("db.queue_wait_ms", (start - queued_ns) / 1e6)
+        instrument.count("db.jobs")
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            instrument.record_span(f"db.job:{getattr(fn, '__name__', 'iş')}", start,
+                                   time.perf_counter_ns() - start)
+
+    def shutdown(self, wait=True):
+        """
+        Kuyruktaki işleri bitirip worker'ı durdurur.
+        """
+        self._executor.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Süreç genelindeki tek DatabaseExecutor örneğini döndürür (ilk çağrıda oluşturur).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DatabaseExecutor()
+        return _executor
+
+
+# ---------------------------- TOPLU İŞLEMLER ----------------------------
+
+def batched(rows, size=BULK_BATCH_SIZE):
+    """
+    Herhangi bir yineleyiciyi en fazla size elemanlı listeler halinde verir.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def add_users_bulk(rows, batch_size=BULK_BATCH_SIZE):
+    """
+    (name, surname, serial_number, password_hash, role) satırlarını tek bir
+    işlem içinde, batch_size'lık executemany çağrılarıyla ekler. rows bir
+    üreteç olabilir; bellekte yalnızca bir grup tutulur. Zaten kayıtlı seri
+    numaraları atlanır. Eklenen kullanıcı sayısını döndürür.
+    """
+    conn = _pool.connection()
+    added = 0
+    with conn:
+        for batch in batched(rows, batch_size):
+            # rowcount trigger'ların (arama dizini) değişikliklerini saymaz
+            added += conn.executemany(SQL_INSERT_USER_IGNORE, batch).rowcount
+    return added
+
+
+def import_history_bulk(rows, batch_size=BULK_BATCH_SIZE):
+    """
+    (entry_uid, therapy_type, mode, duration, duration_ms, status, timestamp,
+    serial_number, user_id) satırlarını tek bir işlemde toplu ekler.
+    serial_number bu veritabanında kayıtlıysa kullanıcı ondan bulunur, değilse
+    user_id kullanılır. Aynı entry_uid'li kayıtlar tekrar eklenmez.
+    Eklenen kayıt sayısını döndürür.
+    """
+    conn = _pool.connection()
+    imported = 0
+    with conn:
+        for batch in batched(rows, batch_size):
+            # rowcount trigger'ların (istatistik özetleri) değişikliklerini saymaz
+            imported += conn.executemany(SQL_IMPORT_HISTORY, batch).rowcount
+    return imported
+
+
+def iter_history_export(batch_size=BULK_BATCH_SIZE):
+    """
+    Tüm geçmişi kullanıcı bilgileriyle birlikte id sırasıyla, fetchmany ile
+    parça parça üretir (HISTORY_EXPORT_COLUMNS sırasında). Tablo ne kadar büyük
+    olursa olsun bellekte yalnızca bir parça tutulur.
+    """
+    cursor = _pool.connection().execute(SQL_EXPORT_HISTORY)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def count_history():
+    return _pool.connection().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+
+@instrument.traced("db.fetch_usage_stats")
+def fetch_usage_stats(user_id=ALL_USERS, days=STATS_DAYS):
+    """
+    Bir kullanıcının (ALL_USERS: herkesin) kullanım istatistikleri. Yalnızca
+    özet tablolardan okunur; süre terapi tipi ve gün sayısıyla sınırlıdır.
+        by_type: [(terapi_tipi, seans, tamamlanan, durdurulan, toplam_ms), ...]
+        total:   aynı alanların toplamı ve ortalama süre (ms)
+        per_day: son days gün için [(gün, seans), ...]
+    """
+    conn = _pool.connection()
+    by_type = conn.execute(SQL_STATS_TOTALS, (user_id,)).fetchall()
+    sessions = sum(row[1] for row in by_type)
+    duration_ms = sum(row[4] for row in by_type)
+    total = {
+        "sessions": sessions,
+        "completed": sum(row[2] for row in by_type),
+        "stopped": sum(row[3] for row in by_type),
+        "duration_ms": duration_ms,
+        "average_ms": duration_ms / sessions if sessions else 0,
+    }
+    per_day = conn.execute(SQL_STATS_DAILY, (user_id, f"-{days - 1} days")).fetchall()
+    return {"by_type": by_type, "total": total, "per_day": per_day}
+
+
+def history_stats():
+    """
+    Kullanıcı ve seans sayıları ile terapi tipine göre seans sayısı/toplam süre.
+    """
+    conn = _pool.connection()
+    users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    stats = fetch_usage_stats(ALL_USERS)
+    by_type = [(therapy_type, sessions, round(duration_ms / 1000))
+               for therapy_type, sessions, _, _, duration_ms in stats["by_type"]]
+    return {"users": users, "sessions": stats["total"]["sessions"],
+            "total_duration": round(stats["total"]["duration_ms"] / 1000), "by_type": by_type}
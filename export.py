@@ -0,0 +1,236 @@
+"""
+Terapi geçmişini CSV, JSONL veya sıkıştırılmış sütunsal (columnar) dosyaya
+akış halinde yazar. Satırlar veritabanından fetchmany ile parça parça okunur;
+bellekte en fazla bir satır grubu tutulur.
+
+Sütunsal biçim (Parquet benzeri, bağımlılıksız):
+    MAGIC | satır grubu ... | altbilgi (JSON) | altbilgi uzunluğu (uint64) | MAGIC
+Her satır grubunda her sütun ayrı bir zlib bloğudur. Tamsayı sütunları
+int64 dizisi, metin sütunları sözlük + uint32 indeks dizisi olarak kodlanır;
+boş (NULL) değerler her blokta bir bayt maskesiyle işaretlenir.
+"""
+import csv
+import json
+import os
+import struct
+import threading
+import zlib
+from array import array
+
+import database
+
+FORMATS = ("csv", "jsonl", "columnar")
+EXTENSIONS = {"csv": ".csv", "jsonl": ".jsonl", "columnar": ".trc"}
+
+MAGIC = b"TRCOL1\n"
+ROW_GROUP_SIZE = 50000
+
+# HISTORY_EXPORT_COLUMNS ile aynı sırada sütun tipleri
+COLUMN_TYPES = {
+    "id": "int", "entry_uid": "str", "therapy_type": "str", "mode": "str",
+    "duration": "int", "duration_ms": "int", "status": "str", "timestamp": "str",
+    "user_id": "int", "serial_number": "str", "name": "str", "surname": "str",
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def detect_format(path):
+    for fmt, extension in EXTENSIONS.items():
+        if path.endswith(extension):
+            return fmt
+    return "csv"
+
+
+# ---------------------------- YAZICILAR ----------------------------
+
+class CsvWriter:
+    def __init__(self, f, columns):
+        self.writer = csv.writer(f)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class JsonlWriter:
+    def __init__(self, f, columns):
+        self.f = f
+        self.columns = columns
+
+    def write_rows(self, rows):
+        columns = self.columns
+        self.f.write("".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+                             for row in rows))
+
+    def close(self):
+        pass
+
+
+def _encode_column(values, kind):
+    mask = bytes(value is None for value in values)
+    if kind == "int":
+        payload = array("q", (0 if value is None else value for value in values)).tobytes()
+        dictionary = b""
+    else:
+        lookup = {}
+        indexes = array("I", (lookup.setdefault(value, len(lookup))
+                              for value in values if value is not None))
+        dictionary = json.dumps(list(lookup), ensure_ascii=False).encode()
+        payload = indexes.tobytes()
+    body = struct.pack("<III", len(mask), len(dictionary), len(payload)) + mask + dictionary + payload
+    return zlib.compress(body, 6)
+
+
+def _decode_column(block, kind, rows):
+    body = zlib.decompress(block)
+    mask_len, dict_len, payload_len = struct.unpack_from("<III", body)
+    offset = 12
+    mask = body[offset:offset + mask_len]
+    offset += mask_len
+    dictionary = body[offset:offset + dict_len]
+    offset += dict_len
+    payload = body[offset:offset + payload_len]
+    if kind == "int":
+        values = array("q")
+        values.frombytes(payload)
+        return [None if mask[i] else values[i] for i in range(rows)]
+    words = json.loads(dictionary)
+    indexes = array("I")
+    indexes.frombytes(payload)
+    indexes = iter(indexes)
+    return [None if mask[i] else words[next(indexes)] for i in range(rows)]
+
+
+class ColumnarWriter:
+    """
+    Satır gruplarını sütun sütun sıkıştırarak yazar; sonunda her grubun
+    konumunu içeren altbilgiyi ekler.
+    """
+
+    def __init__(self, f, columns):
+        self.f = f
+        self.columns = columns
+        self.kinds = [COLUMN_TYPES.get(column, "str") for column in columns]
+        self.groups = []
+        f.write(MAGIC)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        offset = self.f.tell()
+        lengths = []
+        for index, kind in enumerate(self.kinds):
+            block = _encode_column([row[index] for row in rows], kind)
+            self.f.write(block)
+            lengths.append(len(block))
+        self.groups.append({"offset": offset, "rows": len(rows), "lengths": lengths})
+
+    def close(self):
+        footer = json.dumps({"columns": self.columns, "types": self.kinds,
+                             "groups": self.groups}).encode()
+        self.f.write(footer)
+        self.f.write(struct.pack("<Q", len(footer)))
+        self.f.write(MAGIC)
+
+
+def read_columnar(path):
+    """
+    Sütunsal dosyadaki satırları (sütun adı -> değer sözlüğü) grup grup üretir.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: sütunsal dosya değil")
+        f.seek(-(8 + len(MAGIC)), os.SEEK_END)
+        footer_len, = struct.unpack("<Q", f.read(8))
+        f.seek(-(8 + len(MAGIC) + footer_len), os.SEEK_END)
+        footer = json.loads(f.read(footer_len))
+        columns, kinds = footer["columns"], footer["types"]
+        for group in footer["groups"]:
+            f.seek(group["offset"])
+            data = [_decode_column(f.read(length), kind, group["rows"])
+                    for length, kind in zip(group["lengths"], kinds)]
+            for row in zip(*data):
+                yield dict(zip(columns, row))
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "columnar": ColumnarWriter}
+
+
+# ---------------------------- DIŞA AKTARIM ----------------------------
+
+def export_history(path, fmt=None, progress=None, cancel=None, group_size=ROW_GROUP_SIZE):
+    """
+    Geçmişi path dosyasına yazar ve yazılan satır sayısını döndürür.
+    progress(done, total) her satır grubundan sonra çağrılır; cancel bir
+    threading.Event ise ayarlandığında yazım durur, yarım dosya silinir ve
+    ExportCancelled yükseltilir. Dosya önce '.part' adıyla yazılır, tamamlanınca taşınır.
+    """
+    fmt = fmt or detect_format(path)
+    total = database.count_history()
+    columns = database.HISTORY_EXPORT_COLUMNS
+    partial_path = path + ".part"
+    mode = "wb" if fmt == "columnar" else "w"
+    options = {} if fmt == "columnar" else {"encoding": "utf-8", "newline": ""}
+
+    done = 0
+    try:
+        with open(partial_path, mode, **options) as f:
+            writer = WRITERS[fmt](f, columns)
+            for rows in database.batched(database.iter_history_export(), group_size):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                writer.write_rows(rows)
+                done += len(rows)
+                if progress:
+                    progress(done, total)
+            writer.close()
+    except BaseException:
+        try:
+            os.remove(partial_path)
+        except FileNotFoundError:
+            pass
+        raise
+    os.replace(partial_path, path)
+    return done
+
+
+class ExportJob:
+    """
+    export_history'yi ayrı bir thread'de çalıştırır (veritabanı worker'ını
+    uzun süre meşgul etmemek için; WAL sayesinde okuma yazımları bekletmez).
+    on_progress(done, total) ve on_done(count, error) bu thread'den çağrılır;
+    arayüz tarafı bunları ana thread'e iletmelidir.
+    """
+
+    def __init__(self, path, fmt=None, on_progress=None, on_done=None):
+        self.path = path
+        self.fmt = fmt
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="history-export", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _run(self):
+        try:
+            count = export_history(self.path, self.fmt, self.on_progress, self.cancel_event)
+        except Exception as error:
+            if self.on_done:
+                self.on_done(None, error)
+            return
+        finally:
+            database.get_pool().release()
+        if self.on_done:
+            self.on_done(count, None)
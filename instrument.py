@@ -0,0 +1,266 @@
+"""
+Hafif performans ölçümü: süre aralıkları (span), sayaçlar ve histogramlar.
+Varsayılan olarak kapalıdır; kapalıyken her çağrı tek bir global bayrak
+kontrolüdür ve hiçbir şey kaydedilmez.
+
+    with instrument.span("ui.switch_frame", frame="HistoryScreen"):
+        ...
+
+    @instrument.traced("db.fetch_therapy_history")
+    def fetch_therapy_history(...): ...
+
+    instrument.count("db.jobs")
+    instrument.observe("timer.lateness_ms", 1.7)
+    instrument.gauge("user_cache.hit_rate", lambda: cache.stats()["hit_rate"])
+
+Span'lar ve histogram değerleri sabit boyutlu halka tamponlarda (deque)
+tutulur; uzun çalışmada bellek büyümez, yalnızca son ölçümler kalır.
+snapshot() özet verir; dump_json() ve export_chrome_trace() dosyaya yazar
+(Chrome trace, chrome://tracing veya Perfetto ile açılır).
+
+    TERAPI_TRACE=trace.json python main.py    (açık; kapanışta trace yazılır)
+    TERAPI_DEBUG=1 python main.py             (açık; pencerede F12 ile özet katmanı)
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+SPAN_BUFFER = 20000       # Saklanan son span sayısı
+HISTOGRAM_BUFFER = 2048   # Histogram başına saklanan son değer sayısı
+
+enabled = False
+
+_spans = deque(maxlen=SPAN_BUFFER)   # (ad, başlangıç ns, süre ns, thread id, argümanlar)
+_histograms = {}
+_counters = {}
+_gauges = {}   # ad -> anlık değeri döndüren fonksiyon
+_lock = threading.Lock()
+_epoch_ns = time.perf_counter_ns()
+_thread_names = {}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    global _epoch_ns
+    with _lock:
+        _spans.clear()
+        _histograms.clear()
+        _counters.clear()
+        _thread_names.clear()
+        _epoch_ns = time.perf_counter_ns()
+
+
+# ---------------------------- KAYIT ----------------------------
+
+class Histogram:
+    """
+    Son HISTOGRAM_BUFFER değeri tutan halka tampon; toplam sayı ayrıca sayılır.
+    """
+
+    __slots__ = ("values", "count", "total")
+
+    def __init__(self, size=HISTOGRAM_BUFFER):
+        self.values = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        values = sorted(self.values)
+        if not values:
+            return {"count": self.count}
+        pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+        return {"count": self.count, "mean": self.total / self.count, "p50": pick(0.5),
+                "p95": pick(0.95), "p99": pick(0.99), "max": values[-1]}
+
+
+def observe(name, value):
+    """
+    Histograma bir değer ekler (ör. milisaniye).
+    """
+    if not enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(value)
+
+
+def count(name, n=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def gauge(name, read):
+    """
+    Anlık değeri rapor sırasında read() ile okunan bir gösterge kaydeder
+    (ör. önbellek isabet oranı). Kayıt ölçüm kapalıyken de yapılır; okuma
+    yalnızca snapshot() sırasında olur.
+    """
+    _gauges[name] = read
+
+
+def record_span(name, start_ns, duration_ns, args=None):
+    """
+    Önceden ölçülmüş bir süre aralığını kaydeder; süre ms olarak histograma da eklenir.
+    """
+    thread = threading.get_ident()
+    if thread not in _thread_names:
+        _thread_names[thread] = threading.current_thread().name
+    _spans.append((name, start_ns, duration_ns, thread, args))
+    observe(name, duration_ns / 1e6)
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **args):
+    """
+    Süre aralığı bağlam yöneticisi; kapalıyken paylaşılan boş bir nesne döner.
+    """
+    if not enabled:
+        return _NO_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name=None):
+    """
+    Fonksiyonun her çağrısını span olarak kaydeden dekoratör.
+    """
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_span(label, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+
+# ---------------------------- RAPOR VE DIŞA AKTARMA ----------------------------
+
+def snapshot():
+    gauges = {name: read() for name, read in list(_gauges.items())}
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": gauges,
+            "histograms": {name: histogram.summary() for name, histogram in _histograms.items()},
+            "spans": len(_spans),
+        }
+
+
+def dump_json(path):
+    """
+    Özet ve ham span'ları JSON olarak yazar.
+    """
+    data = snapshot()
+    data["span_records"] = [
+        {"name": name, "start_us": (start - _epoch_ns) / 1000, "duration_us": duration / 1000,
+         "thread": _thread_names.get(thread, str(thread)), "args": args}
+        for name, start, duration, thread, args in list(_spans)]
+    _write(path, data)
+
+
+def export_chrome_trace(path):
+    """
+    Span'ları Chrome trace olay biçiminde ("X" olayları) yazar; sayaçların ve
+    göstergelerin son değerleri "C" olayı olarak eklenir.
+    """
+    pid = os.getpid()
+    # Thread adları (ör. db-worker, audio-worker) izleyicide satır başlığı olur
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread,
+               "args": {"name": thread_name}}
+              for thread, thread_name in list(_thread_names.items())]
+    end_us = 0.0
+    for name, start, duration, thread, args in list(_spans):
+        ts = (start - _epoch_ns) / 1000
+        end_us = max(end_us, ts + duration / 1000)
+        event = {"name": name, "cat": name.split(".", 1)[0], "ph": "X", "ts": ts,
+                 "dur": duration / 1000, "pid": pid, "tid": thread}
+        if args:
+            event["args"] = {key: str(value) for key, value in args.items()}
+        events.append(event)
+    data = snapshot()
+    counters = dict(data["counters"])
+    counters.update((name, value) for name, value in data["gauges"].items() if value is not None)
+    for name, value in counters.items():
+        events.append({"name": name, "ph": "C", "ts": end_us, "pid": pid, "args": {"value": value}})
+    _write(path, {"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+def _write(path, data):
+    temporary = path + ".part"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def format_summary(limit=12):
+    """
+    Hata ayıklama katmanı için kısa metin özet (en çok ölçülen histogramlar önce).
+    """
+    data = snapshot()
+    histograms = sorted(data["histograms"].items(), key=lambda item: -item[1]["count"])[:limit]
+    lines = [f"{'ölçüm':<34}{'adet':>7}{'p50':>9}{'p99':>9}{'max':>9}"]
+    for name, summary in histograms:
+        if "p50" in summary:
+            lines.append(f"{name[:34]:<34}{summary['count']:>7}{summary['p50']:>9.2f}"
+                         f"{summary['p99']:>9.2f}{summary['max']:>9.2f}")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name[:34]:<34}{value:>7}")
+    for name, value in sorted(data["gauges"].items()):
+        if value is not None:
+            lines.append(f"{name[:34]:<34}{value:>7.4g}")
+    return "\n".join(lines)
@@ -1,10 +1,38 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-import sqlite3
-import hashlib
-import threading
 import time
 
+APP_START = time.perf_counter()  # Açılış süresi ölçümü için, diğer importlardan önce
+
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import os
+import sys
+import queue
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import assets
+import audio
+import backup
+import database
+import export
+import instrument
+import models
+from database import (initialize_database, authenticate, complete_login, register_user,
+                      log_therapy_batch, search_users, fetch_therapy_history_page,
+                      fetch_history_page_with_users,
+                      fetch_usage_stats, HISTORY_PAGE_SIZE, ALL_USERS, STATUS_COMPLETED,
+                      STATUS_STOPPED, get_executor)
+from protocol import (load_protocols, default_protocols, phase_event, events_path_for,
+                      ProtocolError, ProtocolEventLog, DEFAULT_PROTOCOLS_PATH)
+from session_log import SessionJournal, WriteBehindLogger, journal_path_for
+import retention
+import sync
+from timer import CountdownTimer
+from scheduler import SessionScheduler
+import widgets
+
 # Merkezi Ayarlar (Font ve Renkler)
 config = {
     "font": ("Montserrat", 12),
@@ -12,165 +40,295 @@ config = {
     "bg_color": "#0078D7",
     "button_color": "#004080",
     "text_color": "#FFFFFF",
+    "frame_cache_size": 8,  # Bellekte tutulacak en fazla ekran sayısı
+    "timing_report": os.environ.get("TERAPI_TIMING") == "1",  # Açılış/ekran süre raporu
+    "sync_store": os.environ.get("TERAPI_SYNC_DIR"),  # Merkezi eşitleme dizini (yoksa kapalı)
+    "protocols_path": os.environ.get("TERAPI_PROTOCOLS", DEFAULT_PROTOCOLS_PATH),  # Protokol tanımları
+    "trace_path": os.environ.get("TERAPI_TRACE"),  # Kapanışta Chrome trace yazılacak dosya
+    "debug_overlay": os.environ.get("TERAPI_DEBUG") == "1",  # F12 ile ölçüm özeti katmanı
+    "sound": os.environ.get("TERAPI_SOUND", "auto"),  # Ses çıkışı: auto/off/aplay/winsound/file:<dizin>
+    # Bu yaştan (gün) eski kayıtlar boşta arşive taşınır; 0 (varsayılan) kapatır.
+    # Geçmiş ekranı, dışa aktarma ve sunucu yalnızca sıcak tabloyu okur.
+    "retention_days": int(os.environ.get("TERAPI_RETENTION_DAYS", 0)),
+    "backup_dir": os.environ.get("TERAPI_BACKUP_DIR"),  # Yedek dizini (yoksa <veritabanı>.backups)
 }
 
-
-# ---------------------------- VERİTABANI İŞLEMLERİ ----------------------------
-
-def initialize_database():
-    """
-    Uygulama ilk çalıştığında veritabanını (SQLite) başlatır.
-    'therapy_history.db' adında bir dosya oluşturur ve
-    'history' ile 'users' tablolarını oluşturur.
-    """
-    conn = sqlite3.connect("therapy_history.db")
-    cursor = conn.cursor()
-
-    # Terapi geçmişi tablosu
-    cursor.execute("""CREATE TABLE IF NOT EXISTS history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        therapy_type TEXT,
-                        mode TEXT,
-                        duration INTEGER,
-                        status TEXT,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        user_id INTEGER,
-                        FOREIGN KEY(user_id) REFERENCES users(id))""")
-
-    # Kullanıcılar tablosu
-    cursor.execute("""CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT,
-                        surname TEXT,
-                        serial_number TEXT,
-                        password TEXT,
-                        role TEXT DEFAULT 'user')""")
-
-    # Varsayılan admin kullanıcısı ekleme (yoksa)
-    admin_password = hashlib.sha256("admin".encode()).hexdigest()
-    cursor.execute("""INSERT OR IGNORE INTO users (name, surname, serial_number, password, role)
-                      VALUES ('Admin', 'User', 'admin', ?, 'admin')""", (admin_password,))
-
-    conn.commit()
-    conn.close()
-
-
-def validate_serial_number(serial_number, password):
-    """
-    Girilen seri numarası ve şifrenin veritabanındaki bir kullanıcıya ait olup olmadığını kontrol eder.
-    Eşleşme varsa, o kullanıcıyı (tuple) döndürür, yoksa None döndürür.
-    """
-    conn = sqlite3.connect("therapy_history.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE serial_number = ?", (serial_number,))
-    user = cursor.fetchone()
-    conn.close()
-
-    if user:
-        stored_password = user[4]
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        if stored_password == hashed_password:
-            return user
-    return None
+# Terapi tipleri ve geçmişteki durum değerleri (filtreler için)
+THERAPY_TYPES = ("Göğüs Terapi", "Bacak Terapi", "Kol Terapi")
+HISTORY_STATUSES = (STATUS_COMPLETED, STATUS_STOPPED)
+ALL_OPTION = "Tümü"
 
 
-def register_user(name, surname, serial_number, password, role="user"):
-    """
-    Yeni kullanıcı kayıt fonksiyonu.
-    Şifre, SHA-256 ile kriptolanarak saklanır.
-    """
-    conn = sqlite3.connect("therapy_history.db")
-    cursor = conn.cursor()
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
-    cursor.execute("""INSERT INTO users (name, surname, serial_number, password, role)
-                      VALUES (?, ?, ?, ?, ?)""",
-                   (name, surname, serial_number, hashed_password, role))
-    conn.commit()
-    conn.close()
-
+# ---------------------------- ANA UYGULAMA SINIFI ----------------------------
 
-def log_therapy(therapy_type, duration, status, user_id):
+class UiDispatcher:
     """
-    Terapi tamamlandığında (veya durdurulduğunda) history tablosuna kayıt ekler.
-    Mode: Manual (sabit)
+    Başka thread'lerden gelen çağrıları Tk ana döngüsünde çalıştırır.
+    Tk widget'larına yalnızca ana thread dokunabildiği için worker thread'ler
+    sonuçlarını post() ile bu kuyruğa bırakır; kuyruk after() ile boşaltılır.
     """
-    conn = sqlite3.connect("therapy_history.db")
-    cursor = conn.cursor()
-    cursor.execute("""INSERT INTO history (therapy_type, mode, duration, status, user_id)
-                      VALUES (?, ?, ?, ?, ?)""",
-                   (therapy_type, "Manual", duration, status, user_id))
-    conn.commit()
-    conn.close()
 
+    POLL_MS = 15
 
-def fetch_all_users():
-    """
-    Tüm kullanıcıları döndürür: [(id, name, surname, serial_number, role), ...]
-    """
-    conn = sqlite3.connect("therapy_history.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, surname, serial_number, role FROM users")
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    def __init__(self, root):
+        self.root = root
+        self.queue = queue.SimpleQueue()
+        self.root.after(self.POLL_MS, self._drain)
 
+    def post(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs) çağrısını ana thread'de çalışmak üzere sıraya koyar.
+        Herhangi bir thread'den çağrılabilir.
+        """
+        self.queue.put((fn, args, kwargs))
 
-def fetch_therapy_history(include_user_info=False):
-    """
-    Terapi geçmişini döndürür.
-    include_user_info=True ise, history JOIN users sorgusu çalışır ve kullanıcı ad-soyad bilgisi de gelir.
-    """
-    conn = sqlite3.connect("therapy_history.db")
-    cursor = conn.cursor()
-    if include_user_info:
-        cursor.execute("""SELECT history.id,
-                                 history.therapy_type,
-                                 history.mode,
-                                 history.duration,
-                                 history.status,
-                                 history.timestamp,
-                                 users.name,
-                                 users.surname
-                          FROM history
-                          JOIN users ON history.user_id = users.id
-                          ORDER BY history.timestamp DESC""")
-    else:
-        cursor.execute("SELECT * FROM history ORDER BY timestamp DESC")
-    history = cursor.fetchall()
-    conn.close()
-    return history
+    def _drain(self):
+        while True:
+            try:
+                fn, args, kwargs = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+        self.root.after(self.POLL_MS, self._drain)
 
 
-# ---------------------------- ANA UYGULAMA SINIFI ----------------------------
-
 class TherapyApp(tk.Tk):
     def __init__(self):
         super().__init__()
+        if config["trace_path"] or config["debug_overlay"]:
+            instrument.enable()
+        self.timings = widgets.BuildTimings()
         self.title("Göğüs Terapi Cihazı")
         self.geometry("1080x1080")  # Pencere boyutu 1080 x 1080
         self.config(bg=config["bg_color"])
+        # Fontlar ve stiller tüm ekranlar için bir kez oluşturulur
+        self.timings.measure("tema", widgets.init_theme, self, config)
         self.current_frame = None
-        self.user = None  # Oturum açan kullanıcının bilgisi burada tutulur
-
-        # Veritabanı başlat
-        initialize_database()
+        self.frames = OrderedDict()  # (frame_class, args) -> frame, en son kullanılan sonda
+        self.session = None  # Oturum (models.Session); kullanıcıya self.user ile erişilir
+
+        # Veritabanı işleri arka planda, sonuçlar ana döngüde işlenir
+        self.db = get_executor()
+        # Giriş KDF'si ayrı thread'de çalışır; kuyruktaki kayıt/sorgu işleri onu beklemez
+        self.auth = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auth")
+        self.dispatcher = UiDispatcher(self)
+        self.pending_jobs = 0
+        self.loading_label = tk.Label(self, text="Yükleniyor...", bg=config["button_color"])
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Seans kayıtları önce günlüğe, ardından toplu olarak veritabanına yazılır
+        self.session_logger = WriteBehindLogger(
+            SessionJournal(journal_path_for(database.DB_PATH)),
+            write_batch=log_therapy_batch,
+            submit=self.db.submit)
+
+        # Tüm kanallardaki seanslar tek bir zamanlayıcıda (tek after döngüsü) çalışır
+        self.scheduler = SessionScheduler(schedule=self.after, cancel=self.after_cancel,
+                                          on_end=self.on_session_end)
+
+        # Görüntüler bir kez çözülür; ısınma ilk çizimden sonra başlar (_startup_done)
+        self.assets = assets.AssetManager(self, self.dispatcher.post, timings=self.timings)
+
+        # Uyarı sesleri arka planda bir kez belleğe çözülür ve orada çalınır
+        self.audio = audio.AudioWorker(audio.select_sink(config["sound"]), audio.default_cues()).start()
+
+        # Protokoller açılışta bir kez doğrulanıp derlenir; faz geçişleri olay günlüğüne yazılır
+        self.protocols = self.timings.measure("protokoller", self._load_protocols)
+        self.event_log = ProtocolEventLog(events_path_for(database.DB_PATH))
+        self.scheduler.add_listener(self.on_phase_event)
+
+        # Veritabanı başlat (kuyruktaki ilk iş; sonraki sorgular bunu bekler)
+        self.submit_db(initialize_database)
+
+        # Eşitleme arka planda çalışır; merkezi depo yavaş/erişilemez olsa da
+        # seans kayıtları yerel veritabanına yazılmaya devam eder
+        self.sync_worker = None
+        if config["sync_store"]:
+            engine = sync.SyncEngine(sync.DirectoryStore(config["sync_store"]), submit=self.db.submit)
+            self.sync_worker = sync.SyncWorker(
+                engine, on_pulled=lambda applied: self.dispatcher.post(self.on_sync_pulled)).start()
+
+        # Eski kayıtlar süren seans yokken küçük partilerle arşive taşınır
+        self.retention_worker = None
+        if config["retention_days"] > 0:
+            engine = retention.RetentionEngine(days=config["retention_days"], submit=self.db.submit)
+            self.retention_worker = retention.RetentionWorker(
+                engine, is_idle=lambda: not self.scheduler.sessions).start()
+
+        self.debug_overlay = None
+        if config["debug_overlay"]:
+            self.debug_overlay = DebugOverlay(self)
+            self.bind_all("<F12>", lambda event: self.debug_overlay.toggle())
 
         # Giriş ekranıyla başla
         self.show_login_screen()
+        self.after_idle(self._startup_done)
+
+    @property
+    def user(self):
+        """
+        Oturum açan kullanıcı (models.User); oturum yoksa None.
+        """
+        return self.session.user if self.session is not None else None
+
+    def _load_protocols(self):
+        try:
+            return load_protocols(config["protocols_path"])
+        except (OSError, ProtocolError) as error:
+            messagebox.showerror("Protokoller", f"Protokol tanımları yüklenemedi, "
+                                                f"sabit süreler kullanılacak:\n{error}")
+            return default_protocols()
+
+    def protocols_for(self, therapy_type):
+        return [protocol for protocol in self.protocols.values() if protocol.applies_to(therapy_type)]
+
+    def on_phase_event(self, event, session):
+        if event == "phase":
+            self.event_log.append(phase_event(session, session.run.index))
+            if session.run.index > 0:
+                self.audio.play("phase")
+
+    def _startup_done(self):
+        self.timings.record("açılış (ilk boşta kalma)", time.perf_counter() - APP_START)
+        self.assets.warm()
+        if config["timing_report"]:
+            print(self.timings.report())
+
+    def submit_db(self, fn, *args, callback=None, errback=None, owner=None, executor=None, **kwargs):
+        """
+        fn(*args, **kwargs)'ı veritabanı worker'ında (executor verilmişse onda)
+        çalıştırır, ana thread'i bekletmez.
+        Sonuç geldiğinde callback(result) (hata durumunda errback(exc)) ana thread'de çağrılır.
+        owner verilmişse ve o widget bu arada yok edildiyse geri çağrı atlanır.
+        """
+        self._set_pending(1)
+        future = (executor or self.db).submit(fn, *args, **kwargs)
+        future.add_done_callback(
+            lambda done: self.dispatcher.post(self._deliver, done, callback, errback, owner))
+        return future
+
+    def _deliver(self, future, callback, errback, owner):
+        self._set_pending(-1)
+        if owner is not None and not owner.winfo_exists():
+            return
+        error = future.exception()
+        if error is not None:
+            if errback:
+                errback(error)
+            else:
+                messagebox.showerror("Hata", f"Veritabanı hatası: {error}")
+        elif callback:
+            callback(future.result())
+
+    def _set_pending(self, delta):
+        """
+        Bekleyen veritabanı işi varken köşede yükleniyor göstergesini açık tutar.
+        """
+        self.pending_jobs += delta
+        if self.pending_jobs > 0:
+            self.loading_label.place(relx=1.0, rely=1.0, anchor="se")
+            self.loading_label.lift()
+        else:
+            self.loading_label.place_forget()
+
+    def on_close(self):
+        """
+        Pencere kapatılırken kuyruktaki veritabanı işlerinin bitmesini bekler.
+        """
+        # Ekranlar önce kapatılır ki bekleyen kayıtlarını (ör. süren seans) kuyruğa ekleyebilsin
+        self.clear_frames()
+        self.scheduler.stop_all()  # Süren seanslar o ana kadarki süreleriyle kaydedilir
+        self.event_log.close()
+        self.session_logger.close()
+        self.audio.stop()
+        if self.sync_worker is not None:
+            self.sync_worker.stop()
+        if self.retention_worker is not None:
+            self.retention_worker.stop()
+        self.auth.shutdown(wait=True)
+        self.db.shutdown(wait=True)
+        if config["trace_path"]:
+            instrument.export_chrome_trace(config["trace_path"])
+            instrument.dump_json(os.path.splitext(config["trace_path"])[0] + ".summary.json")
+        if config["timing_report"]:
+            for latency in self.audio.latencies:
+                self.timings.record("ses gecikmesi", latency)
+            print(self.timings.report())
+        self.destroy()
+
+    def on_session_end(self, session, elapsed_seconds, status):
+        self.audio.play("complete" if status == STATUS_COMPLETED else "stop")
+        self.session_logger.log(session.therapy_type, elapsed_seconds, status, session.user_id,
+                                session.mode)
+        self.invalidate_frames(HistoryScreen)
+
+    def on_sync_pulled(self):
+        # Diğer cihazlardan gelen kullanıcı ve seanslar listelerde görünsün
+        self.invalidate_frames(UsersListScreen, HistoryScreen)
 
     def switch_frame(self, frame_class, *args):
         """
         Ekranda gösterilecek çerçeveyi (frame) değiştirir.
         *args: yeni frame'e parametre olarak geçirilebilecek veriler.
+        Her (frame_class, args) için ekran bir kez oluşturulur ve önbellekte
+        tutulur; sonraki geçişlerde yalnızca öne alınır (tkraise) ve varsa
+        on_show(*args) çağrılır. Önbellek config["frame_cache_size"] ile sınırlıdır,
+        en uzun süredir kullanılmayan ekran yok edilir.
+        """
+        with instrument.span("ui.switch_frame", frame=frame_class.__name__):
+            self._switch_frame(frame_class, args)
+
+    def _switch_frame(self, frame_class, args):
+        key = (frame_class, args)
+        frame = self.frames.get(key)
+        if frame is None:
+            frame = self.timings.measure(f"ekran: {frame_class.__name__}", frame_class, self, *args)
+            frame.place(x=20, y=20, relwidth=1, relheight=1, width=-40, height=-40)
+            self.frames[key] = frame
+            while len(self.frames) > config["frame_cache_size"]:
+                _, evicted = self.frames.popitem(last=False)
+                evicted.destroy()
+        else:
+            self.frames.move_to_end(key)
+
+        self.current_frame = frame
+        frame.tkraise()
+        if self.pending_jobs:
+            self.loading_label.lift()
+        on_show = getattr(frame, "on_show", None)
+        if on_show:
+            on_show(*args)
+
+    def invalidate_frames(self, *frame_classes):
+        """
+        Verisi değişen ekranları eski olarak işaretler; bir sonraki
+        gösterimde on_show içinde verilerini yeniden yüklerler.
         """
-        if self.current_frame:
-            self.current_frame.destroy()
-        self.current_frame = frame_class(self, *args)
-        self.current_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        for (frame_class, _), frame in self.frames.items():
+            if frame_class in frame_classes:
+                frame.stale = True
+
+    def clear_frames(self, keep=()):
+        """
+        keep dışındaki tüm önbellekteki ekranları yok eder (ör. oturum kapanırken
+        önceki kullanıcıya ait ekranlar bir sonrakine gösterilmesin diye).
+        """
+        for key in list(self.frames):
+            if key[0] not in keep:
+                frame = self.frames.pop(key)
+                if frame is self.current_frame:
+                    self.current_frame = None
+                frame.destroy()
 
     # --- Ekran geçişlerini sağlayan yardımcı metotlar ---
 
     def show_login_screen(self):
+        # Çıkış: oturuma bağlı ekranlar atılır
+        self.session = None
+        self.clear_frames(keep=(LoginScreen, RegisterScreen))
         self.switch_frame(LoginScreen)
 
     def show_registration_screen(self):
@@ -194,51 +352,32 @@ class TherapyApp(tk.Tk):
     def show_all_users_screen(self):
         self.switch_frame(UsersListScreen)
 
+    def show_active_sessions(self, admin_view=False):
+        self.switch_frame(ActiveSessionsScreen, admin_view)
+
 
 # ---------------------------- EKRANLAR (FRAMES) ----------------------------
 
 class LoginScreen(tk.Frame):
+    SPEC = [
+        widgets.image("logo_label"),
+        widgets.title("Giriş Yapın"),
+        widgets.label("Kullanıcı Adı / Seri Numarası:"),
+        widgets.entry("serial_entry"),
+        widgets.label("Şifre:"),
+        widgets.entry("password_entry", show="*"),
+        widgets.button("Giriş Yap", "login", name="login_button", pady=20),
+        widgets.button("Kayıt Ol", "master.show_registration_screen"),
+    ]
+
     def __init__(self, master):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
+        widgets.build(self, self.SPEC)
+        master.assets.bind(self.logo_label, "logo", assets.LOGO_LOGIN)
 
-        tk.Label(self,
-                 text="Giriş Yapın",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
-
-        tk.Label(self,
-                 text="Kullanıcı Adı / Seri Numarası:",
-                 font=config["font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack()
-        self.serial_entry = tk.Entry(self, font=config["font"])
-        self.serial_entry.pack(pady=5)
-
-        tk.Label(self,
-                 text="Şifre:",
-                 font=config["font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack()
-        self.password_entry = tk.Entry(self, font=config["font"], show="*")
-        self.password_entry.pack(pady=5)
-
-        tk.Button(self,
-                  text="Giriş Yap",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=self.login).pack(pady=20)
-
-        tk.Button(self,
-                  text="Kayıt Ol",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_registration_screen).pack(pady=10)
+    def on_show(self):
+        # Önceki oturumun şifresi ekranda kalmasın
+        self.password_entry.delete(0, "end")
 
     def login(self):
         """
@@ -247,12 +386,33 @@ class LoginScreen(tk.Frame):
         """
         serial_number = self.serial_entry.get()
         password = self.password_entry.get()
-        user = validate_serial_number(serial_number, password)
+        self.login_button.config(state="disabled")
+        self.master.submit_db(authenticate, serial_number, password, executor=self.master.auth,
+                              callback=self.on_authenticated, errback=self.on_login_error, owner=self)
+
+    def on_authenticated(self, result):
+        """
+        KDF giriş thread'inde bitince çağrılır; veritabanı worker'ına yalnızca
+        gerekirse şifre güncellemesi ve önbelleğe ekleme gider.
+        """
+        if result is None:
+            self.on_login_result(None)
+        else:
+            self.master.submit_db(complete_login, *result, callback=self.on_login_result,
+                                  errback=self.on_login_error, owner=self)
+
+    def on_login_error(self, error):
+        self.login_button.config(state="normal")
+        messagebox.showerror("Hata", f"Veritabanı hatası: {error}")
 
+    def on_login_result(self, user):
+        """
+        Doğrulama sonucu worker'dan geldiğinde ana thread'de çağrılır.
+        """
+        self.login_button.config(state="normal")
         if user:
-            self.master.user = user
-            # user tuple: (id, name, surname, serial_number, password, role)
-            if user[5] == "admin":
+            self.master.session = models.Session(user)
+            if user.is_admin:
                 self.master.show_admin_dashboard()
             else:
                 self.master.show_user_dashboard()
@@ -261,63 +421,27 @@ class LoginScreen(tk.Frame):
 
 
 class RegisterScreen(tk.Frame):
+    SPEC = [
+        widgets.title("Kayıt Ol"),
+        widgets.label("Ad:"),
+        widgets.entry("name_entry"),
+        widgets.label("Soyad:"),
+        widgets.entry("surname_entry"),
+        widgets.label("Seri Numara:"),
+        widgets.entry("serial_entry"),
+        widgets.label("Şifre:"),
+        widgets.entry("password_entry", show="*"),
+        widgets.button("Kayıt Ol", "register", name="register_button", pady=20),
+        widgets.button("Geri", "master.show_login_screen"),
+    ]
+
     def __init__(self, master):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
+        widgets.build(self, self.SPEC)
 
-        tk.Label(self,
-                 text="Kayıt Ol",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
-
-        tk.Label(self,
-                 text="Ad:",
-                 font=config["font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack()
-        self.name_entry = tk.Entry(self, font=config["font"])
-        self.name_entry.pack(pady=5)
-
-        tk.Label(self,
-                 text="Soyad:",
-                 font=config["font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack()
-        self.surname_entry = tk.Entry(self, font=config["font"])
-        self.surname_entry.pack(pady=5)
-
-        tk.Label(self,
-                 text="Seri Numara:",
-                 font=config["font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack()
-        self.serial_entry = tk.Entry(self, font=config["font"])
-        self.serial_entry.pack(pady=5)
-
-        tk.Label(self,
-                 text="Şifre:",
-                 font=config["font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack()
-        self.password_entry = tk.Entry(self, font=config["font"], show="*")
-        self.password_entry.pack(pady=5)
-
-        tk.Button(self,
-                  text="Kayıt Ol",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=self.register).pack(pady=20)
-
-        tk.Button(self,
-                  text="Geri",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_login_screen).pack(pady=10)
+    def on_show(self):
+        for entry in (self.name_entry, self.surname_entry, self.serial_entry, self.password_entry):
+            entry.delete(0, "end")
 
     def register(self):
         """
@@ -333,221 +457,407 @@ class RegisterScreen(tk.Frame):
             messagebox.showerror("Hata", "Lütfen tüm alanları doldurun!")
             return
 
-        register_user(name, surname, serial_number, password)
+        self.register_button.config(state="disabled")
+        self.master.submit_db(register_user, name, surname, serial_number, password,
+                              callback=self.on_register_result, owner=self)
+
+    def on_register_result(self, registered):
+        """
+        Kayıt sonucu worker'dan geldiğinde ana thread'de çağrılır.
+        """
+        self.register_button.config(state="normal")
+        if not registered:
+            messagebox.showerror("Hata", "Bu seri numarası zaten kayıtlı!")
+            return
+        self.master.invalidate_frames(UsersListScreen)
         messagebox.showinfo("Başarılı", "Kayıt başarılı! Giriş yapabilirsiniz.")
         self.master.show_login_screen()
 
 
+class StatsPanel(tk.Frame):
+    """
+    Kullanım özet tablolarından okunan istatistik paneli: terapi tipine göre
+    seans sayısı, toplam/ortalama süre, tamamlanma oranı ve son günlerin seans sayıları.
+    """
+
+    def __init__(self, master, app, user_id=ALL_USERS):
+        super().__init__(master)
+        self.app = app
+        self.user_id = user_id
+        self.summary_label = tk.Label(self, text="")
+        self.summary_label.pack()
+
+        columns = ["therapy_type", "sessions", "duration", "average", "completed"]
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=len(THERAPY_TYPES))
+        for column, text in zip(columns, ["Terapi Tipi", "Seans", "Toplam", "Ortalama", "Tamamlanma"]):
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=110, anchor="center")
+        self.tree.pack(pady=5)
+
+        self.daily_label = tk.Label(self, text="")
+        self.daily_label.pack()
+
+    def refresh(self):
+        # Bekleyen seans kayıtları önce yazılır; iş kuyruğu sıralı olduğu için
+        # istatistikler son seansı da içerir
+        self.app.session_logger.flush()
+        self.app.submit_db(fetch_usage_stats, self.user_id, callback=self.show_stats, owner=self)
+
+    @staticmethod
+    def _format_duration(ms):
+        minutes, seconds = divmod(round(ms / 1000), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+    @staticmethod
+    def _ratio(completed, stopped):
+        finished = completed + stopped
+        return f"%{100 * completed / finished:.0f}" if finished else "-"
+
+    def show_stats(self, stats):
+        total = stats["total"]
+        self.summary_label.config(
+            text=f"Toplam {total['sessions']} seans, {self._format_duration(total['duration_ms'])} "
+                 f"(ortalama {self._format_duration(total['average_ms'])}), "
+                 f"tamamlanma {self._ratio(total['completed'], total['stopped'])}")
+
+        self.tree.delete(*self.tree.get_children())
+        for therapy_type, sessions, completed, stopped, duration_ms in stats["by_type"]:
+            self.tree.insert("", "end", values=(therapy_type, sessions,
+                                                self._format_duration(duration_ms),
+                                                self._format_duration(duration_ms / sessions),
+                                                self._ratio(completed, stopped)))
+
+        per_day = ", ".join(f"{day[5:]}: {sessions}" for day, sessions in stats["per_day"])
+        self.daily_label.config(text=f"Son {database.STATS_DAYS} gün: {per_day or 'seans yok'}")
+
+
 class UserDashboard(tk.Frame):
+    SPEC = [
+        widgets.image("logo_label", pady=5),
+        widgets.title("", name="welcome_label"),
+        widgets.button("Terapi Seç", "master.show_therapy_selection", pady=20),
+        widgets.button("Geçmişi Görüntüle", ("master.show_history_screen", False)),
+        widgets.button("Aktif Seanslar", ("master.show_active_sessions", False)),
+        widgets.button("Çıkış", "master.show_login_screen"),
+    ]
+
     def __init__(self, master):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
+        widgets.build(self, self.SPEC)
+        master.assets.bind(self.logo_label, "logo", assets.LOGO_HEADER)
 
         user = master.user
-        # user tuple: (id, name, surname, serial_number, password, role)
-        welcome_message = f"Hoşgeldiniz {user[1]} {user[2]}"
-        tk.Label(self,
-                 text=welcome_message,
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
-
-        tk.Button(self,
-                  text="Terapi Seç",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_therapy_selection).pack(pady=20)
-
-        tk.Button(self,
-                  text="Geçmişi Görüntüle",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=lambda: master.show_history_screen(admin_view=False)).pack(pady=10)
-
-        tk.Button(self,
-                  text="Çıkış",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_login_screen).pack(pady=10)
+        self.welcome_label.config(text=f"Hoşgeldiniz {user.full_name}")
+        self.stats_panel = StatsPanel(self, master, user_id=user.id)
+        self.stats_panel.pack(pady=10)
+
+    def on_show(self):
+        # Özetlerden okunduğu için her gösterimde yenilemek ucuzdur
+        self.stats_panel.refresh()
 
 
 class TherapySelectionScreen(tk.Frame):
+    SPEC = [widgets.title("Terapi Seçim Ekranı")]
+    SPEC += [widgets.button(therapy_type, ("master.show_therapy_control", therapy_type))
+             for therapy_type in THERAPY_TYPES]
+    SPEC += [widgets.button("Geri", "master.show_user_dashboard")]
+
     def __init__(self, master):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
-
-        tk.Label(self,
-                 text="Terapi Seçim Ekranı",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
-
-        tk.Button(self,
-                  text="Göğüs Terapi",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=lambda: master.show_therapy_control("Göğüs Terapi")).pack(pady=10)
-
-        tk.Button(self,
-                  text="Bacak Terapi",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=lambda: master.show_therapy_control("Bacak Terapi")).pack(pady=10)
-
-        tk.Button(self,
-                  text="Kol Terapi",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=lambda: master.show_therapy_control("Kol Terapi")).pack(pady=10)
-
-        tk.Button(self,
-                  text="Geri",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_user_dashboard).pack(pady=10)
+        widgets.build(self, self.SPEC)
 
 
 class TherapyControlScreen(tk.Frame):
+    """
+    Kullanıcının bir terapi tipindeki seansını yönetir. Seans uygulamanın
+    SessionScheduler'ında çalışır; ekrandan çıkılsa da sürer ve
+    Aktif Seanslar ekranından izlenebilir.
+    """
+
     def __init__(self, master, therapy_type):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
         self.therapy_type = therapy_type
-        self.running = False  # Terapi çalışıyor mu kontrolü
-
-        tk.Label(self,
-                 text=f"{therapy_type} Kontrol Ekranı",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
-
-        self.timer_label = tk.Label(self,
-                                    text="00:00",
-                                    font=config["title_font"],
-                                    bg=config["bg_color"],
-                                    fg=config["text_color"])
-        self.timer_label.pack(pady=10)
-
-        # Süre seçenekleri (varsayılan 10 saniye)
-        self.duration_var = tk.IntVar(value=10)
-        duration_options = [10, 60, 180]  # 10 saniye, 1 dakika, 3 dakika
-        for option in duration_options:
-            tk.Radiobutton(self,
-                           text=f"{option} saniye",
-                           variable=self.duration_var,
-                           value=option,
-                           font=config["font"],
-                           bg=config["bg_color"],
-                           fg=config["text_color"],
-                           selectcolor=config["button_color"]).pack(pady=5)
-
-        self.start_button = tk.Button(self,
-                                      text="Başlat",
-                                      font=config["font"],
-                                      bg=config["button_color"],
-                                      fg=config["text_color"],
-                                      width=20, height=2,
-                                      command=self.start_therapy)
-        self.start_button.pack(pady=10)
-
-        self.stop_button = tk.Button(self,
-                                     text="Durdur",
-                                     font=config["font"],
-                                     bg=config["button_color"],
-                                     fg=config["text_color"],
-                                     width=20, height=2,
-                                     command=self.stop_therapy,
-                                     state="disabled")
-        self.stop_button.pack(pady=10)
-
-        tk.Button(self,
-                  text="Geri",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_therapy_selection).pack(pady=10)
+        self.session = None
+
+        # Bu terapi tipine uygun protokoller (varsayılan ilki)
+        self.protocols = master.protocols_for(therapy_type)
+        self.protocol_var = tk.StringVar(value=self.protocols[0].name if self.protocols else "")
+
+        widgets.build(self, [
+            widgets.title(f"{therapy_type} Kontrol Ekranı"),
+            widgets.title("00:00", name="timer_label", pady=10),
+            widgets.label("", name="phase_label", pady=5),
+            *[widgets.radio(f"{protocol.name} ({CountdownTimer.format(protocol.duration)})",
+                            "protocol_var", protocol.name)
+              for protocol in self.protocols],
+            widgets.button("Başlat", "start_therapy", name="start_button"),
+            widgets.button("Duraklat", "toggle_pause", name="pause_button", state="disabled"),
+            widgets.button("Durdur", "stop_therapy", name="stop_button", state="disabled"),
+            widgets.button("Geri", "master.show_therapy_selection"),
+        ])
+        master.scheduler.add_listener(self.on_session_event)
+
+    def on_show(self, therapy_type):
+        # Bu kullanıcının bu tipte süren bir seansı varsa ona bağlanılır
+        self.session = self.master.scheduler.find(self.master.user.id, self.therapy_type)
+        self.update_controls()
+
+    def update_controls(self):
+        session = self.session
+        active = session is not None
+        self.start_button.config(state="normal" if not active and self.protocols else "disabled")
+        self.stop_button.config(state="normal" if active else "disabled")
+        self.pause_button.config(state="normal" if active else "disabled",
+                                 text="Devam" if active and session.timer.paused else "Duraklat")
+        self.show_time(session.remaining() if active else 0)
+        self.show_phase()
 
     def start_therapy(self):
         """
-        Terapiyi başlatır. Sayaç (timer) bir thread içinde geriye doğru sayar.
+        Seçili protokolü başlatır. Sayaç, merkezi zamanlayıcıda monotonik saate göre
+        geriye doğru sayar; faz geçişleri protokolün adım tablosundan izlenir.
         """
-        if not self.running:
-            self.running = True
-            self.start_button.config(state="disabled")
-            self.stop_button.config(state="normal")
-            self.duration = self.duration_var.get()
-            threading.Thread(target=self.run_timer, daemon=True).start()
+        if self.session is None and self.protocols:
+            user = self.master.user
+            protocol = self.master.protocols[self.protocol_var.get()]
+            self.session = self.master.scheduler.start(self.therapy_type, protocol.duration,
+                                                       user.id, user.full_name,
+                                                       protocol=protocol)
+            self.update_controls()
+
+    def toggle_pause(self):
+        if self.session is None:
+            return
+        if self.session.timer.paused:
+            self.master.scheduler.resume(self.session.id)
+        else:
+            self.master.scheduler.pause(self.session.id)
 
     def stop_therapy(self):
         """
-        Terapiyi manuel olarak durdurur ve süreyi veritabanına işler.
+        Terapiyi manuel olarak durdurur; geçen süre SessionScheduler.on_end ile kaydedilir.
         """
-        if self.running:
-            self.running = False
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
+        if self.session is not None:
+            self.master.scheduler.stop(self.session.id)
+
+    def show_time(self, remaining):
+        self.timer_label.config(text=CountdownTimer.format(remaining))
 
-            # Şu ana kadar kaç saniye geçmişti?
-            min_sec = self.timer_label["text"].split(":")
-            elapsed_seconds = int(min_sec[0]) * 60 + int(min_sec[1])
-            log_therapy(self.therapy_type, elapsed_seconds, "Tamamlandı", self.master.user[0])
-            messagebox.showinfo("Tamamlandı", f"{self.therapy_type} tamamlandı.")
-            self.timer_label.config(text="00:00")
+    def show_phase(self):
+        phase = self.session.phase if self.session is not None else None
+        if phase is None:
+            self.phase_label.config(text="")
+            return
+        _, duration, intensity, label = phase
+        run = self.session.run
+        self.phase_label.config(text=f"{run.index + 1}/{len(run.protocol)}: {label} "
+                                     f"(yoğunluk %{intensity}, {duration} sn)")
 
-    def run_timer(self):
+    def on_session_event(self, event, session):
+        if session is not self.session:
+            return
+        if event == "tick":
+            self.show_time(session.remaining())
+            return
+        if event == "phase":
+            self.show_phase()
+            return
+        if event == "end":
+            self.session = None
+        self.update_controls()
+        if event == "end":
+            # Bitiş sesle bildirilir; modal pencere Tk döngüsünü ve diğer seansları bekletmez
+            if session.status == STATUS_COMPLETED:
+                self.phase_label.config(text=f"{self.therapy_type} süresi tamamlandı.")
+            else:
+                self.phase_label.config(text=f"{self.therapy_type} durduruldu.")
+
+    def destroy(self):
+        # Seans sürmeye devam eder; yalnızca ekranın dinleyicisi kaldırılır
+        self.master.scheduler.remove_listener(self.on_session_event)
+        super().destroy()
+
+
+class VirtualTreeview(tk.Frame):
+    """
+    Büyük tablolar için sanal Treeview.
+    Yalnızca görünen bölge ve önünde/arkasında birer ön yükleme sayfası
+    Treeview'da tutulur. Kaydırma uçlara yaklaştıkça fetch_page ile yeni sayfa
+    istenir, en uzaktaki sayfa silinir; böylece bellek ve ilk çizim süresi
+    toplam satır sayısından bağımsızdır.
+
+    fetch_page(before=None, after=None, limit=..., **query) yeniden eskiye sıralı
+    satırlar döndürür ve veritabanı worker'ında çalışır (submit ile).
+    row_key(row) sayfalama anahtarını, row_values(row) tabloda gösterilecek değerleri döndürür.
+    """
+
+    EDGE = 0.15  # Kaydırma çubuğunun uca bu oranda yaklaşması yeni sayfa yükletir
+
+    def __init__(self, master, columns, fetch_page, row_key, row_values, submit,
+                 page_size=HISTORY_PAGE_SIZE, max_pages=3):
+        super().__init__(master)
+        self.fetch_page = fetch_page
+        self.row_key = row_key
+        self.row_values = row_values
+        self.submit = submit
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.query = {}  # fetch_page'e her istekte aktarılan filtreler
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Her sayfa: (ilk satırın anahtarı, son satırın anahtarı, Treeview item id'leri)
+        self.pages = deque()
+        self.has_older = False
+        self.has_newer = False
+        self.loading = False
+        self._generation = 0  # reload() sonrası eski isteklerin sonuçlarını yok saymak için
+        self._check_pending = False
+        self._reload_started = 0
+
+    def reload(self):
         """
-        Geriye doğru sayan zamanlayıcı. Süre bittiğinde terapi otomatik durur.
+        Tabloyu temizler ve en yeni sayfayı ister.
         """
-        seconds = self.duration
-        while self.running and seconds > 0:
-            minutes, sec = divmod(seconds, 60)
-            self.timer_label.config(text=f"{minutes:02}:{sec:02}")
-            time.sleep(1)
-            seconds -= 1
+        self._generation += 1
+        self._reload_started = time.perf_counter_ns()
+        for _, _, items in self.pages:
+            self.tree.delete(*items)
+        self.pages.clear()
+        self.has_older = False
+        self.has_newer = False
+        self._request(self._show_first)
+
+    def _request(self, handler, **cursor):
+        self.loading = True
+        generation = self._generation
+        self.submit(self.fetch_page, limit=self.page_size, **self.query, **cursor,
+                    callback=lambda rows: self._receive(generation, handler, rows),
+                    errback=lambda error: self._fail(generation, error),
+                    owner=self)
+
+    def _receive(self, generation, handler, rows):
+        if generation != self._generation:
+            return
+        self.loading = False
+        handler(rows)
+
+    def _fail(self, generation, error):
+        if generation == self._generation:
+            self.loading = False
+            messagebox.showerror("Hata", f"Veritabanı hatası: {error}")
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Treeview bu geri çağrının içindeyken değiştirilmemeli; kontrol boşta yapılır
+        if not self._check_pending:
+            self._check_pending = True
+            self.after_idle(self._check_window)
+
+    def _check_window(self):
+        self._check_pending = False
+        if not self.pages or self.loading:
+            return
+        first, last = self.tree.yview()
+        if last >= 1 - self.EDGE and self.has_older:
+            self._request(self._show_older, before=self.pages[-1][1])
+        elif first <= self.EDGE and self.has_newer:
+            self._request(self._show_newer, after=self.pages[0][0])
+
+    def _materialized(self):
+        return sum(len(items) for _, _, items in self.pages)
+
+    def _show_first(self, rows):
+        self.has_older = len(rows) == self.page_size
+        if rows:
+            with instrument.span("ui.tree_insert", rows=len(rows)):
+                items = [self.tree.insert("", "end", values=self.row_values(row)) for row in rows]
+            self.pages.append((self.row_key(rows[0]), self.row_key(rows[-1]), items))
+        if instrument.enabled:
+            # reload() çağrısından ilk sayfanın tabloda olmasına kadar (kuyruk + sorgu + çizim)
+            instrument.record_span("ui.table_first_page", self._reload_started,
+                                   time.perf_counter_ns() - self._reload_started)
+
+    def _show_older(self, rows):
+        self.has_older = len(rows) == self.page_size
+        if not rows:
+            return
+        first, _ = self.tree.yview()
+        total = self._materialized()
+
+        with instrument.span("ui.tree_insert", rows=len(rows)):
+            items = [self.tree.insert("", "end", values=self.row_values(row)) for row in rows]
+        self.pages.append((self.row_key(rows[0]), self.row_key(rows[-1]), items))
+
+        if len(self.pages) > self.max_pages:
+            _, _, dropped = self.pages.popleft()
+            self.tree.delete(*dropped)
+            self.has_newer = True
+            # Görünen satırların ekranda yerinde kalması için kaydırma konumunu düzelt
+            new_total = total + len(items) - len(dropped)
+            self.tree.yview_moveto(max(0.0, (first * total - len(dropped)) / new_total))
+
+    def _show_newer(self, rows):
+        self.has_newer = len(rows) == self.page_size
+        if not rows:
+            return
+        first, _ = self.tree.yview()
+        total = self._materialized()
 
-        # Süre tamamlandıysa da durdur
-        if self.running:
-            self.running = False
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
+        with instrument.span("ui.tree_insert", rows=len(rows)):
+            items = [self.tree.insert("", index, values=self.row_values(row))
+                     for index, row in enumerate(rows)]
+        self.pages.appendleft((self.row_key(rows[0]), self.row_key(rows[-1]), items))
 
-            # Terapi otomatik tamamlandı, geçen süre = self.duration
-            log_therapy(self.therapy_type, self.duration, "Tamamlandı", self.master.user[0])
-            messagebox.showinfo("Tamamlandı", f"{self.therapy_type} süresi tamamlandı.")
-            self.timer_label.config(text="00:00")
+        new_total = total + len(items)
+        if len(self.pages) > self.max_pages:
+            _, _, dropped = self.pages.pop()
+            self.tree.delete(*dropped)
+            self.has_older = True
+            new_total -= len(dropped)
+        self.tree.yview_moveto(min(1.0, (first * total + len(items)) / new_total))
 
 
 class HistoryScreen(tk.Frame):
+    stale = False  # Yeni seans kaydedildiğinde TherapyApp.invalidate_frames ile işaretlenir
+
     def __init__(self, master, admin_view):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
-
-        tk.Label(self,
-                 text="Terapi Geçmişi",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
+        widgets.build(self, [widgets.title("Terapi Geçmişi")])
 
         # Admin için ek kolonlar: Ad, Soyad
         columns = ["therapy_type", "mode", "duration", "status", "timestamp"]
         if admin_view:
             columns.extend(["name", "surname"])
 
-        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        # row yapısı (admin_view=True):
+        #   (id, therapy_type, mode, duration, status, timestamp, name, surname)
+        # row yapısı (admin_view=False):
+        #   (id, therapy_type, mode, duration, status, timestamp, user_id)
+        # id'yi tabloya eklemiyoruz; sayfalama anahtarı (timestamp, id)'dir.
+        if admin_view:
+            row_values = lambda row: row[1:]
+        else:
+            row_values = lambda row: row[1:6]
+
+        # Normal kullanıcı yalnızca kendi kayıtlarını görür; filtre SQL'de uygulanır
+        self.filters = {"user_id": None if admin_view else master.user.id}
+
+        self.build_filter_bar()
+
+        self.table = VirtualTreeview(
+            self, columns,
+            # Yönetici görünümünde ad-soyad JOIN yerine kullanıcı önbelleğinden eklenir
+            fetch_page=fetch_history_page_with_users if admin_view else fetch_therapy_history_page,
+            row_key=lambda row: (row[5], row[0]),
+            row_values=row_values,
+            submit=master.submit_db)
+        self.tree = self.table.tree
         self.tree.heading("therapy_type", text="Terapi Tipi")
         self.tree.heading("mode", text="Mod")
         self.tree.heading("duration", text="Süre (sn)")
@@ -558,93 +868,234 @@ class HistoryScreen(tk.Frame):
             self.tree.heading("name", text="Ad")
             self.tree.heading("surname", text="Soyad")
 
-        self.tree.pack(fill="both", expand=True, pady=10)
+        self.table.pack(fill="both", expand=True, pady=10)
 
         # Geri butonunun admin veya kullanıcı paneline yönlendirmesi
         if admin_view:
-            back_command = master.show_admin_dashboard
+            back_command = "master.show_admin_dashboard"
         else:
-            back_command = master.show_user_dashboard
-
-        tk.Button(self,
-                  text="Geri",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=back_command).pack(pady=10)
-
-        self.load_history(admin_view)
-
-    def load_history(self, admin_view):
-        """
-        Terapi geçmişini tabloya yükler.
-        """
-        history = fetch_therapy_history(include_user_info=admin_view)
-        for row in history:
-            # row yapısı (admin_view=True):
-            #   (id, therapy_type, mode, duration, status, timestamp, name, surname)
-            # row yapısı (admin_view=False):
-            #   (id, therapy_type, mode, duration, status, timestamp, user_id)
-            if admin_view:
-                # id'yi tabloya eklemiyoruz, o yüzden row[1:] alabiliriz.
-                # row[1:] = (therapy_type, mode, duration, status, timestamp, name, surname)
-                self.tree.insert("", "end", values=row[1:])
-            else:
-                # row[1:6] = (therapy_type, mode, duration, status, timestamp)
-                self.tree.insert("", "end", values=row[1:6])
+            back_command = "master.show_user_dashboard"
+        widgets.build(self, [widgets.button("Geri", back_command)])
+
+        self.load_history()
+
+    def build_filter_bar(self):
+        """
+        Terapi tipi, durum ve tarih aralığı filtre kontrollerini oluşturur.
+        """
+        bar = tk.Frame(self)
+        bar.pack(pady=5)
+
+        tk.Label(bar, text="Tip:").pack(side="left")
+        self.type_var = tk.StringVar(value=ALL_OPTION)
+        ttk.Combobox(bar, textvariable=self.type_var, state="readonly", width=14,
+                     values=(ALL_OPTION,) + THERAPY_TYPES).pack(side="left", padx=5)
+
+        tk.Label(bar, text="Durum:").pack(side="left")
+        self.status_var = tk.StringVar(value=ALL_OPTION)
+        ttk.Combobox(bar, textvariable=self.status_var, state="readonly", width=12,
+                     values=(ALL_OPTION,) + HISTORY_STATUSES).pack(side="left", padx=5)
+
+        tk.Label(bar, text="Başlangıç:").pack(side="left")
+        self.date_from_entry = tk.Entry(bar, width=11)
+        self.date_from_entry.pack(side="left", padx=5)
+
+        tk.Label(bar, text="Bitiş:").pack(side="left")
+        self.date_to_entry = tk.Entry(bar, width=11)
+        self.date_to_entry.pack(side="left", padx=5)
+
+        tk.Button(bar, text="Filtrele", command=self.apply_filters).pack(side="left", padx=5)
+
+    def apply_filters(self):
+        """
+        Filtre kontrollerini okur ve geçmişi baştan yükler.
+        Tarihler YYYY-MM-DD biçiminde olmalıdır; boş bırakılan alan uygulanmaz.
+        """
+        dates = []
+        for entry in (self.date_from_entry, self.date_to_entry):
+            value = entry.get().strip()
+            if value:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Hata", "Tarih biçimi YYYY-AA-GG olmalıdır!")
+                    return
+            dates.append(value or None)
+
+        therapy_type = self.type_var.get()
+        status = self.status_var.get()
+        self.filters.update(therapy_type=None if therapy_type == ALL_OPTION else therapy_type,
+                            status=None if status == ALL_OPTION else status,
+                            date_from=dates[0],
+                            date_to=dates[1])
+        self.load_history()
+
+    def on_show(self, admin_view):
+        if self.stale:
+            self.stale = False
+            # Kuyrukta bekleyen seans kayıtları, sayfa sorgusundan önce yazılsın
+            self.master.session_logger.flush()
+            self.load_history()
+
+    def load_history(self):
+        """
+        Terapi geçmişinin ilk sayfasını tabloya yükler; kalan sayfalar
+        kaydırdıkça getirilir.
+        """
+        instrument.count("ui.history_loads")
+        self.table.query = dict(self.filters)
+        self.table.reload()
 
 
 class AdminDashboard(tk.Frame):
+    SPEC = [
+        widgets.image("logo_label", pady=5),
+        widgets.title("Yönetici Paneli"),
+        widgets.button("Tüm Kullanıcıları Gör", "master.show_all_users_screen"),
+        widgets.button("Terapi Geçmişi", ("master.show_history_screen", True)),
+        widgets.button("Aktif Seanslar", ("master.show_active_sessions", True)),
+        widgets.button("Geçmişi Dışa Aktar", "start_export", name="export_button"),
+        widgets.button("Yedek Al", "start_backup", name="backup_button"),
+        widgets.button("Çıkış", "master.show_login_screen"),
+    ]
+
+    EXPORT_FILETYPES = [("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Sütunsal", "*.trc")]
+
     def __init__(self, master):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
+        widgets.build(self, self.SPEC)
+        master.assets.bind(self.logo_label, "logo", assets.LOGO_HEADER)
+        self.export_job = None
+        self.backup_job = None
+        self.stats_panel = StatsPanel(self, master)
+        self.stats_panel.pack(pady=10)
+
+        # Dışa aktarım ilerlemesi; yalnızca bir aktarım sürerken görünür
+        self.export_panel = tk.Frame(self)
+        self.export_progress = ttk.Progressbar(self.export_panel, length=300, mode="determinate")
+        self.export_progress.pack(side="left", padx=5)
+        self.export_status = tk.Label(self.export_panel, text="")
+        self.export_status.pack(side="left", padx=5)
+        tk.Button(self.export_panel, text="İptal", command=self.cancel_export).pack(side="left", padx=5)
+        self.backup_status = tk.Label(self, text="")
+
+    def on_show(self):
+        self.stats_panel.refresh()
+
+    def start_export(self):
+        if self.export_job is not None:
+            return
+        path = filedialog.asksaveasfilename(parent=self, title="Geçmişi Dışa Aktar",
+                                            defaultextension=".csv",
+                                            filetypes=self.EXPORT_FILETYPES)
+        if not path:
+            return
+        post = self.master.dispatcher.post
+        self.export_progress.configure(value=0, maximum=1)
+        self.export_status.config(text="Hazırlanıyor...")
+        self.export_panel.pack(pady=10)
+        self.export_button.config(state="disabled")
+        # Aktarım kendi thread'inde sürer; geri çağrılar ana thread'e aktarılır
+        self.export_job = export.ExportJob(
+            path,
+            on_progress=lambda done, total: post(self.on_export_progress, done, total),
+            on_done=lambda count, error: post(self.on_export_done, path, count, error),
+        ).start()
+
+    def cancel_export(self):
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.export_status.config(text="İptal ediliyor...")
+
+    def on_export_progress(self, done, total):
+        if not self.winfo_exists():
+            return
+        self.export_progress.configure(value=done, maximum=max(total, 1))
+        self.export_status.config(text=f"{done} / {total}")
+
+    def on_export_done(self, path, count, error):
+        self.export_job = None
+        if not self.winfo_exists():
+            return
+        self.export_panel.pack_forget()
+        self.export_button.config(state="normal")
+        if isinstance(error, export.ExportCancelled):
+            return
+        if error is not None:
+            messagebox.showerror("Hata", f"Dışa aktarım başarısız: {error}")
+            return
+        messagebox.showinfo("Başarılı", f"{count} kayıt dışa aktarıldı:\n{path}")
 
-        tk.Label(self,
-                 text="Yönetici Paneli",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
-
-        tk.Button(self,
-                  text="Tüm Kullanıcıları Gör",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_all_users_screen).pack(pady=10)
-
-        tk.Button(self,
-                  text="Terapi Geçmişi",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=lambda: master.show_history_screen(admin_view=True)).pack(pady=10)
-
-        tk.Button(self,
-                  text="Çıkış",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_login_screen).pack(pady=10)
+    def start_backup(self):
+        """
+        Çalışırken tutarlı yedek alır; yedek kendi thread'inde küçük adımlarla
+        ilerler, süren seanslar ve kayıtlar beklemez.
+        """
+        if self.backup_job is not None:
+            return
+        post = self.master.dispatcher.post
+        self.backup_button.config(state="disabled")
+        self.backup_status.config(text="Yedekleniyor...")
+        self.backup_status.pack(pady=5)
+        self.backup_job = backup.BackupJob(
+            directory=config["backup_dir"],
+            on_progress=lambda done, total: post(self.on_backup_progress, done, total),
+            on_done=lambda manifest, error: post(self.on_backup_done, manifest, error),
+        ).start()
+
+    def on_backup_progress(self, done, total):
+        if self.winfo_exists():
+            self.backup_status.config(text=f"Yedekleniyor... %{done * 100 // max(total, 1)}")
+
+    def on_backup_done(self, manifest, error):
+        self.backup_job = None
+        if not self.winfo_exists():
+            return
+        self.backup_status.pack_forget()
+        self.backup_button.config(state="normal")
+        if isinstance(error, backup.BackupCancelled):
+            return
+        if error is not None:
+            messagebox.showerror("Hata", f"Yedek alınamadı: {error}")
+            return
+        messagebox.showinfo("Başarılı", f"Yedek alındı: {manifest['name']} "
+                                        f"({manifest['compressed_size'] // 1024} KiB)")
+
+    def destroy(self):
+        if self.export_job is not None:
+            self.export_job.cancel()
+        if self.backup_job is not None:
+            self.backup_job.cancel()
+        super().destroy()
 
 
 class UsersListScreen(tk.Frame):
     """
-    Admin'in tüm kullanıcıları görebileceği ekran.
+    Admin'in kullanıcıları ad, soyad veya seri numarasıyla arayabileceği ekran.
+    Sonuçlar sayfa sayfa (USER_SEARCH_LIMIT) yüklenir.
     """
 
+    stale = False  # Yeni kullanıcı kaydedildiğinde TherapyApp.invalidate_frames ile işaretlenir
+    SEARCH_DELAY_MS = 200  # Tuş vuruşları bu süre boyunca durunca arama yapılır
+
     def __init__(self, master):
         super().__init__(master)
-        self.config(bg=config["bg_color"])
-
-        tk.Label(self,
-                 text="Kullanıcı Listesi",
-                 font=config["title_font"],
-                 bg=config["bg_color"],
-                 fg=config["text_color"]).pack(pady=20)
+        widgets.build(self, [widgets.title("Kullanıcı Listesi")])
+
+        self.search_var = tk.StringVar()
+        self.search_job = None
+        self.generation = 0  # Geç gelen eski arama sonuçlarını ayıklamak için
+        self.last_id = 0
+
+        bar = tk.Frame(self)
+        bar.pack(fill="x")
+        tk.Label(bar, text="Ara:").pack(side="left", padx=5)
+        search_entry = tk.Entry(bar, textvariable=self.search_var, width=40)
+        search_entry.pack(side="left", padx=5)
+        search_entry.bind("<Return>", lambda event: self.load_users())
+        self.result_label = tk.Label(bar, text="")
+        self.result_label.pack(side="left", padx=10)
+        self.search_var.trace_add("write", self.schedule_search)
 
         columns = ["id", "name", "surname", "serial_number", "role"]
         self.tree = ttk.Treeview(self, columns=columns, show="headings")
@@ -656,24 +1107,169 @@ class UsersListScreen(tk.Frame):
 
         self.tree.pack(fill="both", expand=True, pady=10)
 
-        tk.Button(self,
-                  text="Geri",
-                  font=config["font"],
-                  bg=config["button_color"],
-                  fg=config["text_color"],
-                  width=20, height=2,
-                  command=master.show_admin_dashboard).pack(pady=10)
+        widgets.build(self, [
+            widgets.button("Daha Fazla", "load_more", name="more_button", pady=5),
+            widgets.button("Geri", "master.show_admin_dashboard"),
+        ])
 
         self.load_users()
 
+    def on_show(self):
+        if self.stale:
+            self.stale = False
+            self.load_users()
+
+    def schedule_search(self, *args):
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY_MS, self.load_users)
+
     def load_users(self):
         """
-        Veritabanındaki tüm kullanıcıları Treeview'a yükler.
+        Arama kutusundaki metne uyan ilk sayfayı Treeview'a yükler.
         """
-        users = fetch_all_users()
+        self.search_job = None
+        self.generation += 1
+        self.last_id = 0
+        self._request(append=False)
+
+    def load_more(self):
+        self._request(append=True)
+
+    def _request(self, append):
+        self.more_button.config(state="disabled")
+        self.master.submit_db(search_users, self.search_var.get(), self.last_id,
+                              callback=partial(self.show_users, self.generation, append),
+                              owner=self)
+
+    def show_users(self, generation, append, users):
+        if generation != self.generation:
+            return
+        if not append:
+            self.tree.delete(*self.tree.get_children())
         for user in users:
             # user: (id, name, surname, serial_number, role)
             self.tree.insert("", "end", values=user)
+        if users:
+            self.last_id = users[-1][0]
+        has_more = len(users) == database.USER_SEARCH_LIMIT
+        self.more_button.config(state="normal" if has_more else "disabled")
+        shown = len(self.tree.get_children())
+        self.result_label.config(text=f"{shown} sonuç" + (" (devamı var)" if has_more else ""))
+
+
+class ActiveSessionsScreen(tk.Frame):
+    """
+    Zamanlayıcıdaki süren seansların listesi. Satırlar zamanlayıcı olaylarıyla
+    tek tek güncellenir; liste her saniye baştan çizilmez.
+    """
+
+    def __init__(self, master, admin_view):
+        super().__init__(master)
+        self.admin_view = admin_view
+        widgets.build(self, [widgets.title("Aktif Seanslar")])
+
+        columns = ["user", "therapy_type", "mode", "phase", "remaining", "state"]
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for column, text in zip(columns, ["Kullanıcı", "Terapi Tipi", "Protokol", "Faz", "Kalan",
+                                          "Durum"]):
+            self.tree.heading(column, text=text)
+        self.tree.pack(fill="both", expand=True, pady=10)
+
+        widgets.build(self, [
+            widgets.button("Duraklat / Devam", "toggle_selected", pady=5),
+            widgets.button("Durdur", "stop_selected", pady=5),
+            widgets.button("Geri", "back"),
+        ])
+        master.scheduler.add_listener(self.on_session_event)
+
+    def on_show(self, admin_view):
+        self.tree.delete(*self.tree.get_children())
+        for session in self.master.scheduler.active():
+            self.add_session(session)
+
+    def visible(self, session):
+        return self.admin_view or session.user_id == self.master.user.id
+
+    def add_session(self, session):
+        if self.visible(session):
+            self.tree.insert("", "end", iid=str(session.id), values=self.row(session))
+
+    @staticmethod
+    def row(session):
+        phase = session.phase
+        return (session.user_label, session.therapy_type, session.mode,
+                f"{phase[3]} (%{phase[2]})" if phase else "",
+                CountdownTimer.format(session.remaining()), session.state)
+
+    def on_session_event(self, event, session):
+        iid = str(session.id)
+        if event == "start":
+            self.add_session(session)
+        elif event == "end":
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+        elif self.tree.exists(iid):
+            self.tree.item(iid, values=self.row(session))
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def toggle_selected(self):
+        scheduler = self.master.scheduler
+        for session_id in self.selected_ids():
+            session = scheduler.sessions.get(session_id)
+            if session is None:
+                continue
+            if session.timer.paused:
+                scheduler.resume(session_id)
+            else:
+                scheduler.pause(session_id)
+
+    def stop_selected(self):
+        for session_id in self.selected_ids():
+            self.master.scheduler.stop(session_id)
+
+    def back(self):
+        if self.admin_view:
+            self.master.show_admin_dashboard()
+        else:
+            self.master.show_user_dashboard()
+
+    def destroy(self):
+        self.master.scheduler.remove_listener(self.on_session_event)
+        super().destroy()
+
+
+class DebugOverlay(tk.Label):
+    """
+    Pencerenin sol alt köşesinde instrument özetini (histogramlar ve sayaçlar)
+    gösteren katman. F12 ile açılıp kapanır; açıkken yarım saniyede bir yenilenir.
+    """
+
+    REFRESH_MS = 500
+
+    def __init__(self, master):
+        super().__init__(master, font="TkFixedFont", justify="left", anchor="sw",
+                         bg="#000000", fg="#00FF00")
+        self.visible = False
+        self._job = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.place(relx=0.0, rely=1.0, anchor="sw")
+            self.refresh()
+        else:
+            self.place_forget()
+            if self._job is not None:
+                self.after_cancel(self._job)
+                self._job = None
+
+    def refresh(self):
+        self.config(text=instrument.format_summary())
+        self.lift()
+        self._job = self.after(self.REFRESH_MS, self.refresh)
 
 
 # ---------------------------- UYGULAMAYI BAŞLAT ----------------------------
@@ -0,0 +1,204 @@
+"""
+Oturumda ve ekranlarda kullanılan kullanıcı modelleri. users satırı yerine
+adlandırılmış alanlı, __slots__'lu ve şifre özeti taşımayan User nesnesi
+kullanılır; UserCache aynı kullanıcı için süreç boyunca tek bir nesne tutar
+(id ve serial_number ile erişilir), böylece ad/rol gösterimi için tekrar
+tekrar JOIN/sorgu yapılmaz.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import instrument
+
+ROLE_ADMIN = "admin"
+ROLE_USER = "user"
+USER_CACHE_SIZE = 4096  # UserCache'te tutulacak en fazla kullanıcı
+
+
+class User:
+    __slots__ = ("id", "name", "surname", "serial_number", "role")
+
+    def __init__(self, user_id, name, surname, serial_number, role):
+        self.id = user_id
+        self.name = name
+        self.surname = surname
+        self.serial_number = serial_number
+        self.role = role
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        (id, name, surname, serial_number, role) satırından; SELECT * satırında
+        (id, name, surname, serial_number, password, role) şifre alanı atılır.
+        """
+        if len(row) == 6:
+            row = row[:4] + row[5:]
+        return cls(*row)
+
+    def __repr__(self):
+        return f"User({self.id}, {self.serial_number!r}, {self.role!r})"
+
+    @property
+    def full_name(self):
+        return f"{self.name} {self.surname}"
+
+    @property
+    def is_admin(self):
+        return self.role == ROLE_ADMIN
+
+    def as_dict(self):
+        return {"id": self.id, "name": self.name, "surname": self.surname,
+                "serial_number": self.serial_number, "role": self.role}
+
+    def footprint(self):
+        """
+        Nesnenin ve metin alanlarının bayt cinsinden boyutu (paylaşılan küçük
+        tamsayılar ve rol metni dahil edilmez).
+        """
+        return sys.getsizeof(self) + sum(sys.getsizeof(value) for value in
+                                         (self.name, self.surname, self.serial_number))
+
+
+class Session:
+    """
+    Oturum açmış kullanıcı. TherapyApp.session'da tutulur; ekranların
+    kullandığı TherapyApp.user bu nesnenin user alanıdır. Oturum sürdükçe
+    kullanıcı nesnesi UserCache'ten atılsa bile canlı kalır.
+    """
+
+    __slots__ = ("user", "started_at")
+
+    def __init__(self, user):
+        self.user = user
+        self.started_at = time.time()
+
+    @property
+    def is_admin(self):
+        return self.user.is_admin
+
+
+class UserCache:
+    """
+    id -> User ve serial_number -> User kimlik önbelleği. Aynı id için her
+    zaman aynı nesne döner; satır yeniden okunduğunda (ör. rol değişince)
+    nesne yerinde güncellenir, böylece onu tutan ekranlar da yeni değeri görür.
+    Kayıtta database ilgili kaydı invalidate() ile atar, rol değişikliğinde
+    set_role() ile nesneyi yerinde günceller.
+    En fazla size kullanıcı tutulur (LRU); atılan kullanıcı yeniden okunduğunda
+    yeni bir nesne oluşur. Birden çok thread'den (veritabanı worker'ı, sunucu
+    okuyucuları) kullanılabilir.
+
+    İsabet/ıska sayıları ve eklenen kullanıcı başına bellek instrument'a
+    (user_cache.hit, user_cache.miss, user_cache.user_bytes) raporlanır.
+    """
+
+    def __init__(self, size=USER_CACHE_SIZE):
+        self.size = size
+        self._by_id = OrderedDict()  # en son kullanılan sonda
+        self._by_serial = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def put(self, user):
+        """
+        Kullanıcıyı önbelleğe ekler; aynı id zaten varsa mevcut nesneyi güncelleyip onu döndürür.
+        """
+        with self._lock:
+            cached = self._by_id.get(user.id)
+            if cached is None:
+                cached = self._by_id[user.id] = user
+                footprint = user.footprint()
+                self.bytes += footprint
+                instrument.observe("user_cache.user_bytes", footprint)
+            else:
+                self._by_serial.pop(cached.serial_number, None)
+                self.bytes -= cached.footprint()
+                for field in User.__slots__:
+                    setattr(cached, field, getattr(user, field))
+                self.bytes += cached.footprint()
+                self._by_id.move_to_end(user.id)
+            self._by_serial[cached.serial_number] = cached
+            while len(self._by_id) > self.size:
+                _, evicted = self._by_id.popitem(last=False)
+                self._by_serial.pop(evicted.serial_number, None)
+                self.bytes -= evicted.footprint()
+            return cached
+
+    def get(self, user_id):
+        with self._lock:
+            user = self._by_id.get(user_id)
+            self._count(user)
+            return user
+
+    def get_by_serial(self, serial_number):
+        with self._lock:
+            user = self._by_serial.get(serial_number)
+            self._count(user)
+            return user
+
+    def get_many(self, user_ids):
+        """
+        (bulunanlar {id: User}, eksik id'ler) döndürür.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for user_id in user_ids:
+                user = self._by_id.get(user_id)
+                if user is None:
+                    missing.append(user_id)
+                else:
+                    found[user_id] = user
+                    self._by_id.move_to_end(user_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+        instrument.count("user_cache.hit", len(found))
+        instrument.count("user_cache.miss", len(missing))
+        return found, missing
+
+    def _count(self, user):
+        hit = user is not None
+        if hit:
+            self._by_id.move_to_end(user.id)
+            self.hits += 1
+        else:
+            self.misses += 1
+        instrument.count("user_cache.hit" if hit else "user_cache.miss")
+
+    def set_role(self, serial_number, role):
+        """
+        Önbellekteki kullanıcının rolünü yerinde günceller; nesneyi tutan
+        oturum ve ekranlar yeni rolü hemen görür. Kullanıcı önbellekte yoksa bir şey yapmaz.
+        """
+        with self._lock:
+            user = self._by_serial.get(serial_number)
+            if user is not None:
+                user.role = role
+
+    def invalidate(self, user_id=None, serial_number=None):
+        with self._lock:
+            user = self._by_id.get(user_id) or self._by_serial.get(serial_number)
+            if user is not None:
+                del self._by_id[user.id]
+                self._by_serial.pop(user.serial_number, None)
+                self.bytes -= user.footprint()
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._by_serial.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"users": len(self._by_id), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "bytes": self.bytes,
+                "bytes_per_user": self.bytes / len(self._by_id) if self._by_id else None}
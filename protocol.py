@@ -0,0 +1,281 @@
+"""
+Programlanabilir terapi protokolleri. Bir protokol, tanım dosyasındaki
+(protocols.json) fazlar, aralar ve tekrarlardan oluşur:
+
+    {"protocols": [
+        {"name": "Aralıklı 2 dk", "therapy_types": ["Bacak Terapi"],
+         "steps": [
+            {"phase": "Isınma", "intensity": 30, "duration": 20},
+            {"repeat": 3, "steps": [
+                {"phase": "Yoğun", "intensity": 80, "duration": 20},
+                {"pause": 10}]},
+            {"phase": "Soğuma", "intensity": 20, "duration": 10}]}
+    ]}
+
+Tanım yüklenirken bir kez doğrulanır ve tekrarlar açılarak düz bir adım
+tablosuna (başlangıç saniyeleri, süreler, yoğunluklar) derlenir. Çalışma
+sırasında ProtocolRun bu tabloda yalnızca ileri giden bir imleç tutar; bir
+tikte yapılan iş, geçilen adım sayısı kadardır. Süreler tam saniyedir,
+böylece faz geçişleri sayacın saniye sınırlarına denk gelir.
+
+therapy_types boşsa protokol tüm terapi tiplerinde kullanılabilir. Geçmişteki
+mode sütununa protokolün adı yazılır.
+"""
+import json
+import os
+from array import array
+from datetime import datetime, timezone
+
+MAX_STEPS = 10000             # Açılmış (tekrarlar dahil) en fazla adım
+MAX_DURATION = 4 * 3600       # Bir protokolün en uzun süresi (sn)
+MAX_DEPTH = 4                 # İç içe tekrar sınırı
+PAUSE_LABEL = "Ara"
+
+DEFAULT_PROTOCOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "protocols.json")
+
+
+class ProtocolError(ValueError):
+    """
+    Geçersiz protokol tanımı; mesaj hatalı alanın yolunu içerir
+    (ör. "protocols[1].steps[2].duration").
+    """
+
+
+class Protocol:
+    """
+    Derlenmiş protokol. Adım i, starts[i]'inci saniyede başlar ve
+    durations[i] saniye sürer; intensities[i] == 0 ara demektir.
+    """
+
+    __slots__ = ("name", "therapy_types", "duration", "starts", "durations", "intensities",
+                 "labels")
+
+    def __init__(self, name, therapy_types, starts, durations, intensities, labels):
+        self.name = name
+        self.therapy_types = therapy_types
+        self.starts = starts
+        self.durations = durations
+        self.intensities = intensities
+        self.labels = labels
+        self.duration = starts[-1] + durations[-1]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        return f"Protocol({self.name!r}, {len(self)} adım, {self.duration} sn)"
+
+    def applies_to(self, therapy_type):
+        return not self.therapy_types or therapy_type in self.therapy_types
+
+    @property
+    def mode(self):
+        return self.name
+
+    def step(self, index):
+        """
+        (başlangıç, süre, yoğunluk, etiket)
+        """
+        return (self.starts[index], self.durations[index], self.intensities[index],
+                self.labels[index])
+
+
+# ---------------------------- DOĞRULAMA VE DERLEME ----------------------------
+
+def _positive_int(value, path, limit):
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= limit:
+        raise ProtocolError(f"{path}: 1..{limit} arası tam sayı olmalı, {value!r} verildi")
+    return value
+
+
+def _expand(steps, path, depth, out):
+    """
+    Adım listesini doğrular ve (süre, yoğunluk, etiket) olarak out'a açar.
+    """
+    if depth > MAX_DEPTH:
+        raise ProtocolError(f"{path}: tekrarlar en fazla {MAX_DEPTH} düzey iç içe olabilir")
+    if not isinstance(steps, list) or not steps:
+        raise ProtocolError(f"{path}: boş olmayan bir liste olmalı")
+    for i, step in enumerate(steps):
+        where = f"{path}[{i}]"
+        if not isinstance(step, dict):
+            raise ProtocolError(f"{where}: nesne olmalı")
+        keys = set(step)
+        if keys == {"phase", "intensity", "duration"}:
+            label = step["phase"]
+            if not isinstance(label, str) or not label.strip():
+                raise ProtocolError(f"{where}.phase: boş olmayan bir metin olmalı")
+            intensity = _positive_int(step["intensity"], f"{where}.intensity", 100)
+            out.append((_positive_int(step["duration"], f"{where}.duration", MAX_DURATION),
+                        intensity, label.strip()))
+        elif keys == {"pause"}:
+            out.append((_positive_int(step["pause"], f"{where}.pause", MAX_DURATION),
+                        0, PAUSE_LABEL))
+        elif keys == {"repeat", "steps"}:
+            times = _positive_int(step["repeat"], f"{where}.repeat", MAX_STEPS)
+            body = []
+            _expand(step["steps"], f"{where}.steps", depth + 1, body)
+            if len(out) + len(body) * times > MAX_STEPS:
+                raise ProtocolError(f"{where}: en fazla {MAX_STEPS} adıma açılabilir")
+            out.extend(body * times)
+        else:
+            raise ProtocolError(f"{where}: beklenmeyen alanlar {sorted(keys)}; "
+                                "faz (phase, intensity, duration), ara (pause) "
+                                "veya tekrar (repeat, steps) olmalı")
+        if len(out) > MAX_STEPS:
+            raise ProtocolError(f"{where}: en fazla {MAX_STEPS} adıma açılabilir")
+
+
+def compile_protocol(definition, path="protocol"):
+    """
+    Tek bir protokol tanımını doğrular ve Protocol'e derler.
+    """
+    if not isinstance(definition, dict):
+        raise ProtocolError(f"{path}: nesne olmalı")
+    unknown = set(definition) - {"name", "therapy_types", "steps"}
+    if unknown:
+        raise ProtocolError(f"{path}: beklenmeyen alanlar {sorted(unknown)}")
+    name = definition.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ProtocolError(f"{path}.name: boş olmayan bir metin olmalı")
+    therapy_types = definition.get("therapy_types", [])
+    if not isinstance(therapy_types, list) or not all(isinstance(t, str) for t in therapy_types):
+        raise ProtocolError(f"{path}.therapy_types: metin listesi olmalı")
+
+    steps = []
+    _expand(definition.get("steps"), f"{path}.steps", 0, steps)
+    starts = array("l")
+    offset = 0
+    for duration, _, _ in steps:
+        starts.append(offset)
+        offset += duration
+    if offset > MAX_DURATION:
+        raise ProtocolError(f"{path}: toplam süre {offset} sn, en fazla {MAX_DURATION} sn olabilir")
+    return Protocol(name.strip(), tuple(therapy_types), starts,
+                    array("l", (step[0] for step in steps)),
+                    bytes(step[1] for step in steps),
+                    tuple(step[2] for step in steps))
+
+
+def compile_protocols(document):
+    """
+    Tanım belgesindeki tüm protokolleri derler; adlarına göre sıralı sözlük döndürür.
+    """
+    if not isinstance(document, dict) or not isinstance(document.get("protocols"), list):
+        raise ProtocolError("protocols: liste içeren bir nesne bekleniyor")
+    protocols = {}
+    for i, definition in enumerate(document["protocols"]):
+        protocol = compile_protocol(definition, f"protocols[{i}]")
+        if protocol.name in protocols:
+            raise ProtocolError(f"protocols[{i}].name: {protocol.name!r} birden fazla tanımlı")
+        protocols[protocol.name] = protocol
+    if not protocols:
+        raise ProtocolError("protocols: en az bir protokol tanımlanmalı")
+    return protocols
+
+
+def load_protocols(path=DEFAULT_PROTOCOLS_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+    except json.JSONDecodeError as error:
+        raise ProtocolError(f"{path}: geçersiz JSON ({error})") from None
+    return compile_protocols(document)
+
+
+def single_phase(name, duration, intensity=100, label="Terapi"):
+    """
+    Sabit yoğunlukta tek fazlı protokol (tanım dosyası yoksa kullanılan varsayılanlar).
+    """
+    return compile_protocol({"name": name, "steps": [
+        {"phase": label, "intensity": intensity, "duration": duration}]})
+
+
+def default_protocols():
+    """
+    Tanım dosyası okunamazsa kullanılan, eski sabit süre seçeneklerine karşılık gelen protokoller.
+    """
+    protocols = [single_phase("Sabit 10 sn", 10), single_phase("Sabit 1 dk", 60),
+                 single_phase("Sabit 3 dk", 180)]
+    return {protocol.name: protocol for protocol in protocols}
+
+
+# ---------------------------- ÇALIŞTIRMA ----------------------------
+
+class ProtocolRun:
+    """
+    Bir seansta protokolün hangi adımda olduğunu izler. advance(elapsed)
+    sayacın her tikinde çağrılır ve o tikte girilen adımların indekslerini
+    döndürür (çoğu tikte boş; tikler gecikirse birden fazla olabilir).
+    """
+
+    __slots__ = ("protocol", "index")
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.index = -1
+
+    def advance(self, elapsed):
+        starts = self.protocol.starts
+        last = len(starts) - 1
+        index = start = self.index
+        # Tik sınırı kayan nokta hatasıyla sınırın hemen altına düşebilir
+        elapsed += 1e-6
+        while index < last and starts[index + 1] <= elapsed:
+            index += 1
+        self.index = index
+        return range(start + 1, index + 1)
+
+    @property
+    def current(self):
+        return self.protocol.step(self.index) if self.index >= 0 else None
+
+
+def phase_event(session, index):
+    """
+    Faz geçişinin yapılandırılmış kaydı (ProtocolEventLog satırı).
+    """
+    protocol = session.protocol
+    start, duration, intensity, label = protocol.step(index)
+    return {
+        "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "event": "phase",
+        "session": session.id,
+        "user_id": session.user_id,
+        "therapy_type": session.therapy_type,
+        "protocol": protocol.name,
+        "step": index,
+        "steps": len(protocol),
+        "phase": label,
+        "intensity": intensity,
+        "offset": start,
+        "duration": duration,
+    }
+
+
+def events_path_for(db_path):
+    """
+    Veritabanı dosyasına ait faz olayı günlüğünün yolu (ör. therapy_history.events.log).
+    """
+    return os.path.splitext(db_path)[0] + ".events.log"
+
+
+class ProtocolEventLog:
+    """
+    Faz geçişlerini JSON satırları olarak sona ekler. Dosya ilk olayda açılır.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def append(self, event):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,422 @@
+"""
+Geçmiş saklama (retention) ve arşivleme. history tablosunda belirli bir
+yaştan (varsayılan RETENTION_DAYS gün) eski kayıtlar veritabanının yanındaki
+arşiv dizinine, aylara bölünmüş sıkıştırılmış sütunsal dosyalar olarak
+taşınır (biçim: export.py). Böylece sıcak tablo ve yedekler küçük kalır.
+
+    therapy_history.archive/2024-03/2024-03-1201-1700-9f2c41d0.trc
+
+Taşıma küçük partiler halindedir. Veritabanı adımları (aday satırları okuma,
+silme + dosyayı archive_parts'a kaydetme) kısa işlemlerdir ve submit
+verilirse veritabanı worker'ında çalışır. Dosya okuma/yazma çağıran thread'de
+kalır. RetentionWorker partileri yalnızca süren seans yokken ve aralıklarla
+çalıştırır. Dosya önce tamamen yazılıp diske alınır, satırlar ondan sonra
+silinir. Arada çökülürse kayıtsız kalan dosya recover() ile silinir; satırlar
+sıcak tabloda durduğu için sonraki turda yeniden arşivlenir.
+
+Arşivleme isteğe bağlıdır: uygulamada TERAPI_RETENTION_DAYS verilmedikçe
+çalışmaz. Arşive taşınan kayıtları yalnızca
+database.fetch_therapy_history(include_archived=True) geri okur; geçmiş
+ekranı, dışa aktarma ve sunucunun /history'si sıcak tabloyla sınırlıdır.
+
+Arşivlenen satırlar kullanım istatistiklerinden düşülmez; özet tablolar tüm
+zamanları göstermeye devam eder (bkz. database._migration_8_archive).
+Eşitleme yapılandırılmışsa merkeze henüz gönderilmemiş kayıtlar (ilk
+gönderimden önce hiçbiri) arşivlenmez.
+
+Aynı ayın parçaları, ay saklama süresini geçtikten sonra tek dosyada
+birleştirilir (compact_step). Veritabanı auto_vacuum=INCREMENTAL ise boşalan
+sayfalar da boşta kalma anlarında azar azar diske iade edilir (vacuum_step).
+Mevcut bir dosyayı bu kipe geçirmek için bir kez tam VACUUM gerekir:
+
+    python cli.py archive --days 365     (bekleyen tüm eski kayıtları şimdi arşivle)
+    python cli.py compact                (parçaları birleştir, artımlı vacuum'a geçir)
+"""
+import os
+import secrets
+import threading
+
+import database
+import export
+
+RETENTION_DAYS = 365          # Sıcak tabloda tutulacak en fazla kayıt yaşı (gün)
+ARCHIVE_BATCH_SIZE = 500      # Bir partide taşınan en fazla kayıt
+VACUUM_PAGES = 256            # vacuum_step başına diske iade edilen en fazla sayfa
+BATCH_INTERVAL = 1.0          # Art arda partiler arasında bekleme (sn); arada diğer işler çalışır
+IDLE_INTERVAL = 600.0         # Yapılacak iş kalmadığında kontrol aralığı (sn)
+UNKNOWN_MONTH = "0000-00"     # Zaman damgası tarih olarak okunamayan kayıtlar
+PART_SUFFIX = export.EXTENSIONS["columnar"]
+
+COLUMNS = database.HISTORY_EXPORT_COLUMNS
+ID, TIMESTAMP = COLUMNS.index("id"), COLUMNS.index("timestamp")
+
+# Arşiv dosyası satırı export biçimindedir: o anki kullanıcı bilgisi de saklanır
+SQL_ARCHIVE_CANDIDATES = """SELECT history.id,
+                                   history.entry_uid,
+                                   history.therapy_type,
+                                   history.mode,
+                                   history.duration,
+                                   history.duration_ms,
+                                   history.status,
+                                   history.timestamp,
+                                   history.user_id,
+                                   users.serial_number,
+                                   users.name,
+                                   users.surname
+                            FROM history
+                            LEFT JOIN users ON history.user_id = users.id
+                            WHERE history.timestamp < datetime('now', ?) AND history.id <= ?
+                            ORDER BY history.timestamp, history.id
+                            LIMIT ?"""
+SQL_SYNC_KEYS = "SELECT key, value FROM sync_state WHERE key IN ('push.history', 'device_id')"
+SQL_SET_ARCHIVING = "UPDATE archive_state SET archiving = ?"
+SQL_DELETE_HISTORY = "DELETE FROM history WHERE id = ?"
+SQL_INSERT_PART = """INSERT INTO archive_parts (path, month, rows, min_id, max_id,
+                                                first_timestamp, last_timestamp)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)"""
+SQL_DELETE_PART = "DELETE FROM archive_parts WHERE path = ?"
+SQL_PARTS = "SELECT path FROM archive_parts ORDER BY last_timestamp DESC"
+SQL_MONTH_PARTS = "SELECT path FROM archive_parts WHERE month = ? ORDER BY min_id"
+# Saklama süresini tamamen geçmiş ve birden çok parçası olan en eski ay
+SQL_COMPACT_CANDIDATE = """SELECT month FROM archive_parts
+                           WHERE month < strftime('%Y-%m', 'now', ?)
+                           GROUP BY month
+                           HAVING COUNT(*) > 1
+                           ORDER BY month
+                           LIMIT 1"""
+SQL_ARCHIVE_SUMMARY = "SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM archive_parts"
+
+NO_SYNC_MARK = 2 ** 63 - 1  # Eşitleme hiç yapılandırılmamışsa: tüm kayıtlar arşivlenebilir
+
+
+def archive_path_for(db_path):
+    """
+    Veritabanı dosyasının arşiv dizini (ör. therapy_history.db -> therapy_history.archive).
+    """
+    return os.path.splitext(db_path)[0] + ".archive"
+
+
+def _month(timestamp):
+    if timestamp and len(timestamp) >= 7 and timestamp[4] == "-":
+        return timestamp[:7]
+    return UNKNOWN_MONTH
+
+
+def _age(days):
+    return f"-{int(days)} days"
+
+
+# ---------------------------- VERİTABANI ADIMLARI ----------------------------
+# Bu fonksiyonlar veritabanı worker'ında çalışır; dosya G/Ç'si bunların dışındadır.
+
+def _sync_mark(conn):
+    """
+    Arşivlenebilecek en büyük id: merkeze gönderilmiş son kayıt. Eşitleme
+    yapılandırılmış (cihaz kimliği var veya TERAPI_SYNC_DIR verilmiş) ama ilk
+    gönderim henüz olmamışsa 0'dır, yani hiçbir kayıt arşivlenmez.
+    """
+    keys = dict(conn.execute(SQL_SYNC_KEYS).fetchall())
+    if "push.history" in keys:
+        return int(keys["push.history"])
+    if "device_id" in keys or os.environ.get("TERAPI_SYNC_DIR"):
+        return 0
+    return NO_SYNC_MARK
+
+
+def select_candidates(days, limit):
+    """
+    Arşivlenecek en eski en fazla limit kaydı export satır biçiminde döndürür.
+    """
+    conn = database.get_pool().connection()
+    return conn.execute(SQL_ARCHIVE_CANDIDATES, (_age(days), _sync_mark(conn), limit)).fetchall()
+
+
+def commit_archived(ids, parts):
+    """
+    Arşive yazılmış satırları siler ve dosyaları aynı işlemde kaydeder.
+    Silme sırasında özet tablolar değişmez.
+    """
+    with database.get_pool().transaction() as conn:
+        conn.execute(SQL_SET_ARCHIVING, (1,))
+        conn.executemany(SQL_DELETE_HISTORY, [(row_id,) for row_id in ids])
+        conn.execute(SQL_SET_ARCHIVING, (0,))
+        conn.executemany(SQL_INSERT_PART, parts)
+
+
+def compaction_candidate(days):
+    """
+    Birleştirilecek ay ve parçalarının yolları, yoksa None.
+    """
+    conn = database.get_pool().connection()
+    row = conn.execute(SQL_COMPACT_CANDIDATE, (_age(days),)).fetchone()
+    if row is None:
+        return None
+    return row[0], [path for path, in conn.execute(SQL_MONTH_PARTS, (row[0],))]
+
+
+def replace_parts(old_paths, part):
+    with database.get_pool().transaction() as conn:
+        conn.executemany(SQL_DELETE_PART, [(path,) for path in old_paths])
+        conn.execute(SQL_INSERT_PART, part)
+
+
+def list_parts():
+    return [path for path, in database.get_pool().connection().execute(SQL_PARTS)]
+
+
+def archive_summary():
+    """
+    (arşiv dosyası sayısı, arşivdeki kayıt sayısı)
+    """
+    return tuple(database.get_pool().connection().execute(SQL_ARCHIVE_SUMMARY).fetchone())
+
+
+def vacuum_step(pages=VACUUM_PAGES):
+    """
+    auto_vacuum=INCREMENTAL ise en fazla pages boş sayfayı diske iade eder;
+    iade edilen sayfa sayısını döndürür. Diğer kiplerde bir şey yapmaz.
+    """
+    conn = database.get_pool().connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if free:
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return min(free, pages)
+
+
+def enable_incremental_vacuum():
+    """
+    Veritabanını auto_vacuum=INCREMENTAL kipine geçirir. Kip ancak tam bir
+    VACUUM ile değiştiği için dosya boyutuyla orantılı sürer; yalnızca bakım
+    sırasında (cli.py compact) çağrılmalıdır.
+    """
+    conn = database.get_pool().connection()
+    conn.commit()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+# ---------------------------- ARŞİV DOSYALARI ----------------------------
+
+def write_part(directory, month, rows):
+    """
+    rows'u (export satır biçimi) ayın dizinine yeni bir dosya olarak yazar ve
+    archive_parts satırını döndürür. Dosya '.part' adıyla yazılıp diske
+    alındıktan sonra yerine taşınır.
+    """
+    rows = sorted(rows, key=lambda row: row[ID])
+    timestamps = sorted(row[TIMESTAMP] for row in rows if row[TIMESTAMP] is not None)
+    min_id, max_id = rows[0][ID], rows[-1][ID]
+    name = f"{month}/{month}-{min_id}-{max_id}-{secrets.token_hex(4)}{PART_SUFFIX}"
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".part", "wb") as f:
+        writer = export.ColumnarWriter(f, COLUMNS)
+        writer.write_rows(rows)
+        writer.close()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".part", path)
+    return (name, month, len(rows), min_id, max_id,
+            timestamps[0] if timestamps else None, timestamps[-1] if timestamps else None)
+
+
+def read_part(directory, name):
+    """
+    Arşiv dosyasındaki satırları export satır biçiminde (tuple) üretir.
+    """
+    for record in export.read_columnar(os.path.join(directory, name)):
+        yield tuple(record[column] for column in COLUMNS)
+
+
+def _remove(directory, names):
+    for name in names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def iter_archived(directory=None):
+    """
+    Kayıtlı tüm arşiv dosyalarındaki satırlar (export satır biçiminde), yeni dosyalar önce.
+    """
+    directory = directory or archive_path_for(database.DB_PATH)
+    for name in list_parts():
+        yield from read_part(directory, name)
+
+
+def fetch_archived_history(include_user_info=False, directory=None):
+    """
+    Arşivdeki kayıtlar fetch_therapy_history ile aynı satır yapısında, yeniden
+    eskiye sıralı. include_user_info=True ise ad-soyad arşivlendiği andaki
+    değerdir ve JOIN'de olduğu gibi kullanıcısı olmayan kayıtlar atlanır.
+    """
+    conn = database.get_pool().connection()
+    rows = []
+    if include_user_info:
+        picks = [COLUMNS.index(column) for column in
+                 ("id", "therapy_type", "mode", "duration", "status", "timestamp", "name", "surname")]
+        for row in iter_archived(directory):
+            if row[COLUMNS.index("name")] is not None:
+                rows.append(tuple(row[index] for index in picks))
+    else:
+        # SELECT * sütun sırası (göçlerle eklenen sütunlar sondadır)
+        history_columns = [column[1] for column in conn.execute("PRAGMA table_info(history)")]
+        picks = [COLUMNS.index(column) for column in history_columns]
+        rows = [tuple(row[index] for index in picks) for row in iter_archived(directory)]
+    rows.sort(key=lambda row: (row[5] or "", row[0]), reverse=True)
+    return rows
+
+
+# ---------------------------- SAKLAMA MOTORU ----------------------------
+
+class RetentionEngine:
+    """
+    Arşivleme, birleştirme ve vacuum adımları. submit verilirse (ör.
+    DatabaseExecutor.submit) veritabanı adımları o worker'da çalışır;
+    her adım kısa bir işlemdir, arada seans kayıtları da yazılır.
+    """
+
+    def __init__(self, directory=None, days=RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                 submit=None):
+        self.directory = directory or archive_path_for(database.DB_PATH)
+        self.days = days
+        self.batch_size = batch_size
+        self.submit = submit
+
+    def _db(self, fn, *args):
+        if self.submit is None:
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    def recover(self):
+        """
+        archive_parts'ta kaydı olmayan (yarıda kalmış veya birleştirilmiş) dosyaları siler.
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        known = set(self._db(list_parts))
+        orphans = []
+        for folder in os.listdir(self.directory):
+            path = os.path.join(self.directory, folder)
+            if os.path.isdir(path):
+                orphans.extend(f"{folder}/{name}" for name in os.listdir(path)
+                               if f"{folder}/{name}" not in known)
+        _remove(self.directory, orphans)
+        return len(orphans)
+
+    def archive_step(self):
+        """
+        Bir partiyi arşive taşır; taşınan kayıt sayısını döndürür.
+        """
+        rows = self._db(select_candidates, self.days, self.batch_size)
+        if not rows:
+            return 0
+        months = {}
+        for row in rows:
+            months.setdefault(_month(row[TIMESTAMP]), []).append(row)
+        parts = []
+        try:
+            for month, month_rows in months.items():
+                parts.append(write_part(self.directory, month, month_rows))
+            self._db(commit_archived, [row[ID] for row in rows], parts)
+        except BaseException:
+            _remove(self.directory, [part[0] for part in parts])
+            raise
+        return len(rows)
+
+    def compact_step(self):
+        """
+        Bir ayın parçalarını tek dosyada birleştirir; birleştirilen parça sayısını döndürür.
+        """
+        candidate = self._db(compaction_candidate, self.days)
+        if candidate is None:
+            return 0
+        month, names = candidate
+        rows = [row for name in names for row in read_part(self.directory, name)]
+        part = write_part(self.directory, month, rows)
+        try:
+            self._db(replace_parts, names, part)
+        except BaseException:
+            _remove(self.directory, [part[0]])
+            raise
+        _remove(self.directory, names)
+        return len(names)
+
+    def vacuum_step(self, pages=VACUUM_PAGES):
+        return self._db(vacuum_step, pages)
+
+    def step(self):
+        """
+        Sıradaki işin bir adımını yapar: önce arşivleme, sonra birleştirme,
+        sonra vacuum. Yapılacak iş kalmadıysa False döndürür.
+        """
+        return bool(self.archive_step() or self.compact_step() or self.vacuum_step())
+
+    def run(self):
+        """
+        Bekleyen tüm işi bitirir (CLI için): (arşivlenen kayıt, birleştirilen parça).
+        """
+        self.recover()
+        archived = compacted = 0
+        while True:
+            moved = self.archive_step()
+            if not moved:
+                break
+            archived += moved
+        while True:
+            merged = self.compact_step()
+            if not merged:
+                break
+            compacted += merged
+        while self.vacuum_step():
+            pass
+        return archived, compacted
+
+
+class RetentionWorker:
+    """
+    RetentionEngine'i arka plan thread'inde çalıştırır. is_idle() False
+    döndürdüğü sürece (ör. süren seans varken) adım atılmaz. İş varken
+    partiler arasında BATCH_INTERVAL, iş kalmadığında IDLE_INTERVAL beklenir.
+    Bir adım hata verirse hata last_error'da tutulur ve sonraki tur beklenir.
+    """
+
+    def __init__(self, engine, is_idle=None, batch_interval=BATCH_INTERVAL,
+                 idle_interval=IDLE_INTERVAL):
+        self.engine = engine
+        self.is_idle = is_idle or (lambda: True)
+        self.batch_interval = batch_interval
+        self.idle_interval = idle_interval
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="retention-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            self.engine.recover()
+        except Exception as error:
+            self.last_error = error
+        while not self._stop.is_set():
+            busy = False
+            if self.is_idle():
+                try:
+                    busy = self.engine.step()
+                    self.last_error = None
+                except Exception as error:
+                    self.last_error = error
+            self._stop.wait(self.batch_interval if busy or not self.is_idle()
+                            else self.idle_interval)
@@ -0,0 +1,169 @@
+"""
+Aynı anda birden çok kanalda (terapi tipi / kullanıcı) çalışan seansların
+merkezi zamanlayıcısı. Her seans bir CountdownTimer'dır; hepsi tek bir
+DeadlineScheduler üzerinden, dolayısıyla tek bir dış zamanlayıcıyla (Tk
+after) sürülür. Seans başına thread veya ayrı after döngüsü yoktur.
+"""
+import itertools
+import time
+
+from database import STATUS_COMPLETED, STATUS_STOPPED
+from protocol import ProtocolRun
+from timer import CountdownTimer, DeadlineScheduler
+
+STATE_RUNNING = "Çalışıyor"
+STATE_PAUSED = "Duraklatıldı"
+MANUAL_MODE = "Manual"  # Protokolsüz (yalnızca süre verilmiş) seansların mode değeri
+
+
+class TherapySession:
+    """
+    Zamanlayıcıdaki tek bir seans. user_label yalnızca listelerde gösterim içindir;
+    protokollü seanslarda run, protokolün o anki adımını izler.
+    """
+
+    __slots__ = ("id", "therapy_type", "duration", "user_id", "user_label", "timer", "status",
+                 "protocol", "run")
+
+    def __init__(self, session_id, therapy_type, duration, user_id, user_label, protocol=None):
+        self.id = session_id
+        self.therapy_type = therapy_type
+        self.duration = duration
+        self.user_id = user_id
+        self.user_label = user_label
+        self.timer = None
+        self.status = None  # Bitince STATUS_COMPLETED / STATUS_STOPPED
+        self.protocol = protocol
+        self.run = ProtocolRun(protocol) if protocol is not None else None
+
+    @property
+    def mode(self):
+        return self.protocol.mode if self.protocol is not None else MANUAL_MODE
+
+    @property
+    def phase(self):
+        """
+        Protokolün o anki adımı (başlangıç, süre, yoğunluk, etiket); protokolsüzse None.
+        """
+        return self.run.current if self.run is not None else None
+
+    @property
+    def state(self):
+        return STATE_PAUSED if self.timer.paused else STATE_RUNNING
+
+    def remaining(self):
+        return self.timer.remaining()
+
+    def elapsed(self):
+        return self.timer.elapsed()
+
+
+class SessionScheduler:
+    """
+    Seansları başlatır, duraklatır, sürdürür ve durdurur.
+
+    on_end(session, elapsed, status) seans tamamlandığında (STATUS_COMPLETED)
+    veya durdurulduğunda (STATUS_STOPPED) bir kez çağrılır; kayıt burada yapılır.
+    Dinleyiciler listener(event, session) ile "start", "tick", "phase",
+    "pause", "resume" ve "end" olaylarını alır (ör. ekrandaki sayaç ve aktif
+    seans listesi). "phase", protokollü seans yeni bir adıma girdiğinde her adım
+    için bir kez gelir; girilen adım session.run.index'tir.
+    """
+
+    def __init__(self, schedule, cancel, on_end, clock=time.monotonic, tick=1.0):
+        self.deadlines = DeadlineScheduler(schedule, cancel, clock)
+        self.on_end = on_end
+        self.clock = clock
+        self.tick = tick
+        self.sessions = {}
+        self.listeners = []
+        self._ids = itertools.count(1)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _notify(self, event, session):
+        for listener in list(self.listeners):
+            listener(event, session)
+
+    def start(self, therapy_type, duration, user_id, user_label="", protocol=None):
+        """
+        Yeni seans başlatır. protocol verilirse süre protokolün toplam süresidir.
+        """
+        if protocol is not None:
+            duration = protocol.duration
+        session = TherapySession(next(self._ids), therapy_type, duration, user_id, user_label,
+                                 protocol)
+        session.timer = CountdownTimer(duration,
+                                       on_tick=lambda remaining: self._on_tick(session, remaining),
+                                       on_finish=lambda elapsed: self._end(session, elapsed,
+                                                                           STATUS_COMPLETED),
+                                       schedule=self.deadlines.after,
+                                       cancel=self.deadlines.after_cancel,
+                                       clock=self.clock,
+                                       tick=self.tick)
+        self.sessions[session.id] = session
+        self._notify("start", session)
+        session.timer.start()
+        return session
+
+    def _on_tick(self, session, remaining):
+        run = session.run
+        if run is not None:
+            # Geciken bir tikte birden çok adım geçildiyse her biri sırayla bildirilir
+            for index in run.advance(session.duration - remaining):
+                run.index = index
+                self._notify("phase", session)
+        self._notify("tick", session)
+
+    def pause(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None and not session.timer.paused:
+            session.timer.pause()
+            self._notify("pause", session)
+
+    def resume(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None and session.timer.paused:
+            session.timer.resume()
+            self._notify("resume", session)
+
+    def stop(self, session_id):
+        """
+        Seansı elle durdurur; geçen süreyi döndürür (seans yoksa None).
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        elapsed = session.timer.stop()
+        self._end(session, elapsed, STATUS_STOPPED)
+        return elapsed
+
+    def stop_all(self, user_id=None):
+        for session in list(self.sessions.values()):
+            if user_id is None or session.user_id == user_id:
+                self.stop(session.id)
+
+    def find(self, user_id, therapy_type):
+        """
+        Kullanıcının bu terapi tipindeki aktif seansı (yoksa None).
+        """
+        for session in self.sessions.values():
+            if session.user_id == user_id and session.therapy_type == therapy_type:
+                return session
+        return None
+
+    def active(self, user_id=None):
+        return [session for session in self.sessions.values()
+                if user_id is None or session.user_id == user_id]
+
+    def _end(self, session, elapsed, status):
+        if self.sessions.pop(session.id, None) is None:
+            return
+        session.status = status
+        self.on_end(session, elapsed, status)
+        self._notify("end", session)
@@ -0,0 +1,419 @@
+"""
+Birden çok cihazın tek bir merkezi veritabanını kullanabilmesi için asyncio
+tabanlı küçük bir HTTP/JSON sunucusu (yalnızca standart kütüphane).
+
+    python cli.py --db merkez.db serve --host 0.0.0.0 --port 8765
+
+Uç noktalar (Authorization: Bearer <token> girişten sonra zorunludur):
+    POST /login            {"serial_number", "password"} -> {"token", "user"}
+    POST /sessions/start   {"therapy_type", "duration"} -> {"session_id"}
+    POST /sessions/stop    {"session_id", "elapsed"?, "status"?} -> {"entry_uid", ...}
+    POST /history          {"entries": [[ENTRY_FIELDS sırasıyla], ...]} -> {"accepted"}
+    GET  /history          ?before=<ts>,<id>&limit=&therapy_type=&status=&from=&to=&user_id=
+    GET  /stats            ?user_id=
+    GET  /health
+
+Token'lar TOKEN_TTL boyunca kullanılmazsa geçersizleşir. /stop'u hiç gelmeyen
+seanslar (ör. bağlantısı kopan cihaz) planlanan süre + SESSION_GRACE sonunda
+etkin seanslardan düşülür.
+
+Tek thread'li olay döngüsü yüzlerce kalıcı (keep-alive) bağlantıyı taşır.
+Seans kayıtları BatchWriter'da toplanıp tek yazıcı worker'da toplu olarak
+(group commit) yazılır; yanıt, kayıt veritabanına işlendikten sonra döner.
+Okumalar ve KDF'li girişler ayrı thread havuzlarında çalışır (WAL sayesinde
+okuyucular yazıcıyı beklemez; toplu girişler okuma kuyruğunu tıkamaz).
+"""
+import asyncio
+import json
+import math
+import os
+import secrets
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+import database
+from session_log import ENTRY_FIELDS, make_entry
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HISTORY_LIMIT = 500
+COMPLETION_TOLERANCE = 1.0  # Planlanan süreye bu kadar saniye kala durdurulan seans tamamlanmış sayılır
+TOKEN_TTL = 12 * 3600.0     # Bu kadar saniye kullanılmayan token geçersizleşir
+SESSION_GRACE = 3600.0      # Planlanan süreden bu kadar sonra durdurulmayan seans terk edilmiş sayılır
+SWEEP_INTERVAL = 60.0       # Süresi dolan token ve seansların temizlenme aralığı (sn)
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+Request = namedtuple("Request", ["method", "path", "query", "headers", "body"])
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------- TOPLU YAZICI ----------------------------
+
+class BatchWriter:
+    """
+    Farklı bağlantılardan gelen kayıtları max_delay saniye (veya max_batch
+    kayıt) boyunca biriktirir ve write_batch ile tek işlemde yazar. write()
+    kayıt yazılınca tamamlanır; yazım hatası tüm bekleyenlere iletilir.
+    """
+
+    def __init__(self, write_batch, submit, max_batch=500, max_delay=0.005):
+        self.write_batch = write_batch
+        self.submit = submit
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def write(self, entries):
+        done = asyncio.get_running_loop().create_future()
+        await self.queue.put((entries, done))
+        return await done
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self.queue.get()
+            if item is None:
+                return
+            pending = [item]
+            count = len(item[0])
+            deadline = loop.time() + self.max_delay
+            while count < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                pending.append(item)
+                count += len(item[0])
+
+            batch = [entry for entries, _ in pending for entry in entries]
+            try:
+                await asyncio.wrap_future(self.submit(self.write_batch, batch))
+            except Exception as error:
+                for _, done in pending:
+                    if not done.done():
+                        done.set_exception(error)
+            else:
+                self.batches += 1
+                for _, done in pending:
+                    if not done.done():
+                        done.set_result(len(batch))
+
+    async def close(self):
+        """
+        Kuyruktaki kayıtlar yazılana kadar bekler ve görevi sonlandırır.
+        """
+        if self._task is not None:
+            await self.queue.put(None)
+            await self._task
+
+
+# ---------------------------- SUNUCU ----------------------------
+
+class TherapyServer:
+    """
+    HTTP ayrıştırma, oturum (token) yönetimi ve uç noktalar.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, reader_threads=4, auth_threads=None):
+        self.host = host
+        self.port = port
+        self.db = database.get_executor()
+        self.readers = ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix="db-reader")
+        # hashlib KDF'leri GIL'i bıraktığı için girişler çekirdek sayısı kadar paralel çalışır
+        self.auth = ThreadPoolExecutor(max_workers=auth_threads or os.cpu_count(),
+                                       thread_name_prefix="auth")
+        self.writer = None
+        self.server = None
+        self.tokens = {}    # token -> [(user_id, role), son kullanım]
+        self.active = {}    # session_id -> (user_id, therapy_type, planlanan süre, başlangıç)
+        self.abandoned = 0  # /stop gelmeden süresi dolan seanslar
+        self._sweeper = None
+        self.connections = set()
+        self.routes = {
+            ("POST", "/login"): self.login,
+            ("POST", "/sessions/start"): self.start_session,
+            ("POST", "/sessions/stop"): self.stop_session,
+            ("POST", "/history"): self.push_history,
+            ("GET", "/history"): self.get_history,
+            ("GET", "/stats"): self.get_stats,
+            ("GET", "/health"): self.health,
+        }
+
+    async def start(self):
+        await asyncio.wrap_future(self.db.submit(database.initialize_database))
+        self.writer = BatchWriter(database.log_therapy_batch, self.db.submit)
+        self.writer.start()
+        self._sweeper = asyncio.create_task(self._sweep_forever())
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                 backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self._sweeper.cancel()
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        await self.writer.close()
+        self.readers.shutdown(wait=True)
+        self.auth.shutdown(wait=True)
+
+    def sweep(self, now=None):
+        """
+        Süresi dolan token'ları ve bağlantısı kopan cihazların terk ettiği
+        seansları siler. Terk edilen seansların sonucu bilinmediği için kayıt yazılmaz.
+        """
+        now = time.monotonic() if now is None else now
+        expired = [token for token, (_, used) in self.tokens.items() if now - used > TOKEN_TTL]
+        for token in expired:
+            del self.tokens[token]
+        abandoned = [session_id for session_id, (_, _, planned, started) in self.active.items()
+                     if now - started > planned + SESSION_GRACE]
+        for session_id in abandoned:
+            del self.active[session_id]
+        self.abandoned += len(abandoned)
+        return len(expired), len(abandoned)
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.sweep()
+
+    def _read(self, fn, *args, **kwargs):
+        return asyncio.wrap_future(self.readers.submit(fn, *args, **kwargs))
+
+    # ---- HTTP ----
+
+    async def handle_connection(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as error:
+                    # Ayrıştırılamayan istekten sonra bağlantı senkronu kaybolur; kapatılır
+                    await self._respond(writer, error.status, {"error": str(error)}, False)
+                    break
+                if request is None:
+                    break
+                status, payload = await self._dispatch(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                     f"\r\n".encode() + body)
+        await writer.drain()
+
+    async def _read_request(self, reader):
+        try:
+            # Akış sınırını aşan satırda readline ValueError fırlatır
+            line = await reader.readline()
+            if not line.strip():
+                return None
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "geçersiz HTTP isteği")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "istek gövdesi çok büyük")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return Request(method, url.path, dict(parse_qsl(url.query)), headers, body)
+
+    async def _dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            known = any(path == request.path for _, path in self.routes)
+            return (405, {"error": "method not allowed"}) if known else (404, {"error": "not found"})
+        try:
+            data = json.loads(request.body) if request.body else {}
+            return 200, await handler(request, data)
+        except HttpError as error:
+            return error.status, {"error": str(error)}
+        except (ValueError, KeyError, TypeError) as error:
+            return 400, {"error": f"geçersiz istek: {error}"}
+        except Exception as error:
+            return 500, {"error": str(error)}
+
+    def _auth(self, request):
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        entry = self.tokens.get(token) if scheme.lower() == "bearer" else None
+        now = time.monotonic()
+        if entry is None or now - entry[1] > TOKEN_TTL:
+            raise HttpError(401, "giriş gerekli")
+        entry[1] = now
+        return entry[0]
+
+    def _target_user(self, request, user):
+        """
+        Sorgulanacak kullanıcı; None herkes demektir (geçmişte filtre yok,
+        istatistikte ALL_USERS). Yöneticiler user_id ile başka kullanıcıları
+        (0: herkes) sorgulayabilir.
+        """
+        user_id, role = user
+        requested = request.query.get("user_id")
+        if requested is None:
+            return None if role == "admin" else user_id
+        try:
+            requested = int(requested)
+        except ValueError:
+            raise HttpError(400, f"geçersiz user_id: {requested}")
+        if role != "admin" and requested != user_id:
+            raise HttpError(403, "yetkisiz kullanıcı")
+        return None if requested == database.ALL_USERS else requested
+
+    # ---- Uç noktalar ----
+
+    async def health(self, request, data):
+        return {"ok": True, "active_sessions": len(self.active), "abandoned_sessions": self.abandoned,
+                "batches": self.writer.batches}
+
+    async def login(self, request, data):
+        user = await asyncio.wrap_future(self.auth.submit(database.validate_serial_number,
+                                                          data["serial_number"], data["password"]))
+        if user is None:
+            raise HttpError(401, "seri numarası veya şifre hatalı")
+        token = secrets.token_hex(16)
+        self.tokens[token] = [(user.id, user.role), time.monotonic()]
+        return {"token": token, "user": user.as_dict()}
+
+    async def start_session(self, request, data):
+        user_id, _ = self._auth(request)
+        session_id = uuid.uuid4().hex
+        self.active[session_id] = (user_id, data["therapy_type"], float(data.get("duration", 0)),
+                                   time.monotonic())
+        return {"session_id": session_id}
+
+    async def stop_session(self, request, data):
+        user_id, _ = self._auth(request)
+        session = self.active.get(data["session_id"])
+        if session is None or session[0] != user_id:
+            raise HttpError(404, "seans bulunamadı")
+        _, therapy_type, planned, started = session
+        # Cihazın kendi ölçtüğü süre ağ gecikmesinden etkilenmediği için tercih edilir
+        elapsed = data.get("elapsed")
+        elapsed = time.monotonic() - started if elapsed is None else float(elapsed)
+        if not math.isfinite(elapsed) or elapsed < 0:
+            raise HttpError(400, f"geçersiz elapsed: {data['elapsed']}")
+        status = data.get("status") or (
+            database.STATUS_COMPLETED if elapsed >= planned - COMPLETION_TOLERANCE
+            else database.STATUS_STOPPED)
+        if status not in (database.STATUS_COMPLETED, database.STATUS_STOPPED):
+            raise HttpError(400, f"geçersiz status: {status}")
+        del self.active[data["session_id"]]
+        entry = make_entry(therapy_type, elapsed, status, user_id)
+        await self.writer.write([entry])
+        return dict(zip(ENTRY_FIELDS, entry))
+
+    async def push_history(self, request, data):
+        """
+        Cihazda önbelleğe alınmış kayıtları toplu kabul eder. entry_uid
+        sayesinde tekrar gönderilen kayıtlar ikinci kez eklenmez.
+        """
+        user_id, role = self._auth(request)
+        entries = []
+        for values in data["entries"]:
+            entry = dict(zip(ENTRY_FIELDS, values))
+            if role != "admin" or entry.get("user_id") is None:
+                entry["user_id"] = user_id
+            entries.append(tuple(entry[field] for field in ENTRY_FIELDS))
+        if entries:
+            await self.writer.write(entries)
+        return {"accepted": len(entries)}
+
+    async def get_history(self, request, data):
+        user = self._auth(request)
+        query = request.query
+        before = None
+        if "before" in query:
+            timestamp, _, row_id = query["before"].rpartition(",")
+            before = (timestamp, int(row_id))
+        # Yöneticiye ad-soyad JOIN yerine kullanıcı önbelleğinden eklenir
+        fetch = (database.fetch_history_page_with_users if user[1] == "admin"
+                 else database.fetch_therapy_history_page)
+        rows = await self._read(fetch,
+                                before=before,
+                                limit=min(int(query.get("limit", database.HISTORY_PAGE_SIZE)),
+                                          MAX_HISTORY_LIMIT),
+                                user_id=self._target_user(request, user),
+                                therapy_type=query.get("therapy_type"),
+                                status=query.get("status"),
+                                date_from=query.get("from"),
+                                date_to=query.get("to"))
+        return {"rows": [list(row) for row in rows]}
+
+    async def get_stats(self, request, data):
+        user = self._auth(request)
+        user_id = self._target_user(request, user)
+        stats = await self._read(database.fetch_usage_stats,
+                                 database.ALL_USERS if user_id is None else user_id)
+        return {"by_type": [list(row) for row in stats["by_type"]], "total": stats["total"],
+                "per_day": [list(row) for row in stats["per_day"]]}
+
+
+def run(host="127.0.0.1", port=DEFAULT_PORT):
+    """
+    Sunucuyu başlatır ve Ctrl+C ile durdurulana kadar çalıştırır.
+    """
+    async def main():
+        server = await TherapyServer(host, port).start()
+        print(f"Sunucu dinliyor: http://{server.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        database.get_executor().shutdown(wait=True)
@@ -0,0 +1,178 @@
+import os
+import glob
+import json
+import time
+import uuid
+import threading
+from datetime import datetime, timezone
+
+# Bir kaydın alanları; history tablosuna toplu yazımda bu sırayla kullanılır
+ENTRY_FIELDS = ("entry_uid", "therapy_type", "mode", "duration", "duration_ms",
+                "status", "timestamp", "user_id")
+
+
+def journal_path_for(db_path):
+    """
+    Veritabanı dosyasına ait seans günlüğünün yolu (ör. therapy_history.sessions.log).
+    SQLite'ın kendi '-journal' dosyasıyla karışmaması için ayrı bir ad kullanılır.
+    """
+    return os.path.splitext(db_path)[0] + ".sessions.log"
+
+
+def make_entry(therapy_type, duration, status, user_id, mode="Manual"):
+    """
+    Tek bir seans kaydını, history satırına dönüştürülecek tuple olarak oluşturur.
+    Zaman damgası CURRENT_TIMESTAMP ile aynı biçimde (UTC) kayıt anında alınır,
+    böylece günlükten geri oynatılan kayıtlar da gerçek bitiş zamanını taşır.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return (uuid.uuid4().hex, therapy_type, mode, round(duration), round(duration * 1000),
+            status, timestamp, user_id)
+
+
+class SessionJournal:
+    """
+    Yalnızca sona eklenen (append-only) JSON satırları günlüğü.
+    Aktif dosya dolduğunda/boşaltılırken '<yol>.<n>' segmentine döndürülür;
+    segment veritabanına yazıldıktan sonra silinir. Silinmemiş segmentler
+    çökme sonrası geri oynatılacak kayıtları içerir.
+    """
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync  # True: güç kesintisine karşı da güvenli, ama her kayıtta fsync
+        self._file = None
+
+    def open(self):
+        """
+        Önceki çalışmadan kalan aktif dosyayı segment yapar ve yeni günlüğü açar.
+        """
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self.rotate()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self):
+        """
+        Aktif dosyayı yeni bir segmente taşır ve segmentin yolunu döndürür.
+        """
+        if self._file is not None:
+            self._file.close()
+        segment = f"{self.path}.{time.time_ns()}"
+        os.replace(self.path, segment)
+        if self._file is not None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return segment
+
+    def segments(self):
+        """
+        Henüz veritabanına yazıldığı onaylanmamış segmentler (eskiden yeniye).
+        Sayısal uzantısı olmayan dosyalar (ör. elle alınmış .bak kopyaları) atlanır.
+        """
+        segments = [path for path in glob.glob(glob.escape(self.path) + ".*")
+                    if path.rsplit(".", 1)[1].isdigit()]
+        return sorted(segments, key=lambda path: int(path.rsplit(".", 1)[1]))
+
+    @staticmethod
+    def read(segment):
+        """
+        Segmentteki kayıtları döndürür. Çökme sırasında yarım kalmış son satır atlanır.
+        """
+        entries = []
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(tuple(json.loads(line)))
+                except ValueError:
+                    continue
+        return entries
+
+    @staticmethod
+    def discard(segment):
+        try:
+            os.remove(segment)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class WriteBehindLogger:
+    """
+    Seans kayıtlarını önce bellek kuyruğuna ve günlüğe ekler, veritabanına ise
+    batch_size kayda ulaşıldığında veya flush_interval saniyede bir, tek bir
+    işlemde toplu (executemany) yazar. log() çağrısı yalnızca bir dosya
+    eklemesi kadar sürer.
+
+    write_batch(entries) kayıtları veritabanına yazar; submit verilirse
+    yazım o yürütücüde (ör. DatabaseExecutor.submit) yapılır.
+    """
+
+    def __init__(self, journal, write_batch, submit=None, batch_size=50, flush_interval=2.0):
+        self.journal = journal
+        self.write_batch = write_batch
+        self.submit = submit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.journal.open()
+        self._thread = threading.Thread(target=self._run, name="session-log-flusher", daemon=True)
+        self._thread.start()
+
+    def log(self, therapy_type, duration, status, user_id, mode="Manual"):
+        """
+        Bir seans kaydını günlüğe ve kuyruğa ekler; veritabanı yazımı ertelenir.
+        """
+        entry = make_entry(therapy_type, duration, status, user_id, mode)
+        with self._lock:
+            self.journal.append(entry)
+            self.pending.append(entry)
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+        return entry
+
+    def flush(self):
+        """
+        Kuyruktaki kayıtları toplu olarak veritabanına gönderir.
+        Yazım başarılı olunca ilgili günlük segmenti silinir; başarısız olursa
+        segment bir sonraki açılışta geri oynatılmak üzere diskte kalır.
+        """
+        with self._lock:
+            if not self.pending:
+                return None
+            batch, self.pending = self.pending, []
+            segment = self.journal.rotate()
+
+        if self.submit is None:
+            self.write_batch(batch)
+            self.journal.discard(segment)
+            return None
+
+        future = self.submit(self.write_batch, batch)
+        future.add_done_callback(
+            lambda done: done.exception() is None and self.journal.discard(segment))
+        return future
+
+    def close(self):
+        """
+        Zamanlayıcı thread'ini durdurur ve kalan kayıtları gönderir.
+        """
+        self._closed.set()
+        self._thread.join()
+        self.flush()
+        self.journal.close()
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,291 @@
+"""
+Çevrimdışı öncelikli eşitleme. Her cihaz kendi therapy_history.db'sine yazar
+(log_therapy yerel diskte kalır); eşitleme arka planda yalnızca farkları
+(yeni seanslar ve kullanıcılar) sıkıştırılmış paketler halinde merkezi
+depoya gönderir ve diğer cihazların paketlerini alır.
+
+    python cli.py sync --store /mnt/klinik/sync          (tek seferlik)
+
+Yüksek su işaretleri (high-water mark) sync_state tablosunda tutulur:
+    push.history / push.users: merkeze gönderilmiş son yerel id
+    pull.seq: depodan alınmış son paket numarası
+Kayıtlar cihazlar arasında entry_uid (seanslar) ve serial_number
+(kullanıcılar) ile eşleşir; tekrar gönderilen/alınan paketler çift kayıt üretmez.
+"""
+import gzip
+import json
+import os
+import threading
+import uuid
+
+import database
+
+SYNC_BATCH_SIZE = 5000
+SYNC_INTERVAL = 30.0
+
+SQL_SYNC_GET = "SELECT value FROM sync_state WHERE key = ?"
+SQL_SYNC_SET = "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)"
+# Gönderilmemiş seanslara cihazlar arası eşsiz kimlik verilir (bir kez, yerelde kalıcı)
+SQL_ASSIGN_ENTRY_UIDS = """UPDATE history SET entry_uid = lower(hex(randomblob(16)))
+                           WHERE id > ? AND entry_uid IS NULL"""
+SQL_USERS_DELTA = """SELECT id, name, surname, serial_number, password, role
+                     FROM users
+                     WHERE id > ?
+                     ORDER BY id
+                     LIMIT ?"""
+# import_history_bulk satır biçiminde (user_id yerine serial_number ile)
+SQL_HISTORY_DELTA = """SELECT history.id, history.entry_uid, history.therapy_type, history.mode,
+                              history.duration, history.duration_ms, history.status,
+                              history.timestamp, users.serial_number
+                       FROM history
+                       LEFT JOIN users ON history.user_id = users.id
+                       WHERE history.id > ?
+                       ORDER BY history.id
+                       LIMIT ?"""
+
+
+# ---------------------------- MERKEZİ DEPO ----------------------------
+
+class DirectoryStore:
+    """
+    Paylaşılan bir dizini merkezi depo olarak kullanır. Her paket
+    '<sıra>.json.gz' dosyasıdır; sıra numarası dosya os.link ile yerine
+    konarak alınır, böylece eşzamanlı yazan cihazlar aynı numarayı alamaz
+    ve okuyucular boşluksuz, artan sırada paket görür.
+    """
+
+    SUFFIX = ".json.gz"
+
+    def __init__(self, path):
+        # Dizine burada dokunulmaz; ağ paylaşımı o an erişilemez olabilir
+        self.path = path
+
+    def _sequences(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(int(name[:-len(self.SUFFIX)]) for name in os.listdir(self.path)
+                      if name.endswith(self.SUFFIX))
+
+    def push(self, payload):
+        """
+        Sıkıştırılmış paketi ekler ve sıra numarasını döndürür.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        temporary = os.path.join(self.path, f".{uuid.uuid4().hex}.tmp")
+        with open(temporary, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            sequences = self._sequences()
+            sequence = sequences[-1] + 1 if sequences else 1
+            while True:
+                try:
+                    os.link(temporary, os.path.join(self.path, f"{sequence:012d}{self.SUFFIX}"))
+                    return sequence
+                except FileExistsError:
+                    sequence += 1
+        finally:
+            os.remove(temporary)
+
+    def pull(self, after):
+        """
+        after'dan sonraki paketleri (sıra, yük) olarak sırayla üretir.
+        """
+        for sequence in self._sequences():
+            if sequence > after:
+                with open(os.path.join(self.path, f"{sequence:012d}{self.SUFFIX}"), "rb") as f:
+                    yield sequence, f.read()
+
+
+def encode_batch(batch):
+    return gzip.compress(json.dumps(batch, ensure_ascii=False).encode(), 6)
+
+
+def decode_batch(payload):
+    return json.loads(gzip.decompress(payload))
+
+
+# ---------------------------- VERİTABANI ADIMLARI ----------------------------
+# Bu fonksiyonlar veritabanı worker'ında çalışır; depo erişimi (yavaş veya
+# ulaşılamaz olabilir) bunların dışında yapılır.
+
+def _get(conn, key, default=0):
+    row = conn.execute(SQL_SYNC_GET, (key,)).fetchone()
+    return type(default)(row[0]) if row else default
+
+
+def device_id():
+    """
+    Bu veritabanının kalıcı eşitleme kimliği (ilk çağrıda oluşturulur).
+    """
+    with database.get_pool().transaction() as conn:
+        value = _get(conn, "device_id", "")
+        if not value:
+            value = uuid.uuid4().hex
+            conn.execute(SQL_SYNC_SET, ("device_id", value))
+        return value
+
+
+def collect_delta(limit=SYNC_BATCH_SIZE):
+    """
+    Gönderilmemiş kullanıcı ve seansların bir paketini döndürür, yoksa None.
+    Kullanıcılar önce gönderilir; böylece merkezde her seansın kullanıcısı
+    kendisinden önceki (veya aynı) pakette bulunur.
+    """
+    with database.get_pool().transaction() as conn:
+        user_mark = _get(conn, "push.users")
+        history_mark = _get(conn, "push.history")
+        users = conn.execute(SQL_USERS_DELTA, (user_mark, limit)).fetchall()
+        history = []
+        if len(users) < limit:
+            conn.execute(SQL_ASSIGN_ENTRY_UIDS, (history_mark,))
+            history = conn.execute(SQL_HISTORY_DELTA, (history_mark, limit - len(users))).fetchall()
+    if not users and not history:
+        return None
+    return {
+        "users": [list(row[1:]) for row in users],
+        "history": [list(row[1:]) for row in history],
+        "marks": {"push.users": users[-1][0] if users else user_mark,
+                  "push.history": history[-1][0] if history else history_mark},
+    }
+
+
+def mark_pushed(marks):
+    with database.get_pool().transaction() as conn:
+        conn.executemany(SQL_SYNC_SET, [(key, str(value)) for key, value in marks.items()])
+
+
+def apply_batch(sequence, batch):
+    """
+    Başka bir cihazın paketini yerel veritabanına işler ve pull.seq'i ilerletir.
+    Yerelde henüz gönderilmemiş kayıt yoksa gönderim işaretleri de eklenen
+    satırların sonrasına taşınır; böylece alınan kayıtlar geri gönderilmez.
+    """
+    conn = database.get_pool().connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        marks = {}
+        for key, table, rows, sql in (
+                ("push.users", "users", batch["users"], database.SQL_INSERT_USER_IGNORE),
+                ("push.history", "history",
+                 [row + [None] for row in batch["history"]], database.SQL_IMPORT_HISTORY)):
+            last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            caught_up = last_id <= _get(conn, key)
+            conn.executemany(sql, rows)
+            if caught_up:
+                marks[key] = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        marks["pull.seq"] = sequence
+        conn.executemany(SQL_SYNC_SET, [(key, str(value)) for key, value in marks.items()])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def pulled_sequence():
+    return _get(database.get_pool().connection(), "pull.seq")
+
+
+# ---------------------------- EŞİTLEME ----------------------------
+
+class SyncEngine:
+    """
+    Gönder/al döngüsü. submit verilirse (ör. DatabaseExecutor.submit) tüm
+    veritabanı adımları o worker'da çalışır; depo G/Ç'si çağıran thread'de
+    kalır, bu yüzden yavaş bir depo yerel yazımları bekletmez.
+    """
+
+    def __init__(self, store, submit=None):
+        self.store = store
+        self.submit = submit
+        self._device = None
+
+    def _db(self, fn, *args):
+        if self.submit is None:
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    def push(self):
+        """
+        Bekleyen tüm farkları paketler halinde gönderir; gönderilen satır sayısını döndürür.
+        """
+        if self._device is None:
+            self._device = self._db(device_id)
+        sent = 0
+        while True:
+            batch = self._db(collect_delta)
+            if batch is None:
+                return sent
+            marks = batch.pop("marks")
+            batch["device"] = self._device
+            self.store.push(encode_batch(batch))
+            # Depoya yazılıp işaretlenmeden çökülürse paket tekrar gönderilir; alıcılar
+            # entry_uid/serial_number ile tekrarları atlar
+            self._db(mark_pushed, marks)
+            sent += len(batch["users"]) + len(batch["history"])
+
+    def pull(self):
+        """
+        Diğer cihazların yeni paketlerini uygular; uygulanan paket sayısını döndürür.
+        """
+        if self._device is None:
+            self._device = self._db(device_id)
+        applied = 0
+        for sequence, payload in self.store.pull(self._db(pulled_sequence)):
+            batch = decode_batch(payload)
+            if batch.get("device") == self._device:
+                batch = {"users": [], "history": []}
+            else:
+                applied += 1
+            self._db(apply_batch, sequence, batch)
+        return applied
+
+    def sync(self):
+        """
+        Önce gönderir, sonra alır: (gönderilen satır, uygulanan paket).
+        """
+        return self.push(), self.pull()
+
+
+class SyncWorker:
+    """
+    SyncEngine'i arka plan thread'inde interval saniyede bir çalıştırır.
+    Depoya ulaşılamazsa veya bir tur hata verirse hata last_error'da tutulur
+    ve bir sonraki tur beklenir; yerel kayıtlar işaretlerin gerisinde kalır
+    ve depo erişilebilir olunca gönderilir.
+    on_pulled(applied) yeni paket uygulandığında worker thread'inden çağrılır.
+    """
+
+    def __init__(self, engine, interval=SYNC_INTERVAL, on_pulled=None):
+        self.engine = engine
+        self.interval = interval
+        self.on_pulled = on_pulled
+        self.last_error = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sync-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def sync_now(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                _, applied = self.engine.sync()
+                self.last_error = None
+                if applied and self.on_pulled:
+                    self.on_pulled(applied)
+            except Exception as error:
+                self.last_error = error
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import math
+import time
+
+import instrument
+
+
+class CountdownTimer:
+    """
+    Monotonik saate dayalı, kaymasız geri sayım zamanlayıcısı.
+
+    Kalan ve geçen süre her tikte time.monotonic() ile son tarihe (deadline)
+    göre yeniden hesaplanır; tikler başlangıç anına göre sabit sınırlara
+    (başlangıç + k * tick) planlanır. Böylece bir tikin gecikmesi sonrakilere
+    eklenmez ve uzun seanslarda birikimli kayma oluşmaz.
+
+    Thread kullanmaz: schedule(delay_ms, fn) -> handle ve cancel(handle)
+    çağrıları dışarıdan verilir (Tk için widget.after / widget.after_cancel).
+    """
+
+    def __init__(self, duration, on_tick, on_finish, schedule, cancel,
+                 clock=time.monotonic, tick=1.0):
+        self.duration = duration
+        self.on_tick = on_tick        # on_tick(remaining_seconds)
+        self.on_finish = on_finish    # on_finish(elapsed_seconds)
+        self.schedule = schedule
+        self.cancel = cancel
+        self.clock = clock
+        self.tick = tick
+        self.started_at = None
+        self.deadline = None
+        self.stopped_at = None
+        self.paused_at = None
+        self._ticks = 0
+        self._handle = None
+
+    @property
+    def running(self):
+        return self.started_at is not None and self.stopped_at is None
+
+    @property
+    def paused(self):
+        return self.paused_at is not None
+
+    def start(self):
+        """
+        Geri sayımı başlatır ve ilk tiği hemen bildirir.
+        """
+        self.started_at = self.clock()
+        self.deadline = self.started_at + self.duration
+        self.stopped_at = None
+        self.paused_at = None
+        self._ticks = 0
+        self.on_tick(self.duration)
+        self._schedule_next()
+
+    def pause(self):
+        """
+        Geri sayımı dondurur; duraklatılan süre geçen süreye sayılmaz.
+        """
+        if self.running and not self.paused:
+            self._cancel_pending()
+            self.paused_at = self.clock()
+
+    def resume(self):
+        """
+        Duraklatılmış geri sayımı kaldığı yerden sürdürür. Başlangıç ve bitiş
+        duraklama süresi kadar ötelenir, böylece tik sınırları korunur.
+        """
+        if self.running and self.paused:
+            shift = self.clock() - self.paused_at
+            self.started_at += shift
+            self.deadline += shift
+            self.paused_at = None
+            self.on_tick(self.remaining())
+            self._ticks = int((self.clock() - self.started_at) / self.tick)
+            self._schedule_next()
+
+    def stop(self):
+        """
+        Geri sayımı durdurur ve geçen süreyi milisaniye hassasiyetinde döndürür.
+        """
+        if self.running:
+            self._cancel_pending()
+            self.stopped_at = self.paused_at if self.paused else self.clock()
+            self.paused_at = None
+        return self.elapsed()
+
+    def _now(self):
+        # Durmuş veya duraklatılmış sayacın saati o anda kalır
+        if self.stopped_at is not None:
+            return self.stopped_at
+        if self.paused_at is not None:
+            return self.paused_at
+        return self.clock()
+
+    def elapsed(self):
+        """
+        Başlangıçtan bu yana (durdurulduysa durdurma anına kadar) geçen saniye.
+        """
+        if self.started_at is None:
+            return 0.0
+        return round(self._now() - self.started_at, 3)
+
+    def remaining(self):
+        if self.deadline is None:
+            return self.duration
+        return max(0.0, self.deadline - self._now())
+
+    def _cancel_pending(self):
+        if self._handle is not None:
+            self.cancel(self._handle)
+            self._handle = None
+
+    @staticmethod
+    def format(seconds):
+        """
+        Kalan süreyi MM:SS olarak biçimlendirir (kısmi saniye yukarı yuvarlanır).
+        """
+        minutes, sec = divmod(math.ceil(seconds), 60)
+        return f"{minutes:02}:{sec:02}"
+
+    def _schedule_next(self):
+        self._ticks += 1
+        target = min(self.started_at + self._ticks * self.tick, self.deadline)
+        delay_ms = max(0, math.ceil((target - self.clock()) * 1000))
+        self._handle = self.schedule(delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._handle = None
+        if not self.running or self.paused:
+            return
+        now = self.clock()
+        if now >= self.deadline:
+            self.stopped_at = now
+            self.on_finish(self.elapsed())
+            return
+        # Geç kalan tikleri atla; her zaman bir sonraki sınırı hedefle
+        self._ticks = max(self._ticks, int((now - self.started_at) / self.tick))
+        self.on_tick(self.deadline - now)
+        self._schedule_next()
+
+
+class DeadlineScheduler:
+    """
+    Çok sayıda zamanlayıcıyı tek bir dış zamanlayıcıyla (ör. tek bir Tk after)
+    sürer. Son tarihler bir min-heap'te tutulur; dış zamanlayıcı her zaman
+    yalnızca en yakın son tarihe kurulur ve tetiklendiğinde vadesi gelen tüm
+    çağrılar sırayla çalıştırılır. İptal edilen kayıtlar heap'ten hemen
+    silinmez, sırası gelince atlanır.
+
+    after(delay_ms, fn) / after_cancel(handle) Tk ile aynı imzaya sahiptir;
+    CountdownTimer'a schedule/cancel olarak verilebilir.
+    """
+
+    def __init__(self, schedule, cancel, clock=time.monotonic):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.clock = clock
+        self._heap = []             # [son tarih, sıra, fn] listeleri; iptalde fn = None
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._armed = None          # (son tarih, dış handle)
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def after(self, delay_ms, fn):
+        entry = [self.clock() + delay_ms / 1000, next(self._counter), fn]
+        heapq.heappush(self._heap, entry)
+        self._arm()
+        return entry
+
+    def after_cancel(self, entry):
+        if entry[2] is not None:
+            entry[2] = None
+            self._cancelled += 1
+            # İptaller birikirse (sık duraklat/devam) heap yeniden kurulur
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                self._heap = [item for item in self._heap if item[2] is not None]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _arm(self):
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+        if not heap:
+            return
+        deadline = heap[0][0]
+        if self._armed is not None:
+            if self._armed[0] <= deadline:
+                return
+            self.cancel(self._armed[1])
+        delay_ms = max(0, math.ceil((deadline - self.clock()) * 1000))
+        self._armed = (deadline, self.schedule(delay_ms, self._on_timer))
+
+    def _on_timer(self):
+        self._armed = None
+        heap = self._heap
+        now = self.clock()
+        try:
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                fn = entry[2]
+                if fn is None:
+                    self._cancelled -= 1
+                    continue
+                entry[2] = None  # Çalışmış kaydın sonradan iptali etkisiz kalsın
+                if instrument.enabled:
+                    instrument.observe("timer.lateness_ms", (now - entry[0]) * 1000)
+                fn()
+        finally:
+            self._arm()
@@ -0,0 +1,155 @@
+import time
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import namedtuple
+from functools import partial
+from tkinter import ttk
+
+# Uygulama genelinde paylaşılan adlandırılmış fontlar. Tk bir adlandırılmış fontu
+# bir kez çözümler; widget'lar yalnızca adına başvurur.
+FONT_BODY = "TerapiBody"
+FONT_TITLE = "TerapiTitle"
+
+
+def init_theme(root, config):
+    """
+    Fontları, Tk seçenek veritabanını ve ttk stilini başlangıçta bir kez kurar.
+    Renk ve font seçenekleri widget sınıfı düzeyinde tanımlandığı için ekranlar
+    bu seçenekleri her widget'ta tekrar vermez.
+    """
+    family, size = config["font"]
+    title_family, title_size = config["title_font"]
+    tkfont.Font(root, name=FONT_BODY, family=family, size=size)
+    tkfont.Font(root, name=FONT_TITLE, family=title_family, size=title_size)
+
+    bg, button_bg, fg = config["bg_color"], config["button_color"], config["text_color"]
+    for pattern, value in (("*Font", FONT_BODY),
+                           ("*Frame.Background", bg),
+                           ("*Label.Background", bg),
+                           ("*Label.Foreground", fg),
+                           ("*Button.Background", button_bg),
+                           ("*Button.Foreground", fg),
+                           ("*Radiobutton.Background", bg),
+                           ("*Radiobutton.Foreground", fg),
+                           ("*Radiobutton.selectColor", button_bg)):
+        root.option_add(pattern, value)
+
+    style = ttk.Style(root)
+    style.configure("Treeview", font=FONT_BODY)
+    style.configure("Treeview.Heading", font=FONT_BODY)
+    style.configure("TCombobox", font=FONT_BODY)
+    return style
+
+
+# ---------------------------- BİLDİRİMSEL EKRAN TANIMI ----------------------------
+
+# kind: widget türü, name: frame üzerinde atanacak öznitelik adı (isteğe bağlı),
+# options: widget seçenekleri, pack: pack() argümanları
+Widget = namedtuple("Widget", ["kind", "name", "options", "pack"])
+
+WIDGET_CLASSES = {
+    "title": tk.Label,
+    "label": tk.Label,
+    "entry": tk.Entry,
+    "button": tk.Button,
+    "radio": tk.Radiobutton,
+    "image": tk.Label,
+}
+
+WIDGET_DEFAULTS = {
+    "title": {"font": FONT_TITLE},
+    "label": {},
+    "entry": {},
+    "button": {"width": 20, "height": 2},
+    "radio": {},
+    "image": {},
+}
+
+# Değeri frame üzerinden çözümlenen seçenekler (ör. "login", "master.show_login_screen")
+BOUND_OPTIONS = ("command", "variable", "textvariable")
+
+
+def title(text, name=None, pady=20):
+    return Widget("title", name, {"text": text}, {"pady": pady})
+
+
+def label(text, name=None, **pack):
+    return Widget("label", name, {"text": text}, pack)
+
+
+def entry(name, pady=5, **options):
+    return Widget("entry", name, options, {"pady": pady})
+
+
+def button(text, command, name=None, pady=10, **options):
+    """
+    command: frame'in bir metodu/özniteliği ("login", "master.show_login_screen"),
+    argümanlı çağrı için (yol, *argümanlar) tuple'ı ya da doğrudan bir callable.
+    """
+    return Widget("button", name, dict(options, text=text, command=command), {"pady": pady})
+
+
+def radio(text, variable, value, pady=5):
+    return Widget("radio", None, {"text": text, "variable": variable, "value": value}, {"pady": pady})
+
+
+def image(name, pady=10):
+    """
+    Görüntüsü sonradan (ör. AssetManager.bind ile) atanacak boş etiket.
+    """
+    return Widget("image", name, {}, {"pady": pady})
+
+
+def _resolve(frame, reference):
+    if callable(reference) or not isinstance(reference, (str, tuple)):
+        return reference
+    if isinstance(reference, tuple):
+        path, *args = reference
+        return partial(_resolve(frame, path), *args)
+    target = frame
+    for attribute in reference.split("."):
+        target = getattr(target, attribute)
+    return target
+
+
+def build(frame, spec):
+    """
+    Bildirimsel ekran tanımını (Widget listesi) frame içinde oluşturur ve paketler.
+    Adı verilen widget'lar frame'in özniteliği olarak atanır.
+    """
+    for widget in spec:
+        options = dict(WIDGET_DEFAULTS[widget.kind])
+        for key, value in widget.options.items():
+            options[key] = _resolve(frame, value) if key in BOUND_OPTIONS else value
+        instance = WIDGET_CLASSES[widget.kind](frame, **options)
+        instance.pack(**widget.pack)
+        if widget.name:
+            setattr(frame, widget.name, instance)
+
+
+# ---------------------------- SÜRE RAPORU ----------------------------
+
+class BuildTimings:
+    """
+    Açılış ve ekran oluşturma sürelerini toplar; cihaz üzerinde
+    iyileştirmeleri doğrulamak için metin rapor üretir.
+    """
+
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, name, seconds):
+        self.samples.setdefault(name, []).append(seconds * 1000)
+
+    def measure(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.record(name, time.perf_counter() - start)
+        return result
+
+    def report(self):
+        lines = [f"{'ölçüm':<28}{'adet':>6}{'ilk (ms)':>11}{'ort (ms)':>11}"]
+        for name, samples in self.samples.items():
+            lines.append(f"{name:<28}{len(samples):>6}{samples[0]:>11.2f}"
+                         f"{sum(samples) / len(samples):>11.2f}")
+        return "\n".join(lines)